@@ -0,0 +1,233 @@
+# batch_analyze.py
+
+"""
+Headless batch analysis of Mermaid network files (no Qt required).
+
+Files are parsed and analyzed in parallel worker processes; the main process
+is the only database writer. Example:
+
+    python batch_analyze.py networks/ --pattern "*.mmd" --workers 8
+    python batch_analyze.py "catalog/**/*.mmd" --project "Nightly"
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, FrozenSet, List
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parent))
+
+from ui.tabs.mermaid_parser import parse_mermaid
+from ui.tabs.network_graph import NetworkGraph
+from ui.tabs.path_extractor import PathExtractor, MAX_PATHS, TIME_BUDGET
+from ui.tabs.network_analysis import COMPONENT_TYPES, extract_components, connection_strings
+
+# Result fields kept for the final statistics once a file's results are saved
+SUMMARY_FIELDS = ('path', 'cached', 'bytes', 'nodes', 'edges', 'paths', 'listed_paths',
+                  'parse_time', 'analysis_time')
+
+# Fingerprints with cached path results that serve the run's path listing budget,
+# set in each worker by the pool initializer
+_cached_hashes: FrozenSet[str] = frozenset()
+
+
+def _init_worker(cached_hashes: FrozenSet[str]):
+    global _cached_hashes
+    _cached_hashes = cached_hashes
+
+
+def analyze_file(path: str, max_paths: int, time_budget: float) -> Dict:
+    """
+    Parse and analyze one Mermaid file (runs in a worker process).
+    Returns plain data for the database writer; path analysis is skipped
+    when results for the same network fingerprint are already cached, unless
+    their listing was cut short by a smaller budget.
+    """
+    started = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    parsed = parse_mermaid(content)
+    if not (parsed.has_components and parsed.has_connections):
+        raise ValueError("Invalid Mermaid file format")
+
+    components_data, _ = extract_components(parsed, COMPONENT_TYPES)
+    graph = NetworkGraph.from_edges(parsed.edges)
+    content_hash = parsed.fingerprint()
+    parsed_at = time.perf_counter()
+
+    result = {
+        'path': path,
+        'content': content,
+        'content_hash': content_hash,
+        'components_data': components_data,
+        'connections': connection_strings(graph),
+        'cached': content_hash in _cached_hashes,
+        'max_paths': max_paths,
+        'time_budget': time_budget,
+        'bytes': len(content.encode('utf-8')),
+        'nodes': graph.num_nodes,
+        'edges': graph.num_edges,
+        'paths': 0,
+        'listed_paths': 0,
+        'parse_time': parsed_at - started,
+        'analysis_time': 0.0
+    }
+    if result['cached']:
+        return result
+
+    path_extractor = PathExtractor(graph=graph, max_paths=max_paths, time_budget=time_budget)
+    start_points = graph.root_ids()
+    end_points = graph.leaf_ids()
+    path_counts = path_extractor.count_paths(start_points, end_points)
+    path_extractor.find_all_paths(start_points, end_points)
+
+    result.update(
+        path_data=path_extractor.get_path_data(),
+        path_counts=path_counts,
+        diagnostics=path_extractor.diagnostics,
+        paths=sum(stats["count"] for stats in path_counts.values()),
+        listed_paths=sum(len(paths) for paths in path_extractor.paths.values()),
+        analysis_time=time.perf_counter() - parsed_at
+    )
+    return result
+
+
+def find_input_files(inputs: List[str], pattern: str) -> List[str]:
+    """Expand directories (searched recursively with pattern) and glob patterns."""
+    files = []
+    for item in inputs:
+        if os.path.isdir(item):
+            files.extend(str(path) for path in Path(item).rglob(pattern) if path.is_file())
+        else:
+            files.extend(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+    return sorted(set(files))
+
+
+def save_result(db_ops, analysis_cache, project_id: int, result: Dict):
+    """Write one analyzed file to the database (main process only)."""
+    network = db_ops.save_network_structure(
+        project_id=project_id,
+        mermaid_content=result['content'],
+        components_data=result['components_data'],
+        connections=result['connections'],
+        content_hash=result['content_hash']
+    )
+
+    budget = {'max_paths': result['max_paths'], 'time_budget': result['time_budget']}
+    if result['cached']:
+        cached = analysis_cache.get(db_ops, result['content_hash'], **budget)
+        path_data = cached['path_data']
+        result['paths'] = sum(stats["count"] for stats in cached['path_counts'].values())
+        result['listed_paths'] = sum(len(paths) for paths in path_data.get("paths", {}).values())
+    else:
+        path_data = result['path_data']
+        analysis_cache.put(db_ops, result['content_hash'], {
+            'path_data': path_data,
+            'path_counts': result['path_counts']
+        }, truncated=path_data.get("truncated", False), **budget)
+
+    db_ops.update_network_analysis(
+        network_id=network.id,
+        paths_data=path_data,
+        diagnostics=path_data.get("diagnostics", [])
+    )
+
+
+def print_stats(results: List[Dict], failures: int, elapsed: float, write_time: float):
+    """Print throughput and totals for the run."""
+    total_bytes = sum(result['bytes'] for result in results)
+    megabytes = total_bytes / (1024 * 1024)
+    cached = sum(1 for result in results if result['cached'])
+
+    print(f"\nAnalyzed {len(results)} files ({failures} failed, {cached} from cache) in {elapsed:.2f} s")
+    print(f"  Throughput: {len(results) / elapsed:.2f} files/s, {megabytes / elapsed:.2f} MB/s "
+          f"({megabytes:.2f} MB read)")
+    print(f"  Network: {sum(result['nodes'] for result in results)} nodes, "
+          f"{sum(result['edges'] for result in results)} edges")
+    print(f"  Paths: {sum(result['paths'] for result in results)} counted, "
+          f"{sum(result['listed_paths'] for result in results)} listed")
+    print(f"  Worker time: parse {sum(result['parse_time'] for result in results):.2f} s, "
+          f"analysis {sum(result['analysis_time'] for result in results):.2f} s")
+    print(f"  Database writes: {write_time:.2f} s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze Mermaid network files without the GUI.")
+    parser.add_argument('inputs', nargs='+', help="Directories or glob patterns of Mermaid files")
+    parser.add_argument('--pattern', default='*.mmd',
+                        help="File pattern used inside directories (default: *.mmd)")
+    parser.add_argument('--project', default=None,
+                        help="Name of the project the results are saved under (created)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--max-paths', type=int, default=MAX_PATHS,
+                        help=f"Path listing budget per file (default: {MAX_PATHS})")
+    parser.add_argument('--time-budget', type=float, default=TIME_BUDGET,
+                        help=f"Seconds of path listing per file (default: {TIME_BUDGET:g})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Re-analyze networks even when cached results exist")
+    args = parser.parse_args(argv)
+
+    files = find_input_files(args.inputs, args.pattern)
+    if not files:
+        print("No Mermaid files found", file=sys.stderr)
+        return 1
+
+    # Only the main process touches the database
+    from utils.db import get_db
+    from ui.tabs.network_db_ops import NetworkDatabaseOperations
+    from ui.tabs.analysis_cache import analysis_cache
+
+    db = next(get_db())
+    db_ops = NetworkDatabaseOperations(db)
+    project = db_ops.create_project(
+        name=args.project or f"Batch analysis {datetime.now():%Y-%m-%d %H:%M}",
+        description=f"{len(files)} files analyzed by batch_analyze.py"
+    )
+    cached_hashes = frozenset() if args.no_cache else frozenset(
+        db_ops.get_cached_hashes(max_paths=args.max_paths, time_budget=args.time_budget)
+    )
+
+    print(f"Analyzing {len(files)} files with {args.workers} workers into project "
+          f"'{project.name}'")
+    results = []
+    failures = 0
+    write_time = 0.0
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(cached_hashes,)) as pool:
+        futures = {
+            pool.submit(analyze_file, path, args.max_paths, args.time_budget): path
+            for path in files
+        }
+        for future in as_completed(futures):
+            path = futures.pop(future)  # drops the future's reference to the full result
+            try:
+                result = future.result()
+                write_started = time.perf_counter()
+                save_result(db_ops, analysis_cache, project.id, result)
+                write_time += time.perf_counter() - write_started
+            except Exception as e:
+                failures += 1
+                print(f"  FAILED {path}: {e}", file=sys.stderr)
+                continue
+            # The content and path listing are in the database now; don't hold them for the whole run
+            results.append({field: result[field] for field in SUMMARY_FIELDS})
+            print(f"  [{len(results) + failures}/{len(files)}] {path}: "
+                  f"{result['nodes']} nodes, {result['paths']} paths"
+                  f"{' (cached)' if result['cached'] else ''}")
+
+    db.close()
+    print_stats(results, failures, time.perf_counter() - started, write_time)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
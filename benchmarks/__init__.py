@@ -0,0 +1 @@
+# benchmarks\__init__.py
\ No newline at end of file
@@ -0,0 +1,158 @@
+# benchmarks/generate_network.py
+
+"""
+Synthetic irrigation networks in the project's Mermaid dialect.
+
+The network is layered: one source distribution point (DP0) feeds levels
+of canals, gates, smart water meters and distribution points (MC, ZT, SW,
+DP, repeating) down to fields (F) on the last level. Level sizes grow
+geometrically so the node count hits the requested size. Every node has one
+parent on the previous level; `rejoin` gives that fraction of nodes a second
+parent (several paths to a node) and `loops` adds back edges from a node
+to one of its ancestors. Outgoing edges are written per node as
+`A["label"] ---> B & C`.
+
+    python benchmarks/generate_network.py --nodes 100000 --depth 8 -o net.mmd
+"""
+
+import argparse
+import random
+import sys
+from typing import Iterator, List, Optional
+
+# Component prefix per inner level (cycled) and their labels
+LEVEL_PREFIXES = ['MC', 'ZT', 'SW', 'DP']
+LABELS = {
+    'DP': "Distribution point",
+    'MC': "Canal",
+    'ZT': "Zatvor",
+    'SW': "Smart Water",
+    'F': "Field"
+}
+
+
+def level_sizes(nodes: int, depth: int, fanout: Optional[float] = None) -> List[int]:
+    """
+    Nodes per level (level 0 is the source). With no fanout, the growth
+    factor is chosen so the sizes add up to (about) nodes.
+    """
+    depth = max(1, min(depth, nodes - 1))
+    derived = fanout is None
+    if derived:
+        low, high = 1.0, float(nodes)
+        for _ in range(100):
+            fanout = (low + high) / 2
+            if sum(fanout ** level for level in range(depth + 1)) > nodes:
+                high = fanout
+            else:
+                low = fanout
+    sizes = [1]
+    for level in range(1, depth + 1):
+        sizes.append(max(sizes[-1], round(fanout ** level)))
+    if derived:
+        # Give the rounding difference to the fields
+        sizes[-1] = max(sizes[-2], sizes[-1] + nodes - sum(sizes))
+    return sizes
+
+
+def iter_mermaid_lines(
+    nodes: int = 1000,
+    depth: int = 6,
+    fanout: Optional[float] = None,
+    rejoin: float = 0.05,
+    loops: int = 0,
+    label_ratio: float = 0.5,
+    seed: int = 0
+) -> Iterator[str]:
+    """Yield the lines of a generated Mermaid flowchart."""
+    rng = random.Random(seed)
+    sizes = level_sizes(nodes, depth, fanout)
+    counters = {prefix: 0 for prefix in LABELS}
+
+    # Node IDs per level
+    levels = [['DP0']]
+    counters['DP'] = 1
+    for level, size in enumerate(sizes[1:], start=1):
+        prefix = 'F' if level == len(sizes) - 1 else LEVEL_PREFIXES[(level - 1) % len(LEVEL_PREFIXES)]
+        first = counters[prefix]
+        levels.append([f"{prefix}{first + i}" for i in range(size)])
+        counters[prefix] += size
+
+    # children[level][i] -> child IDs of node i on that level
+    # parent_of[level][i] -> index of node i's first parent on the level above
+    children = [[[] for _ in level_ids] for level_ids in levels]
+    parent_of = [[]]
+    for level in range(1, len(levels)):
+        parents, level_ids = len(levels[level - 1]), levels[level]
+        parent_of.append([i * parents // len(level_ids) for i in range(len(level_ids))])
+        for i, node_id in enumerate(level_ids):
+            parent = parent_of[level][i]
+            children[level - 1][parent].append(node_id)
+            if parents > 1 and rng.random() < rejoin:
+                other = rng.randrange(parents - 1)
+                children[level - 1][other + (other >= parent)].append(node_id)
+
+    # Back edges from an inner node to one of its ancestors (never the source)
+    for _ in range(loops if len(levels) > 3 else 0):
+        level = rng.randrange(2, len(levels) - 1)
+        source = rng.randrange(len(levels[level]))
+        ancestor, ancestor_level = source, level
+        for _ in range(rng.randrange(1, level)):
+            ancestor = parent_of[ancestor_level][ancestor]
+            ancestor_level -= 1
+        children[level][source].append(levels[ancestor_level][ancestor])
+
+    labelled = set()
+
+    def ref(node_id: str) -> str:
+        # The first mention of a node carries its label, like hand-drawn networks
+        if node_id in labelled or (node_id != 'DP0' and rng.random() >= label_ratio):
+            return node_id
+        labelled.add(node_id)
+        prefix = node_id.rstrip('0123456789')
+        return f'{node_id}["{LABELS[prefix]} {node_id[len(prefix):]}"]'
+
+    yield "flowchart TD"
+    for level, level_ids in enumerate(levels[:-1]):
+        yield f"    %% Level {level}"
+        for node_id, targets in zip(level_ids, children[level]):
+            if targets:
+                yield f"    {ref(node_id)} ---> {' & '.join(ref(target) for target in targets)}"
+
+
+def generate_network(**kwargs) -> str:
+    """Generated Mermaid flowchart as one string (see iter_mermaid_lines)."""
+    return "\n".join(iter_mermaid_lines(**kwargs)) + "\n"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Mermaid irrigation network.")
+    parser.add_argument('--nodes', type=int, default=1000, help="Approximate node count (default: 1000)")
+    parser.add_argument('--depth', type=int, default=6, help="Levels below the source (default: 6)")
+    parser.add_argument('--fanout', type=float, default=None,
+                        help="Growth per level (default: derived from --nodes and --depth)")
+    parser.add_argument('--rejoin', type=float, default=0.05,
+                        help="Fraction of nodes with a second parent (default: 0.05)")
+    parser.add_argument('--loops', type=int, default=0, help="Back edges creating loops (default: 0)")
+    parser.add_argument('--label-ratio', type=float, default=0.5,
+                        help="Fraction of nodes written with a label (default: 0.5)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument('-o', '--output', default=None, help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    lines = iter_mermaid_lines(
+        nodes=args.nodes, depth=args.depth, fanout=args.fanout, rejoin=args.rejoin,
+        loops=args.loops, label_ratio=args.label_ratio, seed=args.seed
+    )
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for line in lines:
+            output.write(line + "\n")
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# benchmarks/run_benchmarks.py
+
+"""
+Benchmark suite for network analysis on generated networks.
+
+For each network size every stage of the upload and analysis pipeline is
+timed (best and median of --repeat runs) and then run once more under
+tracemalloc to record its peak memory. Results are written as JSON; pass an
+earlier results file with --compare to print per-stage speedups.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/before.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add project root to Python path
+sys.path.append(str(Path(__file__).parents[1]))
+
+from benchmarks.generate_network import generate_network
+from ui.tabs.mermaid_parser import parse_mermaid
+from ui.tabs.network_graph import NetworkGraph
+from ui.tabs.path_extractor import PathExtractor, PAGE_SIZE
+from ui.tabs.network_analysis import COMPONENT_TYPES, extract_components, connection_strings
+from ui.tabs.network_db_ops import NetworkDatabaseOperations
+from utils.db import DatabaseManager
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+DEFAULT_SIZES = [1000, 10000, 100000]
+VIEWER_PAGES = 50  # end points whose first page the viewer stage fetches
+
+
+def pipeline_stages(db_ops: NetworkDatabaseOperations, project_id: int) -> List[Tuple[str, Callable]]:
+    """
+    (name, stage) pairs in pipeline order. Each stage reads the results of
+    earlier stages from a shared state dict and returns its own result.
+    """
+    def find_all_paths(state):
+        path_extractor = PathExtractor(graph=state['build_graph'])
+        path_extractor.find_all_paths(state['start_points'], state['end_points'])
+        return path_extractor
+
+    def viewer_pages(state):
+        # What the path viewer asks for: the summary, then a page per expanded end point
+        path_extractor = state['find_all_paths']
+        summary = path_extractor.get_end_point_summary()
+        pages = [json.dumps(path_extractor.get_path_page(entry['end_point'], 0, PAGE_SIZE))
+                 for entry in summary[:VIEWER_PAGES]]
+        return json.dumps(summary), pages
+
+    def save_network_structure(state):
+        return db_ops.save_network_structure(
+            project_id=project_id,
+            mermaid_content=state['content'],
+            components_data=state['extract_components'][0],
+            connections=connection_strings(state['build_graph']),
+            content_hash=state['fingerprint']
+        )
+
+    def update_network_analysis(state):
+        path_data = state['get_path_data']
+        return db_ops.update_network_analysis(
+            network_id=state['save_network_structure'].id,
+            paths_data=path_data,
+            diagnostics=path_data.get("diagnostics", [])
+        )
+
+    def end_points(state):
+        graph = state['build_graph']
+        state['start_points'] = graph.root_ids()
+        return graph.leaf_ids()
+
+    return [
+        ('parse_mermaid', lambda state: parse_mermaid(state['content'])),
+        ('extract_components', lambda state: extract_components(state['parse_mermaid'], COMPONENT_TYPES)),
+        ('build_graph', lambda state: NetworkGraph.from_edges(state['parse_mermaid'].edges)),
+        ('fingerprint', lambda state: state['parse_mermaid'].fingerprint()),
+        ('end_points', end_points),
+        ('count_paths', lambda state: PathExtractor(graph=state['build_graph']).count_paths(
+            state['start_points'], state['end_points'])),
+        ('find_all_paths', find_all_paths),
+        ('get_path_data', lambda state: state['find_all_paths'].get_path_data()),
+        ('viewer_pages', viewer_pages),
+        ('save_network_structure', save_network_structure),
+        ('update_network_analysis', update_network_analysis),
+    ]
+
+
+def run_pipeline(stages, state: Dict, timings: Dict[str, List[float]], trace: bool = False) -> Dict[str, int]:
+    """Run every stage once; returns each stage's peak memory when tracing."""
+    peaks = {}
+    for name, stage in stages:
+        if trace:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        state[name] = stage(state)
+        elapsed = time.perf_counter() - started
+        if trace:
+            peaks[name] = tracemalloc.get_traced_memory()[1] - baseline
+        else:
+            timings[name].append(elapsed)
+    return peaks
+
+
+def benchmark_size(nodes: int, args, db_ops, project_id: int) -> Dict:
+    """Benchmark every stage on one generated network."""
+    started = time.perf_counter()
+    content = generate_network(nodes=nodes, depth=args.depth, rejoin=args.rejoin,
+                               loops=args.loops, seed=args.seed)
+    generate_time = time.perf_counter() - started
+
+    stages = pipeline_stages(db_ops, project_id)
+    timings = {name: [] for name, _ in stages}
+    state = {'content': content}
+    for _ in range(args.repeat):
+        run_pipeline(stages, state, timings)
+
+    peaks = {}
+    if not args.no_memory:
+        tracemalloc.start()
+        try:
+            peaks = run_pipeline(stages, state, timings, trace=True)
+        finally:
+            tracemalloc.stop()
+
+    graph = state['build_graph']
+    path_counts = state['count_paths']
+    return {
+        'nodes': graph.num_nodes,
+        'edges': graph.num_edges,
+        'bytes': len(content.encode('utf-8')),
+        'start_points': len(state['start_points']),
+        'end_points': len(state['end_points']),
+        'paths': sum(stats["count"] for stats in path_counts.values()),
+        'listed_paths': sum(len(paths) for paths in state['find_all_paths'].paths.values()),
+        'generate_seconds': generate_time,
+        'stages': {
+            name: {
+                'seconds_min': min(timings[name]),
+                'seconds_median': statistics.median(timings[name]),
+                'peak_memory_bytes': peaks.get(name)
+            }
+            for name, _ in stages
+        }
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parents[1],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result: Dict, baseline: Optional[Dict] = None):
+    print(f"\n{result['nodes']} nodes, {result['edges']} edges, {result['bytes'] / 1024:.0f} KB, "
+          f"{result['paths']} paths ({result['listed_paths']} listed)")
+    for name, stage in result['stages'].items():
+        line = f"  {name:<24} {stage['seconds_min'] * 1000:>10.1f} ms"
+        if stage['peak_memory_bytes'] is not None:
+            line += f" {stage['peak_memory_bytes'] / (1024 * 1024):>9.1f} MB"
+        previous = (baseline or {}).get('stages', {}).get(name)
+        if previous and stage['seconds_min'] > 0:
+            line += f"   {previous['seconds_min'] / stage['seconds_min']:>6.2f}x vs baseline"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark network analysis on generated networks.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Node counts to benchmark (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--depth', type=int, default=8, help="Network depth (default: 8)")
+    parser.add_argument('--rejoin', type=float, default=0.05,
+                        help="Fraction of nodes with a second parent (default: 0.05)")
+    parser.add_argument('--loops', type=int, default=2, help="Loops per network (default: 2)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage (default: 3)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc run")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Results file (default: benchmarks/results/benchmark-<time>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            baselines = {result['nodes']: result for result in json.load(file)['results']}
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Scratch database, so benchmarks never touch the application's data
+        db_manager = DatabaseManager(f"sqlite:///{Path(tmp_dir) / 'benchmark.db'}")
+        db = db_manager.get_session()
+        db_ops = NetworkDatabaseOperations(db)
+        project = db_ops.create_project(name="Benchmark")
+        try:
+            for nodes in args.sizes:
+                result = benchmark_size(nodes, args, db_ops, project.id)
+                results.append(result)
+                print_result(result, baselines.get(result['nodes']))
+        finally:
+            db.close()
+            db_manager.engine.dispose()
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump({
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'results': results
+        }, file, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
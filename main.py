@@ -1,19 +1,36 @@
 # main.py
 
+import os
 import sys
+import time
 from pathlib import Path
 
+# Set QUSHTEPA_STARTUP_TIMING=1 to print how long startup takes
+STARTUP_TIMING = os.environ.get("QUSHTEPA_STARTUP_TIMING") == "1"
+_started = time.perf_counter()
+
 # Add project root to Python path
 sys.path.append(str(Path(__file__).parent))
 
+from PySide6.QtCore import Qt, QCoreApplication, QTimer
 from PySide6.QtWidgets import QApplication
 from ui.main_window import MainWindow
 
+def report_startup(stage: str):
+    if STARTUP_TIMING:
+        print(f"[startup] {stage}: {time.perf_counter() - _started:.3f} s", file=sys.stderr)
+
 def main():
+    report_startup("imports")
+    # Required before the QApplication exists since WebEngine is loaded later, on demand
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
     window = MainWindow()
+    report_startup("main window created")
     window.show()
+    # Runs after the first tab is built (queued earlier by MainWindow)
+    QTimer.singleShot(0, lambda: report_startup("first tab shown"))
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
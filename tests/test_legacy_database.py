@@ -0,0 +1,80 @@
+# tests/test_legacy_database.py
+
+import shutil
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parents[1]
+sys.path.append(str(ROOT))
+
+from utils.db import DatabaseManager
+from ui.tabs.network_db_ops import NetworkDatabaseOperations
+from ui.tabs.network_loader import network_loader
+from ui.tabs.capacity_engine import run_capacity_analysis
+from ui.tabs.delivery_scheduler import run_delivery_schedule, run_reschedule
+from ui.tabs.requirements_engine import run_requirements_analysis
+
+# The shipped database predates the current schema: its component properties
+# are json.dumps strings stored in the JSON column ('"{}"')
+LEGACY_DATABASE = ROOT / 'qushtepa_irrigation.db'
+NETWORK_ID = 1
+
+
+@pytest.fixture
+def db_ops(tmp_path):
+    """Operations on a migrated copy of the shipped database."""
+    path = tmp_path / 'legacy.db'
+    shutil.copy(LEGACY_DATABASE, path)
+    manager = DatabaseManager(f"sqlite:///{path}")
+    session = manager.get_session()
+    network_loader.clear()
+    yield NetworkDatabaseOperations(session)
+    network_loader.clear()
+    session.close()
+    manager.engine.dispose()
+
+
+def test_component_rows_have_dict_properties(db_ops):
+    rows = db_ops.get_component_rows(NETWORK_ID)
+    assert rows
+    assert all(properties == {} for _, _, _, properties in rows)
+
+
+def test_capacity_analysis_of_legacy_network(db_ops):
+    summary = run_capacity_analysis(db_ops, NETWORK_ID, default_demand=1.0)['result'].summary()
+    assert summary['demand_points'] > 0
+    assert summary['total_delivered'] == summary['total_demand']
+
+
+def test_update_legacy_properties(db_ops):
+    assert db_ops.update_component_properties(NETWORK_ID, {'DP0': {'capacity': 120.0}}) == 1
+    properties = dict((row[0], row[3]) for row in db_ops.get_component_rows(NETWORK_ID))
+    assert properties['DP0'] == {'capacity': 120.0}
+    assert properties['DP1'] == {}
+
+
+def test_delivery_schedule_of_legacy_network(db_ops):
+    scheduled = run_delivery_schedule(db_ops, NETWORK_ID)
+    assert scheduled['plan'].summary()['fields'] > 0
+
+    scheduler = scheduled['scheduler']
+    field = scheduler.graph.node_ids[scheduler.fields[0]]
+    rescheduled = run_reschedule(db_ops, scheduled['network'], scheduler,
+                                 {field: {'irrigation_hours': 6.0}})
+    assert rescheduled['rescheduled']
+
+
+def test_requirements_of_legacy_network(db_ops, tmp_path):
+    season_start = date(2025, 4, 1)
+    weather_path = tmp_path / 'weather.csv'
+    weather_path.write_text("date,tmin,tmax,rh_mean,wind\n" + "".join(
+        f"{season_start + timedelta(days=day)},12.0,28.0,55.0,2.0\n" for day in range(30)
+    ))
+
+    result = run_requirements_analysis(db_ops, NETWORK_ID, str(weather_path), season_start, 30)['result']
+    summary = result.summary()
+    assert summary['fields'] > 0
+    assert summary['season_volume_m3'] > 0
@@ -1,32 +1,59 @@
-from PySide6.QtWidgets import QMainWindow, QTabWidget
-from .tabs.network_tab import NetworkTab
-from .tabs.analysis_tab import AnalysisTab
-from .tabs.capacity_tab import CapacityTab
-from .tabs.delivery_tab import DeliveryTab
-from .tabs.requirements_tab import RequirementsTab
-from .tabs.planning_tab import PlanningTab
-from .tabs.measurements_tab import MeasurementsTab
-from .tabs.reporting_tab import ReportingTab
+import importlib
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QMainWindow, QTabWidget, QWidget, QVBoxLayout
 
 #ui/main_window.py
 
+# (module, class, title) of every tab; a tab's module is imported and the
+# tab is built the first time it is shown, so startup only pays for one tab
+TABS = [
+    ('.tabs.network_tab', 'NetworkTab', "Network Upload"),
+    ('.tabs.analysis_tab', 'AnalysisTab', "Network Analysis"),
+    ('.tabs.capacity_tab', 'CapacityTab', "Capacity Management"),
+    ('.tabs.delivery_tab', 'DeliveryTab', "Water Delivery"),
+    ('.tabs.requirements_tab', 'RequirementsTab', "Water Requirements"),
+    ('.tabs.planning_tab', 'PlanningTab', "Irrigation Planning"),
+    ('.tabs.measurements_tab', 'MeasurementsTab', "Measurements"),
+    ('.tabs.reporting_tab', 'ReportingTab', "Reports"),
+]
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Claude Qushtepa Pilot Irrigation System")
         self.setMinimumSize(800, 600)
+        self.tab_instances = {}  # tab index -> built tab widget
         self.setup_ui()
 
     def setup_ui(self):
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
         
-        # Add all tabs
-        self.tabs.addTab(NetworkTab(), "Network Upload")
-        self.tabs.addTab(AnalysisTab(), "Network Analysis")
-        self.tabs.addTab(CapacityTab(), "Capacity Management")
-        self.tabs.addTab(DeliveryTab(), "Water Delivery")
-        self.tabs.addTab(RequirementsTab(), "Water Requirements")
-        self.tabs.addTab(PlanningTab(), "Irrigation Planning")
-        self.tabs.addTab(MeasurementsTab(), "Measurements")
-        self.tabs.addTab(ReportingTab(), "Reports")
\ No newline at end of file
+        # Add an empty page per tab; the tab itself is built on first activation
+        for _, _, title in TABS:
+            page = QWidget()
+            QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, title)
+        self.tabs.currentChanged.connect(self.build_tab)
+        
+        # Build the first tab once the event loop runs, after the window is shown
+        QTimer.singleShot(0, self.build_current_tab)
+
+    def build_current_tab(self):
+        self.build_tab(self.tabs.currentIndex())
+
+    def build_tab(self, index: int):
+        """Import and create the tab at index, unless it already exists."""
+        if index < 0 or index in self.tab_instances:
+            return
+        module_name, class_name, _ = TABS[index]
+        tab_class = getattr(importlib.import_module(module_name, __package__), class_name)
+        tab = tab_class()
+        self.tabs.widget(index).layout().addWidget(tab)
+        self.tab_instances[index] = tab
+
+    def tab(self, index: int) -> QWidget:
+        """The tab at index, building it if it hasn't been shown yet."""
+        self.build_tab(index)
+        return self.tab_instances[index]
@@ -1,23 +1,29 @@
 # ui/tabs/__init__.py
 
-from .network_tab import NetworkTab
-from .analysis_tab import AnalysisTab
-from .capacity_tab import CapacityTab
-from .delivery_tab import DeliveryTab
-from .requirements_tab import RequirementsTab
-from .planning_tab import PlanningTab
-from .measurements_tab import MeasurementsTab
-from .reporting_tab import ReportingTab
-from .network_db_ops import NetworkDatabaseOperations
+import importlib
 
-__all__ = [
-    'NetworkTab',
-    'AnalysisTab',
-    'CapacityTab',
-    'DeliveryTab',
-    'RequirementsTab',
-    'PlanningTab',
-    'MeasurementsTab',
-    'ReportingTab',
-    'NetworkDatabaseOperations'
-]
+# Exports are imported on first access (PEP 562), so Qt-free modules such as
+# network_analysis can be used headless without loading PySide6
+_EXPORTS = {
+    'NetworkTab': '.network_tab',
+    'AnalysisTab': '.analysis_tab',
+    'CapacityTab': '.capacity_tab',
+    'DeliveryTab': '.delivery_tab',
+    'RequirementsTab': '.requirements_tab',
+    'PlanningTab': '.planning_tab',
+    'MeasurementsTab': '.measurements_tab',
+    'ReportingTab': '.reporting_tab',
+    'NetworkDatabaseOperations': '.network_db_ops'
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
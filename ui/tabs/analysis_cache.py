@@ -0,0 +1,78 @@
+# ui/tabs/analysis_cache.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Results kept in memory per process; older ones are read back from the database
+MEMORY_CACHE_SIZE = 16
+
+
+def _serves(limit: Optional[Tuple[int, float]], max_paths: Optional[int],
+            time_budget: Optional[float]) -> bool:
+    """
+    Whether a result listed within limit ((max_paths, time_budget); None when
+    it is complete) serves a request with a path listing budget (None = any).
+    """
+    if limit is None or max_paths is None or time_budget is None:
+        return True
+    return limit[0] >= max_paths and limit[1] >= time_budget
+
+
+class AnalysisCache:
+    """
+    Analysis results keyed by network fingerprint (MermaidNetwork.fingerprint()):
+    a small in-process LRU in front of the persistent analysis_cache table.
+    A result cut short by its path listing budget is only reused for requests
+    within that budget, so a larger budget lists the paths again. Cached
+    results are shared, so callers must not modify them.
+    """
+    def __init__(self, max_entries: int = MEMORY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # workers run on pool threads
+
+    def get(self, db_ops, content_hash: str, kind: str = 'paths',
+            max_paths: Optional[int] = None, time_budget: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get a cached result from memory, else from the database; with a path
+        listing budget, only one that serves it.
+        """
+        key = (content_hash, kind)
+        with self._lock:
+            if key in self._entries and _serves(self._entries[key][1], max_paths, time_budget):
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        result = db_ops.get_cached_analysis(content_hash, kind, max_paths, time_budget)
+        if result is not None:
+            # Known to serve at least the requested budget
+            self._remember(key, result, (max_paths or 0, time_budget or 0.0))
+        return result
+
+    def put(self, db_ops, content_hash: str, result: Dict, kind: str = 'paths',
+            max_paths: Optional[int] = None, time_budget: Optional[float] = None,
+            truncated: bool = False):
+        """
+        Store a result in the database and in memory, with the path listing
+        budget it was produced under and whether it was cut short by it.
+        """
+        db_ops.save_cached_analysis(content_hash, result, kind, max_paths, time_budget, truncated)
+        self._remember((content_hash, kind), result,
+                       (max_paths or 0, time_budget or 0.0) if truncated else None)
+
+    def clear(self):
+        """Forget the in-memory entries (the database table is kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def _remember(self, key, result, limit):
+        with self._lock:
+            self._entries[key] = (result, limit)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared by every tab and worker in the process
+analysis_cache = AnalysisCache()
@@ -0,0 +1,392 @@
+# ui/tabs/anomaly_engine.py
+
+import multiprocessing
+import os
+import queue
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.profiling import span
+from .measurement_db_ops import MeasurementDatabaseOperations, STATUS_ANALYZED, STATUS_INGESTED
+from .network_analysis import AnalysisCancelled, _check_cancelled, _report
+
+# Anomaly detection on measurement series, without any Qt objects.
+#
+# A series is processed in time order, one page of samples at a time:
+# optional detrending (a linear or polynomial least-squares trend of the
+# whole series, or a trailing moving average), then trailing rolling mean,
+# standard deviation, minimum and maximum of the processed values over the
+# last `window` samples, and the z-score of each sample against its window.
+# A sample is an anomaly when its |z| exceeds the two-sided normal quantile
+# of the confidence level, or when the processed value exceeds the signal
+# threshold in magnitude.
+#
+# Only the last window-1 samples are carried from one page to the next and
+# every window is reduced on its own (not from running sums), so the
+# results don't depend on the page size: paging equals a single pass over
+# the whole series. The trend fit sums its normal equations over fixed
+# FIT_BLOCK-sample blocks for the same reason. Pages are read from, and the
+# result columns written to, the series' column files; memory is bounded by
+# the page size, and several series run in parallel worker processes.
+
+DETRENDING_METHODS = ('linear', 'polynomial', 'moving_average')
+POLYNOMIAL_DEGREE = 3
+
+DEFAULT_PARAMETERS = {
+    'window': 60,               # samples per rolling window
+    'confidence_level': 0.99,   # two-sided; |z| above the normal quantile is an anomaly
+    'signal_threshold': None,   # |processed value| above this is an anomaly
+    'detrending_method': None   # one of DETRENDING_METHODS, None for no detrending
+}
+
+# Samples read, processed and written at a time
+PAGE_SAMPLES = 262_144
+
+# Samples per partial sum of the trend fit
+FIT_BLOCK = 65536
+
+
+class DetectionParameters:
+    """Validated detection parameters; stored on each Analysis that is processed."""
+    def __init__(self, window: int = DEFAULT_PARAMETERS['window'],
+                 confidence_level: float = DEFAULT_PARAMETERS['confidence_level'],
+                 signal_threshold: Optional[float] = DEFAULT_PARAMETERS['signal_threshold'],
+                 detrending_method: Optional[str] = DEFAULT_PARAMETERS['detrending_method']):
+        from scipy.stats import norm
+
+        window = int(window)
+        if window < 2:
+            raise ValueError("the rolling window needs at least 2 samples")
+        confidence_level = float(confidence_level)
+        if confidence_level > 1:  # given in percent
+            confidence_level = round(confidence_level / 100, 12)
+        if not 0 < confidence_level < 1:
+            raise ValueError(f"confidence level {confidence_level:g} is not between 0 and 1")
+        if detrending_method:
+            detrending_method = detrending_method.strip().lower().replace(' ', '_').replace('-', '_')
+            if detrending_method not in DETRENDING_METHODS:
+                raise ValueError(f"unknown detrending method '{detrending_method}' "
+                                 f"(expected one of: {', '.join(DETRENDING_METHODS)})")
+        self.window = window
+        self.confidence_level = confidence_level
+        self.signal_threshold = None if signal_threshold is None else abs(float(signal_threshold))
+        self.detrending_method = detrending_method or None
+        self.z_limit = float(norm.ppf(0.5 + confidence_level / 2))
+
+    @classmethod
+    def from_analysis(cls, analysis) -> 'DetectionParameters':
+        """The parameters stored on an Analysis, defaults for those not set."""
+        return cls(
+            window=analysis.rolling_window or DEFAULT_PARAMETERS['window'],
+            confidence_level=analysis.confidence_level or DEFAULT_PARAMETERS['confidence_level'],
+            signal_threshold=analysis.signal_threshold,
+            detrending_method=analysis.detrending_method if analysis.use_detrending else None
+        )
+
+    def columns(self) -> Dict:
+        """Analysis column values of these parameters."""
+        return {
+            'rolling_window': self.window,
+            'confidence_level': self.confidence_level,
+            'signal_threshold': self.signal_threshold,
+            'use_detrending': self.detrending_method is not None,
+            'detrending_method': self.detrending_method
+        }
+
+
+class TrendFit:
+    """
+    Least-squares polynomial trend of a whole series, fed in pages. Time is
+    scaled to [-1, 1] over the series and the trend is a Legendre series,
+    which keeps the normal equations well conditioned.
+    """
+    def __init__(self, degree: int, first: float, last: float):
+        self.degree = degree
+        self.first = first
+        self.span = (last - first) or 1.0
+        self.normal = np.zeros((degree + 1, degree + 1))
+        self.moments = np.zeros(degree + 1)
+        self._pending_t = np.empty(0)
+        self._pending_x = np.empty(0)
+        self.coefficients = None
+
+    def _scaled(self, seconds: np.ndarray) -> np.ndarray:
+        return 2 * (seconds - self.first) / self.span - 1
+
+    def _accumulate(self, seconds: np.ndarray, values: np.ndarray):
+        basis = np.polynomial.legendre.legvander(self._scaled(seconds), self.degree)
+        self.normal += basis.T @ basis
+        self.moments += basis.T @ values
+
+    def add(self, seconds: np.ndarray, values: np.ndarray):
+        t = np.concatenate([self._pending_t, seconds])
+        x = np.concatenate([self._pending_x, values])
+        full = len(t) - len(t) % FIT_BLOCK
+        for start in range(0, full, FIT_BLOCK):
+            self._accumulate(t[start:start + FIT_BLOCK], x[start:start + FIT_BLOCK])
+        self._pending_t, self._pending_x = t[full:], x[full:]
+
+    def solve(self):
+        if len(self._pending_t):
+            self._accumulate(self._pending_t, self._pending_x)
+            self._pending_t = self._pending_x = np.empty(0)
+        self.coefficients = np.linalg.lstsq(self.normal, self.moments, rcond=None)[0]
+
+    def trend(self, seconds: np.ndarray) -> np.ndarray:
+        # Elementwise (not a matrix product), so a sample's trend doesn't depend on the page
+        return np.polynomial.legendre.legval(self._scaled(seconds), self.coefficients)
+
+
+class RollingWindow:
+    """
+    Trailing-window statistics of a stream pushed in pages: the window of a
+    sample holds it and the window-1 samples before it (fewer at the start
+    of the series). Sums are taken on values shifted by the first sample,
+    which keeps the variance accurate for series far from zero.
+    """
+    def __init__(self, size: int):
+        self.size = size
+        self.tail = np.empty(0)  # the last size-1 samples pushed
+        self.seen = 0
+        self.shift = None
+
+    def _extend(self, values: np.ndarray):
+        """The samples of all windows ending in values, front-padded to full windows."""
+        if self.shift is None:
+            self.shift = values[0]
+        extended = np.concatenate([self.tail, values])
+        pad = self.size - 1 - len(self.tail)
+        counts = np.minimum(np.arange(self.seen + 1, self.seen + len(values) + 1), self.size)
+        self.tail = extended[-(self.size - 1):]
+        self.seen += len(values)
+        return extended, pad, counts.astype(float)
+
+    def _sums(self, extended: np.ndarray, pad: int, power: int = 1) -> np.ndarray:
+        shifted = np.concatenate([np.zeros(pad), extended - self.shift])
+        if power == 2:
+            shifted *= shifted
+        return np.convolve(shifted, np.ones(self.size), 'valid')
+
+    def mean(self, values: np.ndarray) -> np.ndarray:
+        """Push values; the mean of each one's window."""
+        extended, pad, counts = self._extend(values)
+        return self._sums(extended, pad) / counts + self.shift
+
+    def push(self, values: np.ndarray):
+        """Push values; (mean, sample standard deviation, minimum, maximum) of each one's window."""
+        from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+        extended, pad, counts = self._extend(values)
+        sums = self._sums(extended, pad)
+        squares = self._sums(extended, pad, power=2)
+        mean = sums / counts
+        variance = (squares - sums * mean) / np.maximum(counts - 1, 1)
+        std = np.sqrt(np.maximum(variance, 0.0))
+
+        # Pad with the first sample, which is in every padded window anyway;
+        # a centered filter of the padded series, shifted, is the trailing one
+        padded = np.concatenate([np.full(pad, extended[0]), extended])
+        start = self.size // 2
+        minimum = minimum_filter1d(padded, self.size)[start:start + len(values)]
+        maximum = maximum_filter1d(padded, self.size)[start:start + len(values)]
+        return mean + self.shift, std, minimum, maximum
+
+
+class AnomalyDetector:
+    """Detrending, rolling statistics and anomaly flags of one series, fed pages in time order."""
+    def __init__(self, parameters: DetectionParameters, trend: Optional[TrendFit] = None):
+        self.parameters = parameters
+        self.trend = trend
+        self.baseline = RollingWindow(parameters.window) if parameters.detrending_method == 'moving_average' else None
+        self.rolling = RollingWindow(parameters.window)
+
+    def process(self, seconds: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+        """Result columns (timeseries_store.RESULT_COLUMNS) of a page of samples."""
+        if self.trend is not None:
+            processed = values - self.trend.trend(seconds)
+        elif self.baseline is not None:
+            processed = values - self.baseline.mean(values)
+        else:
+            processed = values
+        mean, std, minimum, maximum = self.rolling.push(processed)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            score = np.where(std > 0, np.abs(processed - mean) / std, 0.0)
+        is_anomaly = score > self.parameters.z_limit
+        if self.parameters.signal_threshold is not None:
+            is_anomaly |= np.abs(processed) > self.parameters.signal_threshold
+        return {
+            'processed_value': processed,
+            'anomaly_score': score,
+            'is_anomaly': is_anomaly,
+            'mean': mean,
+            'std_dev': std,
+            'min_value': minimum,
+            'max_value': maximum
+        }
+
+
+def detect_series(ops: MeasurementDatabaseOperations, analysis_id: int, parameters: DetectionParameters,
+                  page_samples: int = PAGE_SAMPLES, report: Optional[Callable] = None,
+                  should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Run detection on one stored series and write the results page by page.
+    report(samples done) is called after every page; linear and polynomial
+    detrending read the series twice (fit, then apply), so count two passes.
+    """
+    analysis = ops.get_analysis(analysis_id)
+    series = ops.open_series(analysis)
+    count = series.length
+    # The result columns are rewritten in place; they are valid again once this commits STATUS_ANALYZED
+    if analysis.status == STATUS_ANALYZED:
+        analysis.status = STATUS_INGESTED
+        ops.session.commit()
+
+    def pages():
+        for start in range(0, count, page_samples):
+            stop = min(start + page_samples, count)
+            # The trend is fitted on Unix seconds
+            seconds = series.read('time', start, stop) / 1e6
+            yield start, seconds, series.read('value', start, stop)
+
+    done = 0
+    trend = None
+    if parameters.detrending_method in ('linear', 'polynomial') and count:
+        degree = 1 if parameters.detrending_method == 'linear' else POLYNOMIAL_DEGREE
+        trend = TrendFit(degree, series.read('time', 0, 1)[0] / 1e6, series.read('time', count - 1)[0] / 1e6)
+        for start, seconds, values in pages():
+            _check_cancelled(should_stop)
+            with span("fit_trend", samples=len(values)):
+                trend.add(seconds, values)
+            done += len(values)
+            if report:
+                report(done)
+        trend.solve()
+
+    detector = AnomalyDetector(parameters, trend)
+    anomalies = 0
+    series.write_anomalies(np.empty(0, dtype=np.int64))
+    for start, seconds, values in pages():
+        _check_cancelled(should_stop)
+        with span("detect_page", samples=len(values)):
+            results = detector.process(seconds, values)
+        with span("write results", samples=len(values)):
+            series.write_results(start, results)
+            positions = np.flatnonzero(results['is_anomaly']) + start
+            series.write_anomalies(positions, anomalies)
+        anomalies += len(positions)
+        done += len(values)
+        if report:
+            report(done)
+
+    series.sync()
+    analysis.anomaly_count = anomalies
+    analysis.status = STATUS_ANALYZED
+    ops.session.commit()
+    return {'samples': count, 'anomalies': anomalies}
+
+
+def _passes(parameters: DetectionParameters) -> int:
+    return 2 if parameters.detrending_method in ('linear', 'polynomial') else 1
+
+
+# State of a detection worker process, set by the pool initializer
+_worker = {}
+
+
+def _init_worker(db_url: str, stop_event, progress_queue):
+    from utils.db import DatabaseManager
+
+    _worker['manager'] = DatabaseManager(db_url, initialize=False)
+    _worker['stop'] = stop_event
+    _worker['progress'] = progress_queue
+
+
+def _detect_in_worker(analysis_id: int, parameters: DetectionParameters, page_samples: int) -> Dict:
+    """detect_series in a worker process, on its own session; progress goes to the parent's queue."""
+    session = _worker['manager'].get_session()
+    try:
+        return detect_series(
+            MeasurementDatabaseOperations(session), analysis_id, parameters, page_samples,
+            report=lambda done: _worker['progress'].put((analysis_id, done)),
+            should_stop=_worker['stop'].is_set
+        )
+    finally:
+        session.close()
+
+
+def run_anomaly_detection(db_ops, analysis_ids: List[int], parameters: Optional[Dict] = None,
+                          workers: Optional[int] = None, page_samples: int = PAGE_SAMPLES,
+                          progress: Optional[Callable] = None,
+                          should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Detect anomalies in stored series; task for AnalysisWorker. The
+    parameters are saved on every series first. Several series are spread
+    over worker processes (default: one per CPU), each writing the result
+    columns of its own series.
+    """
+    ops = MeasurementDatabaseOperations(db_ops.session)
+    parameters = DetectionParameters(**{**DEFAULT_PARAMETERS, **(parameters or {})})
+    ops.set_detection_parameters(analysis_ids, parameters.columns())
+
+    sizes = {analysis_id: ops.open_series(ops.get_analysis(analysis_id)).length for analysis_id in analysis_ids}
+    total = max(sum(sizes.values()) * _passes(parameters), 1)
+    done = dict.fromkeys(analysis_ids, 0)
+    results = {}
+
+    def report():
+        samples = sum(done.values())
+        _report(progress, min(int(100 * samples / total), 99),
+                f"Processed {samples:,} of {total:,} samples ({len(results)} of {len(analysis_ids)} series)")
+
+    workers = min(len(analysis_ids), workers or os.cpu_count() or 1)
+    _report(progress, 0, f"Detecting anomalies in {len(analysis_ids)} series")
+    if workers <= 1:
+        for analysis_id in analysis_ids:
+            def on_page(samples, analysis_id=analysis_id):
+                done[analysis_id] = samples
+                report()
+            results[analysis_id] = detect_series(ops, analysis_id, parameters, page_samples,
+                                                 report=on_page, should_stop=should_stop)
+    else:
+        # Spawned, not forked: the caller is a thread of the GUI process
+        context = multiprocessing.get_context('spawn')
+        stop_event = context.Event()
+        progress_queue = context.Queue()
+        db_url = db_ops.session.get_bind().url.render_as_string(hide_password=False)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(db_url, stop_event, progress_queue)) as pool:
+            futures = {
+                pool.submit(_detect_in_worker, analysis_id, parameters, page_samples): analysis_id
+                for analysis_id in analysis_ids
+            }
+            pending = set(futures)
+            try:
+                while pending:
+                    finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        results[futures[future]] = future.result()
+                    while True:
+                        try:
+                            analysis_id, samples = progress_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        done[analysis_id] = samples
+                    report()
+                    if should_stop and should_stop():
+                        stop_event.set()
+            except BaseException:
+                # Stop the other series at their next page
+                stop_event.set()
+                raise
+        if stop_event.is_set():
+            raise AnalysisCancelled()
+
+    return {
+        'series': results,
+        'samples': sum(result['samples'] for result in results.values()),
+        'anomalies': sum(result['anomalies'] for result in results.values()),
+        'workers': workers
+    }
@@ -0,0 +1,257 @@
+# ui/tabs/capacity_engine.py
+
+import re
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+from utils.profiling import span
+from .network_analysis import _check_cancelled, _report
+from .network_graph import NetworkGraph, csr_gather
+from .network_loader import network_loader
+
+# Capacity analysis on a compiled NetworkGraph, without any Qt objects.
+#
+# Every component may have a capacity (the most flow it can pass, e.g. a
+# canal section or gate) and a demand (flow it takes out, normally a field),
+# both stored in NetworkComponent.properties as {'capacity': ..., 'demand': ...}
+# in l/s. Sources (roots) supply whatever their own capacity allows.
+#
+# Networks in which every node has at most one feeder are trees, solved by
+# vectorized sweeps over topological levels: demands are summed upwards and
+# capped by capacities, then flow is split downwards in proportion to what
+# each branch requested. When paths rejoin (or loop), splitting flow is a
+# routing problem, solved exactly with a maximum flow.
+
+# Component types a default demand applies to
+DEMAND_TYPES = ('F',)
+
+# Max-flow works in integers: flow units per l/s, reduced if the totals would overflow int32
+FLOW_RESOLUTION = 1000
+MAX_FLOW_INT = 2**31 - 1
+
+
+class CapacityResult:
+    """
+    Per-node results of a capacity run; every array is indexed like
+    graph.node_ids. requested, limit and unmet_below are exact for trees and
+    upper bounds where paths rejoin (NaN for nodes on or below a loop).
+    """
+    def __init__(self, graph: NetworkGraph, capacity: np.ndarray, demand: np.ndarray,
+                 requested: np.ndarray, flow: np.ndarray, delivered: np.ndarray,
+                 limit: np.ndarray, method: str):
+        self.graph = graph
+        self.capacity = capacity    # most flow a node can pass (inf = unlimited)
+        self.demand = demand        # flow a node takes out
+        self.requested = requested  # flow worth sending to a node: its demand and its branches', capped
+        self.flow = flow            # flow actually passing through a node
+        self.delivered = delivered  # part of a node's own demand that is met
+        self.limit = limit          # most flow that could reach a node if nothing else drew water
+        self.method = method        # 'tree sweep' or 'max flow'
+        self.shortfall = np.maximum(demand - delivered, 0.0)
+        self.unmet_below = self._sum_below(self.shortfall)
+        self.bottleneck_mask = self._find_bottlenecks()
+
+    def _sum_below(self, values: np.ndarray) -> np.ndarray:
+        """values summed over each node and everything downstream of it."""
+        return _reverse_sweep(self.graph, lambda level, below: values[level] + below)
+
+    def _find_bottlenecks(self) -> np.ndarray:
+        """Full, capacity-limited nodes that feed a field with unmet demand."""
+        graph = self.graph
+        tolerance = 1.0 / FLOW_RESOLUTION
+        saturated = np.isfinite(self.capacity) & (self.flow >= self.capacity - tolerance)
+        starved = np.flatnonzero(self.shortfall > tolerance)
+        feeding = np.zeros(graph.num_nodes, dtype=bool)
+        feeding[graph.upstream(starved.tolist())] = True
+        feeding[starved] = False
+        return saturated & feeding
+
+    def bottlenecks(self) -> np.ndarray:
+        """Bottleneck node indices, largest unmet demand downstream first."""
+        nodes = np.flatnonzero(self.bottleneck_mask)
+        return nodes[np.argsort(-np.nan_to_num(self.unmet_below[nodes]), kind='stable')]
+
+    def summary(self) -> Dict:
+        demanding = self.demand > 0
+        return {
+            'method': self.method,
+            'nodes': self.graph.num_nodes,
+            'total_demand': float(self.demand.sum()),
+            'total_delivered': float(self.delivered.sum()),
+            'demand_points': int(demanding.sum()),
+            'short_points': int((self.shortfall > 1.0 / FLOW_RESOLUTION).sum()),
+            'bottlenecks': int(self.bottleneck_mask.sum())
+        }
+
+
+def capacity_arrays(graph: NetworkGraph, properties: Dict[str, Dict],
+                    default_demand: float = 0.0,
+                    demand_types: Iterable[str] = DEMAND_TYPES):
+    """
+    Capacity and demand arrays from component properties. Components without
+    a capacity are unlimited; components of demand_types without a demand
+    take default_demand.
+    """
+    n = graph.num_nodes
+    capacity = np.full(n, np.inf)
+    demand = np.zeros(n)
+
+    demand_types = set(demand_types)
+    if default_demand:
+        for i, node_id in enumerate(graph.node_ids):
+            match = re.match(r'[A-Za-z]+', node_id)
+            if match and match.group() in demand_types:
+                demand[i] = default_demand
+
+    for node_id, props in properties.items():
+        i = graph.index.get(node_id)
+        if i is None or not props:
+            continue
+        if props.get('capacity') is not None:
+            capacity[i] = max(float(props['capacity']), 0.0)
+        if props.get('demand') is not None:
+            demand[i] = max(float(props['demand']), 0.0)
+    return capacity, demand
+
+
+def _reverse_sweep(graph: NetworkGraph, combine) -> np.ndarray:
+    """
+    Sweep the topological levels from the leaves up. combine(level, below)
+    gets the sum of the successors' values and returns the level's values.
+    Nodes on or below a loop are not ordered and come out as NaN.
+    """
+    values = np.full(graph.num_nodes, np.nan)
+    below = np.zeros(graph.num_nodes)
+    for level in reversed(graph.topological_levels()):
+        values[level] = combine(level, below[level])
+        owners, predecessors = csr_gather(graph.in_offsets, graph.in_sources, level)
+        if len(owners):
+            np.add.at(below, predecessors, values[owners])
+    return values
+
+
+def _upstream_limit(graph: NetworkGraph, capacity: np.ndarray) -> np.ndarray:
+    """Most flow that can reach each node: its capacity or what its feeders can pass."""
+    limit = np.full(graph.num_nodes, np.nan)
+    above = np.zeros(graph.num_nodes)
+    for level in graph.topological_levels():
+        fed = graph.in_degree[level] > 0
+        limit[level] = np.where(fed, np.minimum(capacity[level], above[level]), capacity[level])
+        owners, successors = csr_gather(graph.out_offsets, graph.out_targets, level)
+        if len(owners):
+            np.add.at(above, successors, limit[owners])
+    return limit
+
+
+def _tree_flow(graph: NetworkGraph, capacity: np.ndarray, demand: np.ndarray, requested: np.ndarray):
+    """
+    Split flow down a tree (at most one feeder per node), one level at a time:
+    a node passes what it requested as far as its feeder's share allows, and
+    shares it between its own demand and its branches in proportion.
+    """
+    n = graph.num_nodes
+    parent = np.full(n, -1, dtype=np.int64)
+    fed = graph.in_degree == 1
+    parent[fed] = graph.in_sources[graph.in_offsets[:-1][fed]]
+
+    # Demand plus what the branches requested, before capping by capacity
+    branch_requests = np.zeros(n)
+    has_parent = parent >= 0
+    np.add.at(branch_requests, parent[has_parent], np.nan_to_num(requested[has_parent]))
+    wanted = demand + branch_requests
+
+    flow = np.zeros(n)
+    share = np.zeros(n)
+    for depth, level in enumerate(graph.topological_levels()):
+        if depth == 0:
+            flow[level] = requested[level]
+        else:
+            flow[level] = requested[level] * share[parent[level]]
+        share[level] = np.divide(flow[level], wanted[level],
+                                 out=np.zeros(len(level)), where=wanted[level] > 0)
+    return flow, demand * share
+
+
+def _max_flow(graph: NetworkGraph, capacity: np.ndarray, demand: np.ndarray):
+    """
+    Route as much demand as possible (scipy maximum flow, Dinic). Every node
+    is split into an in and an out vertex joined by its capacity; sources
+    are fed from a super source and demands drain into a super sink.
+    """
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import maximum_flow
+
+    n = graph.num_nodes
+    total = float(demand.sum())
+    if total <= 0:
+        return np.zeros(n), np.zeros(n)
+
+    # Integer flow units; "unlimited" only needs to exceed the total demand
+    scale = min(FLOW_RESOLUTION, (MAX_FLOW_INT // 2) / (total + 1))
+    unlimited = int(total * scale) + 1
+    node_capacity = np.minimum(np.floor(np.nan_to_num(capacity * scale, posinf=unlimited)), unlimited)
+    node_demand = np.floor(demand * scale)
+
+    nodes = np.arange(n)
+    sinks = np.flatnonzero(node_demand > 0)
+    source, sink = 2 * n, 2 * n + 1
+    edge_sources = np.repeat(nodes, graph.out_degree)
+    rows = np.concatenate([nodes, n + edge_sources, np.full(len(graph.roots), source), n + sinks])
+    cols = np.concatenate([n + nodes, graph.out_targets, graph.roots, np.full(len(sinks), sink)])
+    data = np.concatenate([
+        node_capacity,
+        np.full(len(edge_sources), unlimited),
+        np.full(len(graph.roots), unlimited),
+        node_demand[sinks]
+    ]).astype(np.int32)
+
+    network = csr_matrix((data, (rows, cols)), shape=(2 * n + 2, 2 * n + 2))
+    result = maximum_flow(network, source, sink, method='dinic')
+    flows = result.flow.tocsr()
+
+    flow = np.asarray(flows[nodes, n + nodes]).ravel() / scale
+    delivered = np.zeros(n)
+    delivered[sinks] = np.asarray(flows[n + sinks, np.full(len(sinks), sink)]).ravel() / scale
+    return flow, delivered
+
+
+def run_capacity(graph: NetworkGraph, capacity: np.ndarray, demand: np.ndarray) -> CapacityResult:
+    """Propagate capacities and demands through the network."""
+    with span("capacity_requested"):
+        requested = _reverse_sweep(
+            graph, lambda level, below: np.minimum(capacity[level], demand[level] + below)
+        )
+    with span("capacity_limits"):
+        limit = _upstream_limit(graph, capacity)
+
+    is_tree = graph.num_nodes == 0 or int(graph.in_degree.max()) <= 1
+    if is_tree:
+        with span("capacity_tree_flow", nodes=graph.num_nodes):
+            flow, delivered = _tree_flow(graph, capacity, demand, requested)
+        method = 'tree sweep'
+    else:
+        with span("capacity_max_flow", nodes=graph.num_nodes, edges=graph.num_edges):
+            flow, delivered = _max_flow(graph, capacity, demand)
+        method = 'max flow'
+
+    with span("capacity_bottlenecks"):
+        return CapacityResult(graph, capacity, demand, requested, flow, delivered, limit, method)
+
+
+def run_capacity_analysis(db_ops, network_id: int, default_demand: float = 0.0,
+                          progress: Optional[Callable] = None,
+                          should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Load a saved network (shared network_loader) and propagate its stored
+    capacities and demands; task for AnalysisWorker.
+    """
+    _report(progress, 0, "Loading network")
+    loaded = network_loader.load(db_ops, network_id)
+    _check_cancelled(should_stop)
+
+    _report(progress, 50, "Propagating capacities and demands")
+    capacity, demand = capacity_arrays(loaded.graph, loaded.properties, default_demand)
+    result = run_capacity(loaded.graph, capacity, demand)
+    _report(progress, 100, "Capacity analysis done")
+    return {'network': loaded, 'result': result}
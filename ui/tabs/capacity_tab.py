@@ -1,13 +1,255 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
-
 # ui/tabs/capacity_tab.py
 
+import csv
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QDoubleSpinBox, QFileDialog, QMessageBox, QSplitter,
+                               QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox)
+from PySide6.QtCore import Qt
+
+from utils.db import get_db
+from .capacity_engine import FLOW_RESOLUTION, run_capacity_analysis
+from .network_db_ops import NetworkDatabaseOperations
+from .network_loader import run_save_properties
+from .network_selector import NetworkSelector
+from .network_worker import TaskRunner
+from .timing_panel import TimingPanel
+
+# Rows shown per results table; the full results stay in memory
+MAX_TABLE_ROWS = 500
+
+# Component properties that can be imported from CSV
+CSV_PROPERTIES = ('capacity', 'demand')
+
+
+def _number(value: float) -> str:
+    if value != value:  # NaN: on or below a loop
+        return "-"
+    if value == float('inf'):
+        return "unlimited"
+    return f"{value:,.1f}"
+
+
 class CapacityTab(QWidget):
+    """
+    Capacity check of a saved network: stored component capacities and
+    demands (l/s) are propagated through the network and the components
+    that keep fields short are listed as bottlenecks.
+    """
     def __init__(self):
         super().__init__()
+        self.db = None
+        self._db_ops = None
+        self.network_id = None
+        self.result = None
+        self.labels = {}
+        self.imported_count = 0
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout()
-        layout.addWidget(QLabel("Capacity Management Tab"))
+        layout.setSpacing(5)
+
+        self.network_selector = NetworkSelector(lambda: self.db_ops)
+        self.network_selector.networkSelected.connect(self.select_network)
+        layout.addWidget(self.network_selector)
+
+        controls_layout = QHBoxLayout()
+        controls_layout.addWidget(QLabel("Default field demand (l/s):"))
+        self.default_demand = QDoubleSpinBox()
+        self.default_demand.setRange(0.0, 100000.0)
+        self.default_demand.setDecimals(1)
+        self.default_demand.setValue(5.0)
+        self.default_demand.setToolTip("Demand of fields that have none stored")
+        controls_layout.addWidget(self.default_demand)
+
+        self.import_btn = QPushButton("Import Capacities/Demands (CSV)")
+        self.import_btn.clicked.connect(self.import_csv)
+        self.calculate_btn = QPushButton("Calculate")
+        self.calculate_btn.clicked.connect(self.calculate)
+        self.timings_btn = QPushButton("Show Timings")
+        self.timings_btn.setCheckable(True)
+        self.timings_btn.toggled.connect(self.toggle_timings)
+        controls_layout.addWidget(self.import_btn)
+        controls_layout.addWidget(self.calculate_btn)
+        controls_layout.addStretch()
+        controls_layout.addWidget(self.timings_btn)
+        layout.addLayout(controls_layout)
+
+        self.task_runner = TaskRunner()
+        self.task_runner.busyChanged.connect(self.set_busy)
+        self.task_runner.profiled.connect(self.on_profiled)
+        layout.addWidget(self.task_runner)
+
+        self.summary_label = QLabel("Load a network to check its capacity.")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        main_splitter = QSplitter(Qt.Orientation.Horizontal)
+
+        bottleneck_group = QGroupBox("Bottlenecks")
+        bottleneck_layout = QVBoxLayout(bottleneck_group)
+        self.bottleneck_table = self._create_table(
+            ["Component", "Label", "Capacity", "Flow", "Unmet downstream"]
+        )
+        bottleneck_layout.addWidget(self.bottleneck_table)
+        main_splitter.addWidget(bottleneck_group)
+
+        short_group = QGroupBox("Fields short of water")
+        short_layout = QVBoxLayout(short_group)
+        self.short_table = self._create_table(
+            ["Component", "Label", "Demand", "Delivered", "Shortfall"]
+        )
+        short_layout.addWidget(self.short_table)
+        main_splitter.addWidget(short_group)
+
+        self.timing_panel = TimingPanel()
+        self.timing_panel.setVisible(False)
+        main_splitter.addWidget(self.timing_panel)
+
+        layout.addWidget(main_splitter)
         self.setLayout(layout)
+        self.set_busy(False)
+
+    def _create_table(self, headers) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @property
+    def db_ops(self) -> NetworkDatabaseOperations:
+        """Database operations; the session is opened on first use."""
+        if self._db_ops is None:
+            self.db = next(get_db())
+            self._db_ops = NetworkDatabaseOperations(self.db)
+        return self._db_ops
+
+    def select_network(self, network_id: int):
+        self.network_id = network_id
+        self.calculate()
+
+    def calculate(self):
+        if self.network_id is None:
+            return
+        self.task_runner.start(
+            run_capacity_analysis, self.on_calculated, "Error calculating capacity",
+            self.network_id, default_demand=self.default_demand.value()
+        )
+
+    def on_calculated(self, result: dict):
+        loaded, self.result = result['network'], result['result']
+        self.labels = loaded.labels
+        summary = self.result.summary()
+        total_demand = summary['total_demand']
+        delivered_share = 100 * summary['total_delivered'] / total_demand if total_demand else 100
+        self.summary_label.setText(
+            f"Network #{loaded.network_id}: {summary['nodes']} components, "
+            f"{summary['demand_points']} with demand ({summary['method']}).\n"
+            f"Demand {_number(total_demand)} l/s, delivered {_number(summary['total_delivered'])} l/s "
+            f"({delivered_share:.0f}%); {summary['short_points']} short, "
+            f"{summary['bottlenecks']} bottlenecks."
+        )
+        self.show_bottlenecks()
+        self.show_shortfalls()
+
+    def show_bottlenecks(self):
+        result = self.result
+        nodes = result.bottlenecks()[:MAX_TABLE_ROWS]
+        self._fill_table(self.bottleneck_table, [
+            (result.capacity[i], result.flow[i], result.unmet_below[i]) for i in nodes
+        ], nodes)
+
+    def show_shortfalls(self):
+        result = self.result
+        nodes = (result.shortfall > 1.0 / FLOW_RESOLUTION).nonzero()[0]
+        nodes = nodes[(-result.shortfall[nodes]).argsort(kind='stable')][:MAX_TABLE_ROWS]
+        self._fill_table(self.short_table, [
+            (result.demand[i], result.delivered[i], result.shortfall[i]) for i in nodes
+        ], nodes)
+
+    def _fill_table(self, table: QTableWidget, values, nodes):
+        node_ids = self.result.graph.node_ids
+        table.setSortingEnabled(False)
+        table.setRowCount(len(nodes))
+        for row, (i, numbers) in enumerate(zip(nodes, values)):
+            node_id = node_ids[i]
+            table.setItem(row, 0, QTableWidgetItem(node_id))
+            table.setItem(row, 1, QTableWidgetItem(self.labels.get(node_id, "")))
+            for column, value in enumerate(numbers, start=2):
+                item = QTableWidgetItem(_number(float(value)))
+                item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row, column, item)
+
+    def import_csv(self):
+        """
+        Store capacities and demands from a CSV file with a component_id
+        column and capacity and/or demand columns; empty cells are skipped.
+        """
+        if self.network_id is None:
+            QMessageBox.warning(self, "Warning", "Please load a network first")
+            return
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Import Capacities/Demands", "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if not file_name:
+            return
+        try:
+            updates = self.read_properties_csv(file_name)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.critical(self, "Error", f"Error reading file: {str(e)}")
+            return
+        if not updates:
+            QMessageBox.warning(self, "Warning", "No capacities or demands found in the file")
+            return
+        self.imported_count = len(updates)
+        self.task_runner.start(
+            run_save_properties, self.on_properties_saved, "Error saving properties",
+            self.network_id, updates
+        )
+
+    @staticmethod
+    def read_properties_csv(file_name: str) -> dict:
+        with open(file_name, newline='', encoding='utf-8-sig') as file:
+            reader = csv.DictReader(file)
+            columns = [name for name in CSV_PROPERTIES if name in (reader.fieldnames or [])]
+            if 'component_id' not in (reader.fieldnames or []) or not columns:
+                raise ValueError("expected a component_id column and a capacity or demand column")
+            updates = {}
+            for line, row in enumerate(reader, start=2):
+                changes = {}
+                for name in columns:
+                    value = (row.get(name) or "").strip()
+                    if value:
+                        try:
+                            changes[name] = float(value)
+                        except ValueError:
+                            raise ValueError(f"line {line}: {name} '{value}' is not a number")
+                component_id = (row.get('component_id') or "").strip()
+                if component_id and changes:
+                    updates.setdefault(component_id, {}).update(changes)
+        return updates
+
+    def on_properties_saved(self, count: int):
+        skipped = self.imported_count - count
+        QMessageBox.information(
+            self, "Success",
+            f"Updated {count} components"
+            + (f"\n{skipped} component IDs were not found in the network." if skipped else "")
+        )
+        self.calculate()
+
+    def on_profiled(self, run):
+        self.timing_panel.show_run(run)
+
+    def toggle_timings(self, visible: bool):
+        self.timing_panel.setVisible(visible)
+        self.timings_btn.setText("Hide Timings" if visible else "Show Timings")
+
+    def set_busy(self, busy: bool):
+        self.network_selector.set_enabled(not busy)
+        self.import_btn.setEnabled(not busy and self.network_id is not None)
+        self.calculate_btn.setEnabled(not busy and self.network_id is not None)
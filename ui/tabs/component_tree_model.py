@@ -0,0 +1,184 @@
+# ui/tabs/component_tree_model.py
+
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+# Child rows added per fetchMore() call when a type group is expanded
+FETCH_BATCH_SIZE = 1000
+
+
+class ComponentTreeModel(QAbstractItemModel):
+    """
+    Component types as top-level rows with their components as children.
+    Children are created lazily (fetchMore) and their details, including a
+    field's upstream connections, are looked up from the NetworkGraph's
+    prebuilt predecessor index only when a row is displayed. Filtering and
+    sorting work on plain per-type lists inside the model.
+    """
+    HEADERS = ["Component Type", "ID", "Details"]
+
+    def __init__(self, type_names: Dict[str, str], parent=None):
+        super().__init__(parent)
+        self.type_names = type_names
+        self.graph = None
+        self.groups: List[str] = []            # component type per top-level row
+        self.components: Dict[str, List] = {}  # type -> [(component ID, label)], all components
+        self.visible: Dict[str, List] = {}     # type -> filtered and sorted components
+        self.loaded: Dict[str, int] = {}       # type -> child rows created so far
+        self.filter_text = ""
+        self.sort_column = 1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+
+    def set_components(self, components_data: Dict, graph=None):
+        """Show analyzed component data (type -> {ID: {'label': ...}})."""
+        self.beginResetModel()
+        self.graph = graph
+        self.components = {
+            comp_type: [(comp_id, details['label']) for comp_id, details in components.items()]
+            for comp_type, components in components_data.items()
+        }
+        self._rebuild()
+        self.endResetModel()
+
+    def clear(self):
+        self.set_components({})
+
+    def set_filter(self, text: str):
+        """Show only components whose ID or label contains text (case-insensitive)."""
+        self.beginResetModel()
+        self.filter_text = text.strip().lower()
+        self._rebuild()
+        self.endResetModel()
+
+    def _rebuild(self):
+        """Apply the filter and sort order; children are fetched again lazily."""
+        needle = self.filter_text
+        reverse = self.sort_order == Qt.SortOrder.DescendingOrder
+        key = (lambda item: item[1]) if self.sort_column == 2 else (lambda item: item[0])
+
+        self.visible = {}
+        for comp_type, components in self.components.items():
+            if needle:
+                components = [item for item in components
+                              if needle in item[0].lower() or needle in item[1].lower()]
+            if components or not needle:
+                self.visible[comp_type] = sorted(components, key=key, reverse=reverse)
+
+        self.groups = sorted(self.visible, key=lambda comp_type: self.type_names[comp_type],
+                             reverse=reverse and self.sort_column == 0)
+        self.loaded = {comp_type: 0 for comp_type in self.groups}
+
+    def component_count(self) -> int:
+        """Number of components passing the filter."""
+        return sum(len(components) for components in self.visible.values())
+
+    # Qt model interface
+
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        # Children carry their group's row + 1 as internal id
+        return self.createIndex(row, column, parent.row() + 1)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.createIndex(index.internalId() - 1, 0, 0)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if not parent.isValid():
+            return len(self.groups)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return self.loaded[self.groups[parent.row()]]
+        return 0
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if not parent.isValid():
+            return bool(self.groups)
+        if parent.internalId() == 0 and parent.column() == 0:
+            return bool(self.visible[self.groups[parent.row()]])
+        return False
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if not parent.isValid() or parent.internalId() != 0:
+            return False
+        comp_type = self.groups[parent.row()]
+        return self.loaded[comp_type] < len(self.visible[comp_type])
+
+    def fetchMore(self, parent: QModelIndex):
+        comp_type = self.groups[parent.row()]
+        first = self.loaded[comp_type]
+        last = min(first + FETCH_BATCH_SIZE, len(self.visible[comp_type])) - 1
+        if last < first:
+            return
+        self.beginInsertRows(parent, first, last)
+        self.loaded[comp_type] = last + 1
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+
+        column = index.column()
+        if index.internalId() == 0:
+            comp_type = self.groups[index.row()]
+            if column == 0:
+                return self.type_names[comp_type]
+            if column == 1:
+                return f"Total: {len(self.visible[comp_type])}"
+            return None
+
+        comp_type = self.groups[index.internalId() - 1]
+        comp_id, label = self.visible[comp_type][index.row()]
+        if column == 0:
+            return self.type_names[comp_type]
+        if column == 1:
+            return comp_id
+        return self._details(comp_type, comp_id, label)
+
+    def _details(self, comp_type: str, comp_id: str, label: str) -> str:
+        """Label plus, for fields, the upstream components feeding them."""
+        graph = self.graph
+        if comp_type == 'F' and graph is not None and comp_id in graph:
+            predecessors = graph.ids(graph.predecessors(graph.index[comp_id]))
+            if predecessors:
+                return f"{label} (Connected to: {', '.join(predecessors)})"
+        return label
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder):
+        """Sort groups by type name (column 0) and components by ID or label."""
+        self.layoutAboutToBeChanged.emit()
+        old_groups = list(self.groups)
+        loaded = dict(self.loaded)
+        self.sort_column = column
+        self.sort_order = order
+        self._rebuild()
+        self.loaded = loaded  # the filter is unchanged, so are the row counts
+        
+        # Group rows keep their identity (and expansion); component rows are re-read
+        new_rows = {comp_type: row for row, comp_type in enumerate(self.groups)}
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [
+            self.createIndex(new_rows[old_groups[index.row()]], index.column(), 0)
+            if index.internalId() == 0 else QModelIndex()
+            for index in persistent
+        ])
+        self.layoutChanged.emit()
+
+    def component_at(self, index: QModelIndex) -> Optional[str]:
+        """Component ID of a child row, None for a type group row."""
+        if not index.isValid() or index.internalId() == 0:
+            return None
+        comp_type = self.groups[index.internalId() - 1]
+        return self.visible[comp_type][index.row()][0]
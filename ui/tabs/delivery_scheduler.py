@@ -0,0 +1,428 @@
+# ui/tabs/delivery_scheduler.py
+
+import heapq
+import math
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from utils.profiling import span
+from .network_analysis import _check_cancelled, _report
+from .network_graph import NetworkGraph
+from .network_loader import LoadedNetwork, network_loader
+
+# Gate-rotation delivery scheduling on a compiled NetworkGraph, without any
+# Qt objects.
+#
+# Every field (F) asks for a turn of water every interval_days: a flow (its
+# 'demand', l/s) for a number of hours. A turn takes water along the field's
+# supply route (breadth-first feeder tree from the sources). While it runs it
+# uses up part of the capacity of every component on that route that has a
+# 'capacity', and one of the slots of every gate (ZT) on it: a gate serves
+# gate_slots fields at a time, so the fields below it take turns. A field
+# takes one turn at a time.
+#
+# Turns are placed by an event simulation: a heap of turn ends frees
+# capacity, released turns start in release order as soon as their whole
+# route has room, and turns that don't fit wait on the component that
+# blocked them until it frees up again.
+#
+# Fields only compete through the limited components they share. All of
+# those lie below the topmost limited component on a field's route, so the
+# fields under it form an independent group: changing a field's request
+# reschedules that group and leaves the rest of the plan untouched.
+
+FIELD_TYPES = ('F',)
+GATE_TYPES = ('ZT',)
+
+DEFAULT_SETTINGS = {
+    'season_days': 180.0,
+    'flow': 5.0,           # l/s of a turn
+    'hours': 12.0,         # length of a turn
+    'interval_days': 10.0,  # days between a field's turns
+    'first_day': 0.0,      # release of a field's first turn, days into the season
+    'gate_slots': 1        # fields a gate serves at a time
+}
+
+# Component properties that override the settings above, per field or gate
+PROPERTY_SETTINGS = {
+    'demand': 'flow',
+    'irrigation_hours': 'hours',
+    'interval_days': 'interval_days',
+    'first_day': 'first_day',
+    'gate_slots': 'gate_slots'
+}
+
+# Flow left over by float rounding is treated as free
+FLOW_TOLERANCE = 1e-6
+
+UNLIMITED = math.inf
+
+
+def component_prefix(node_id: str) -> str:
+    match = re.match(r'[A-Za-z]+', node_id)
+    return match.group() if match else ""
+
+
+class DeliveryPlan:
+    """
+    Scheduled turns as parallel arrays, ordered by start, built from rows
+    of COLUMNS. Turns that could not start within the season have a NaN
+    start and end.
+    """
+    COLUMNS = ('field', 'turn', 'release', 'due', 'start', 'end', 'flow')
+
+    def __init__(self, graph: NetworkGraph, turns: np.ndarray, season_hours: float):
+        self.graph = graph
+        self.season_hours = season_hours
+        self.field = turns[:, 0].astype(np.int64)
+        self.turn = turns[:, 1].astype(np.int64)
+        self.release = turns[:, 2]  # hours into the season
+        self.due = turns[:, 3]      # release of the field's next turn
+        self.start = turns[:, 4]
+        self.end = turns[:, 5]
+        self.flow = turns[:, 6]     # l/s
+
+        order = np.lexsort((self.field, np.nan_to_num(self.start, nan=np.inf)))
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(self, name)[order])
+        self.scheduled = ~np.isnan(self.start)
+        self.wait = np.where(self.scheduled, self.start - self.release, np.nan)
+        self.late = self.scheduled & (self.start > self.due)
+
+    def __len__(self) -> int:
+        return len(self.field)
+
+    def rows(self, fields: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Turn indices, all or those of the given fields."""
+        if fields is None:
+            return np.arange(len(self))
+        mask = np.zeros(self.graph.num_nodes, dtype=bool)
+        mask[np.asarray(list(fields), dtype=np.int64)] = True
+        return np.flatnonzero(mask[self.field])
+
+    def summary(self) -> Dict:
+        scheduled = self.scheduled
+        return {
+            'fields': int(len(np.unique(self.field))),
+            'turns': len(self),
+            'scheduled': int(scheduled.sum()),
+            'unscheduled': int((~scheduled).sum()),
+            'late': int(self.late.sum()),
+            'mean_wait_hours': float(self.wait[scheduled].mean()) if scheduled.any() else 0.0,
+            'max_wait_hours': float(self.wait[scheduled].max()) if scheduled.any() else 0.0,
+            'last_end_hours': float(self.end[scheduled].max()) if scheduled.any() else 0.0,
+            'water_m3': float((self.flow * (self.end - self.start))[scheduled].sum() * 3.6)
+        }
+
+
+class DeliveryScheduler:
+    """
+    Rotation schedule of a network's fields. schedule() plans every group
+    of fields; update() applies changed component properties and replans
+    only the groups they affect. plan() returns the current DeliveryPlan.
+    """
+    def __init__(self, graph: NetworkGraph, properties: Dict[str, Dict], settings: Optional[Dict] = None):
+        self.graph = graph
+        self.properties = {node_id: dict(props) for node_id, props in properties.items()}
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.season_hours = self.settings['season_days'] * 24
+
+        self.prefixes = [component_prefix(node_id) for node_id in graph.node_ids]
+        self.fields = [i for i, prefix in enumerate(self.prefixes) if prefix in FIELD_TYPES]
+        self.parent, self.depth_levels = graph.supply_tree()
+        self.reachable = self.parent >= 0
+        self.reachable[graph.roots] = True
+
+        self.group_turns: Dict[int, np.ndarray] = {}
+        self._build_resources()
+
+    # Resources and groups
+
+    def setting(self, node: int, name: str):
+        """A node's own property for a setting, else the default."""
+        props = self.properties.get(self.graph.node_ids[node])
+        if props:
+            for key, setting in PROPERTY_SETTINGS.items():
+                if setting == name and props.get(key) is not None:
+                    return float(props[key])
+        return self.settings[name]
+
+    def _build_resources(self):
+        """Limits of every component and the groups of fields that share them."""
+        graph = self.graph
+        n = graph.num_nodes
+        self.capacity = [UNLIMITED] * n
+        self.slots = [UNLIMITED] * n
+        for node_id, props in self.properties.items():
+            i = graph.index.get(node_id)
+            if i is not None and props and props.get('capacity') is not None:
+                self.capacity[i] = max(float(props['capacity']), 0.0)
+        for i, prefix in enumerate(self.prefixes):
+            if prefix in GATE_TYPES:
+                self.slots[i] = max(int(self.setting(i, 'gate_slots')), 0)
+            elif prefix in FIELD_TYPES:
+                self.slots[i] = 1
+
+        limited = np.array([c != UNLIMITED or s != UNLIMITED for c, s in zip(self.capacity, self.slots)])
+
+        # Nearest and topmost limited component above each node, one depth at a time
+        self.limited_above = np.full(n, -1, dtype=np.int64)
+        top = np.full(n, -1, dtype=np.int64)
+        for level in self.depth_levels[1:]:
+            parents = self.parent[level]
+            parent_limited = limited[parents]
+            self.limited_above[level] = np.where(parent_limited, parents, self.limited_above[parents])
+            top[level] = np.where(top[parents] >= 0, top[parents], np.where(parent_limited, parents, -1))
+
+        self.routes = {}
+        self.group_of = {}
+        self.groups = defaultdict(list)
+        for field in self.fields:
+            route = [field]
+            node = int(self.limited_above[field])
+            while node >= 0:
+                route.append(node)
+                node = int(self.limited_above[node])
+            self.routes[field] = route
+            group = int(top[field]) if top[field] >= 0 else field
+            self.group_of[field] = group
+            self.groups[group].append(field)
+
+    # Scheduling
+
+    def schedule(self, should_stop: Optional[Callable] = None, progress: Optional[Callable] = None):
+        """Plan every group from scratch."""
+        self.group_turns = {}
+        with span("schedule_groups", groups=len(self.groups), fields=len(self.fields)) as timing:
+            for k, (group, fields) in enumerate(self.groups.items()):
+                if k % 64 == 0:
+                    _check_cancelled(should_stop)
+                    if progress:
+                        progress(k, len(self.groups))
+                self.group_turns[group] = self._simulate(fields)
+            timing.set(turns=sum(len(turns) for turns in self.group_turns.values()))
+
+    def update(self, changes: Dict[str, Dict]) -> Set[int]:
+        """
+        Apply changed component properties ({component_id: {key: value}}, None
+        removes a key) and replan the groups they affect. Returns those
+        groups' fields.
+        """
+        graph = self.graph
+        changed = [graph.index[node_id] for node_id in changes if node_id in graph.index]
+        for node_id, props in changes.items():
+            merged = dict(self.properties.get(node_id) or {})
+            for key, value in props.items():
+                if value is None:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            self.properties[node_id] = merged
+
+        # Fields fed through a changed component, and the groups they were in
+        # (a changed limit can merge or split groups)
+        field_mask = np.zeros(graph.num_nodes, dtype=bool)
+        field_mask[self.fields] = True
+        below = self._supply_descendants(changed)
+        affected = {int(field) for field in below[field_mask[below]]}
+        old_groups = {self.group_of[field] for field in affected}
+        for group in old_groups:
+            affected.update(self.groups[group])
+
+        with span("regroup"):
+            self._build_resources()
+        new_groups = {self.group_of[field] for field in affected}
+        with span("reschedule_groups", groups=len(new_groups), fields=len(affected)):
+            replanned = {group: self._simulate(self.groups[group]) for group in new_groups}
+        for group in old_groups:
+            self.group_turns.pop(group, None)
+        self.group_turns.update(replanned)
+        return {field for group in new_groups for field in self.groups[group]}
+
+    def _supply_descendants(self, nodes: List[int]) -> np.ndarray:
+        """The given nodes and every node fed through them in the supply tree."""
+        inside = np.zeros(self.graph.num_nodes, dtype=bool)
+        inside[nodes] = True
+        for level in self.depth_levels[1:]:
+            inside[level] |= inside[self.parent[level]]
+        return np.flatnonzero(inside)
+
+    def _turn_requests(self, fields: List[int]) -> List[tuple]:
+        """(release, field, turn, due, flow, hours) of every turn the fields ask for."""
+        requests = []
+        for field in fields:
+            flow = self.setting(field, 'flow')
+            hours = self.setting(field, 'hours')
+            interval = max(self.setting(field, 'interval_days'), 0.01) * 24
+            release = max(self.setting(field, 'first_day'), 0.0) * 24
+            if flow <= 0 or hours <= 0:
+                continue
+            turn = 0
+            while release < self.season_hours:
+                requests.append((release, field, turn, release + interval, flow, hours))
+                release += interval
+                turn += 1
+        requests.sort()
+        return requests
+
+    def _simulate(self, fields: List[int]) -> np.ndarray:
+        """Event simulation of one group; a DeliveryPlan.COLUMNS row per turn."""
+        requests = self._turn_requests(fields)
+        routes = self.routes
+        free_flow = {}
+        free_slots = {}
+        for field in fields:
+            for node in routes[field]:
+                free_flow[node] = self.capacity[node]
+                free_slots[node] = self.slots[node]
+
+        starts = [math.nan] * len(requests)
+        waiting = defaultdict(list)  # component -> heap of (release, request) it blocked
+        running = []                 # heap of (end, request)
+        season_end = self.season_hours
+        next_release = 0
+
+        def blocker_of(request):
+            flow = requests[request][4]
+            for node in routes[requests[request][1]]:
+                if free_slots[node] < 1 or free_flow[node] + FLOW_TOLERANCE < flow:
+                    return node
+            return None
+
+        def start(request, now):
+            _, field, _, _, flow, hours = requests[request]
+            for node in routes[field]:
+                free_flow[node] -= flow
+                free_slots[node] -= 1
+            starts[request] = now
+            heapq.heappush(running, (now + hours, request))
+
+        # Turns that can never fit (no source, or a limit below their flow) stay unscheduled
+        feasible = [
+            self.reachable[field] and all(
+                free_flow[node] + FLOW_TOLERANCE >= flow and free_slots[node] >= 1
+                for node in routes[field]
+            )
+            for _, field, _, _, flow, _ in requests
+        ]
+
+        while True:
+            now = math.inf
+            if next_release < len(requests):
+                now = requests[next_release][0]
+            if running and running[0][0] < now:
+                now = running[0][0]
+            if now >= season_end:
+                break
+
+            # Turns ending now free their route
+            freed = set()
+            while running and running[0][0] <= now:
+                _, request = heapq.heappop(running)
+                flow = requests[request][4]
+                for node in routes[requests[request][1]]:
+                    free_flow[node] += flow
+                    free_slots[node] += 1
+                    if node in waiting:
+                        freed.add(node)
+
+            # Waiting turns go before new releases. Each freed component retries
+            # its waiters in order until the first one it still can't take;
+            # turns blocked elsewhere move on to wait there.
+            check = list(freed)
+            while check:
+                node = check.pop()
+                queue = waiting.get(node)
+                while queue:
+                    request = queue[0][1]
+                    blocker = blocker_of(request)
+                    if blocker == node:
+                        break
+                    entry = heapq.heappop(queue)
+                    if blocker is None:
+                        start(request, now)
+                    else:
+                        heapq.heappush(waiting[blocker], entry)
+                        if blocker in freed:
+                            check.append(blocker)
+                if not queue:
+                    waiting.pop(node, None)
+
+            while next_release < len(requests) and requests[next_release][0] <= now:
+                request = next_release
+                next_release += 1
+                if not feasible[request]:
+                    continue
+                blocker = blocker_of(request)
+                if blocker is None:
+                    start(request, now)
+                else:
+                    heapq.heappush(waiting[blocker], (requests[request][0], request))
+
+        return np.array([
+            (field, turn, release, due, start, start + hours, flow)
+            for (release, field, turn, due, flow, hours), start in zip(requests, starts)
+        ], dtype=float).reshape(-1, len(DeliveryPlan.COLUMNS))
+
+    def plan(self) -> DeliveryPlan:
+        turns = list(self.group_turns.values())
+        if turns:
+            turns = np.concatenate(turns)
+        else:
+            turns = np.empty((0, len(DeliveryPlan.COLUMNS)))
+        return DeliveryPlan(self.graph, turns, self.season_hours)
+
+    def fields_under(self, node_id: str) -> List[int]:
+        """Fields supplied through a component (or the field itself)."""
+        if node_id not in self.graph.index:
+            return []
+        below = self._supply_descendants([self.graph.index[node_id]])
+        field_mask = np.zeros(self.graph.num_nodes, dtype=bool)
+        field_mask[self.fields] = True
+        return below[field_mask[below]].tolist()
+
+
+def run_delivery_schedule(db_ops, network_id: int, settings: Optional[Dict] = None,
+                          progress: Optional[Callable] = None,
+                          should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Load a saved network (shared network_loader) and plan the season's
+    field turns; task for AnalysisWorker.
+    """
+    _report(progress, 0, "Loading network")
+    loaded = network_loader.load(db_ops, network_id)
+    _check_cancelled(should_stop)
+
+    _report(progress, 10, "Building supply routes")
+    with span("build_scheduler"):
+        scheduler = DeliveryScheduler(loaded.graph, loaded.properties, settings)
+
+    def group_progress(done, total):
+        _report(progress, 10 + int(85 * done / max(total, 1)), f"Scheduling group {done} of {total}")
+
+    scheduler.schedule(should_stop, group_progress)
+    with span("collect_plan"):
+        plan = scheduler.plan()
+    _report(progress, 100, "Schedule ready")
+    return {'network': loaded, 'scheduler': scheduler, 'plan': plan, 'rescheduled': None}
+
+
+def run_reschedule(db_ops, loaded: LoadedNetwork, scheduler: DeliveryScheduler,
+                   changes: Dict[str, Dict], progress: Optional[Callable] = None,
+                   should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Store changed component properties and replan only the affected groups
+    of an existing schedule; task for AnalysisWorker.
+    """
+    _report(progress, 0, "Saving field requests")
+    network_loader.save_properties(db_ops, loaded, changes)
+
+    _report(progress, 30, "Rescheduling affected fields")
+    rescheduled = scheduler.update(changes)
+    with span("collect_plan"):
+        plan = scheduler.plan()
+    _report(progress, 100, f"Rescheduled {len(rescheduled)} fields")
+    return {'network': loaded, 'scheduler': scheduler, 'plan': plan, 'rescheduled': rescheduled}
@@ -1,13 +1,288 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
-
 # ui/tabs/delivery_tab.py
 
+import csv
+
+import numpy as np
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QDoubleSpinBox, QSpinBox, QDateEdit, QLineEdit, QFileDialog,
+                               QMessageBox, QSplitter, QTableWidget, QTableWidgetItem,
+                               QHeaderView, QGroupBox, QFormLayout)
+from PySide6.QtCore import Qt, QDate
+
+from utils.db import get_db
+from .delivery_scheduler import DEFAULT_SETTINGS, run_delivery_schedule, run_reschedule
+from .network_db_ops import NetworkDatabaseOperations
+from .network_selector import NetworkSelector
+from .network_worker import TaskRunner
+from .timing_panel import TimingPanel
+
+# Turns shown in the table; the full plan stays in memory and can be exported
+MAX_TABLE_ROWS = 1000
+
+
 class DeliveryTab(QWidget):
+    """
+    Gate-rotation delivery schedule of a saved network. Fields take turns
+    at their gates within the canal capacities; a changed field request
+    reschedules only the fields that share limited components with it.
+    """
+    HEADERS = ["Field", "Label", "Turn", "Requested", "Start", "End", "Wait (h)", "Flow (l/s)", "Status"]
+
     def __init__(self):
         super().__init__()
+        self.db = None
+        self._db_ops = None
+        self.network_id = None
+        self.loaded = None
+        self.scheduler = None
+        self.plan = None
+        self.shown_rows = []
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout()
-        layout.addWidget(QLabel("Water Delivery Tab"))
-        self.setLayout(layout)
\ No newline at end of file
+        layout.setSpacing(5)
+
+        self.network_selector = NetworkSelector(lambda: self.db_ops)
+        self.network_selector.networkSelected.connect(self.select_network)
+        layout.addWidget(self.network_selector)
+
+        # Season settings; fields and gates can override them in their properties
+        settings_layout = QHBoxLayout()
+        self.season_start = QDateEdit(QDate(QDate.currentDate().year(), 4, 1))
+        self.season_start.setCalendarPopup(True)
+        self.season_days = self._spin_box(QSpinBox(), 1, 366, int(DEFAULT_SETTINGS['season_days']))
+        self.default_flow = self._spin_box(QDoubleSpinBox(), 0.1, 10000.0, DEFAULT_SETTINGS['flow'])
+        self.default_hours = self._spin_box(QDoubleSpinBox(), 0.5, 240.0, DEFAULT_SETTINGS['hours'])
+        self.default_interval = self._spin_box(QDoubleSpinBox(), 1.0, 120.0, DEFAULT_SETTINGS['interval_days'])
+        self.gate_slots = self._spin_box(QSpinBox(), 1, 100, DEFAULT_SETTINGS['gate_slots'])
+        for label, widget in (("Season start:", self.season_start), ("Days:", self.season_days),
+                              ("Flow (l/s):", self.default_flow), ("Turn (h):", self.default_hours),
+                              ("Every (days):", self.default_interval), ("Fields per gate:", self.gate_slots)):
+            settings_layout.addWidget(QLabel(label))
+            settings_layout.addWidget(widget)
+
+        self.schedule_btn = QPushButton("Build Schedule")
+        self.schedule_btn.clicked.connect(self.build_schedule)
+        self.export_btn = QPushButton("Export CSV")
+        self.export_btn.clicked.connect(self.export_csv)
+        self.timings_btn = QPushButton("Show Timings")
+        self.timings_btn.setCheckable(True)
+        self.timings_btn.toggled.connect(self.toggle_timings)
+        settings_layout.addWidget(self.schedule_btn)
+        settings_layout.addWidget(self.export_btn)
+        settings_layout.addStretch()
+        settings_layout.addWidget(self.timings_btn)
+        layout.addLayout(settings_layout)
+
+        self.task_runner = TaskRunner()
+        self.task_runner.busyChanged.connect(self.set_busy)
+        self.task_runner.profiled.connect(self.on_profiled)
+        layout.addWidget(self.task_runner)
+
+        self.summary_label = QLabel("Load a network to schedule its deliveries.")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        main_splitter = QSplitter(Qt.Orientation.Horizontal)
+
+        schedule_widget = QWidget()
+        schedule_layout = QVBoxLayout(schedule_widget)
+        schedule_layout.setContentsMargins(0, 0, 0, 0)
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Show the fields supplied through a component (e.g. ZT12)...")
+        self.filter_input.returnPressed.connect(self.show_plan)
+        schedule_layout.addWidget(self.filter_input)
+        self.schedule_table = QTableWidget(0, len(self.HEADERS))
+        self.schedule_table.setHorizontalHeaderLabels(self.HEADERS)
+        self.schedule_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.schedule_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.schedule_table.verticalHeader().setVisible(False)
+        self.schedule_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.schedule_table.itemSelectionChanged.connect(self.on_turn_selected)
+        schedule_layout.addWidget(self.schedule_table)
+        main_splitter.addWidget(schedule_widget)
+
+        # Change one field's request and reschedule the fields it shares water with
+        request_group = QGroupBox("Field request")
+        request_layout = QFormLayout(request_group)
+        self.field_input = QLineEdit()
+        self.field_input.setPlaceholderText("e.g. F12")
+        self.field_flow = self._spin_box(QDoubleSpinBox(), 0.0, 10000.0, DEFAULT_SETTINGS['flow'])
+        self.field_hours = self._spin_box(QDoubleSpinBox(), 0.0, 240.0, DEFAULT_SETTINGS['hours'])
+        self.field_interval = self._spin_box(QDoubleSpinBox(), 1.0, 120.0, DEFAULT_SETTINGS['interval_days'])
+        self.reschedule_btn = QPushButton("Save and Reschedule")
+        self.reschedule_btn.clicked.connect(self.reschedule_field)
+        request_layout.addRow("Field:", self.field_input)
+        request_layout.addRow("Flow (l/s):", self.field_flow)
+        request_layout.addRow("Turn (h):", self.field_hours)
+        request_layout.addRow("Every (days):", self.field_interval)
+        request_layout.addRow(self.reschedule_btn)
+        main_splitter.addWidget(request_group)
+
+        self.timing_panel = TimingPanel()
+        self.timing_panel.setVisible(False)
+        main_splitter.addWidget(self.timing_panel)
+        main_splitter.setStretchFactor(0, 3)
+
+        layout.addWidget(main_splitter)
+        self.setLayout(layout)
+        self.set_busy(False)
+
+    @staticmethod
+    def _spin_box(spin_box, minimum, maximum, value):
+        spin_box.setRange(minimum, maximum)
+        spin_box.setValue(value)
+        return spin_box
+
+    @property
+    def db_ops(self) -> NetworkDatabaseOperations:
+        """Database operations; the session is opened on first use."""
+        if self._db_ops is None:
+            self.db = next(get_db())
+            self._db_ops = NetworkDatabaseOperations(self.db)
+        return self._db_ops
+
+    def settings(self) -> dict:
+        return {
+            'season_days': float(self.season_days.value()),
+            'flow': self.default_flow.value(),
+            'hours': self.default_hours.value(),
+            'interval_days': self.default_interval.value(),
+            'gate_slots': self.gate_slots.value()
+        }
+
+    def select_network(self, network_id: int):
+        self.network_id = network_id
+        self.build_schedule()
+
+    def build_schedule(self):
+        if self.network_id is None:
+            return
+        self.task_runner.start(
+            run_delivery_schedule, self.on_scheduled, "Error building schedule",
+            self.network_id, self.settings()
+        )
+
+    def reschedule_field(self):
+        """Store the field's new request and replan only the fields affected by it."""
+        field_id = self.field_input.text().strip()
+        if self.scheduler is None or self.scheduler.graph.index.get(field_id) not in self.scheduler.routes:
+            QMessageBox.warning(self, "Warning", f"Field '{field_id}' is not in the scheduled network")
+            return
+        changes = {field_id: {
+            'demand': self.field_flow.value(),
+            'irrigation_hours': self.field_hours.value(),
+            'interval_days': self.field_interval.value()
+        }}
+        self.task_runner.start(
+            run_reschedule, self.on_scheduled, "Error rescheduling",
+            self.loaded, self.scheduler, changes
+        )
+
+    def on_scheduled(self, result: dict):
+        self.loaded = result['network']
+        self.scheduler = result['scheduler']
+        self.plan = result['plan']
+        summary = self.plan.summary()
+        rescheduled = result['rescheduled']
+        self.summary_label.setText(
+            f"Network #{self.loaded.network_id}: {summary['fields']} fields in "
+            f"{len(self.scheduler.groups)} independent groups, {summary['turns']} turns.\n"
+            f"Scheduled {summary['scheduled']}, unscheduled {summary['unscheduled']}, "
+            f"late {summary['late']}; mean wait {summary['mean_wait_hours']:.1f} h, "
+            f"max {summary['max_wait_hours']:.1f} h; {summary['water_m3']:,.0f} m³ delivered."
+            + (f"\nRescheduled {len(rescheduled)} fields." if rescheduled is not None else "")
+        )
+        self.show_plan()
+
+    def show_plan(self):
+        """Fill the table with the turns of the filtered fields, by start."""
+        if self.plan is None:
+            return
+        component_id = self.filter_input.text().strip()
+        if component_id:
+            rows = self.plan.rows(self.scheduler.fields_under(component_id))
+        else:
+            rows = self.plan.rows()
+        self.shown_rows = rows[:MAX_TABLE_ROWS]
+
+        plan = self.plan
+        rows = self.shown_rows
+        node_ids = plan.graph.node_ids
+        labels = self.loaded.labels
+        releases, starts, ends = (self._format_times(times[rows]) for times in (plan.release, plan.start, plan.end))
+        table = self.schedule_table
+        table.setRowCount(len(rows))
+        for row, i in enumerate(rows):
+            field_id = node_ids[plan.field[i]]
+            if not plan.scheduled[i]:
+                status = "Unscheduled"
+            else:
+                status = "Late" if plan.late[i] else ""
+            values = [
+                field_id, labels.get(field_id, ""), str(plan.turn[i] + 1),
+                releases[row], starts[row], ends[row],
+                f"{plan.wait[i]:.1f}" if plan.scheduled[i] else "",
+                f"{plan.flow[i]:.1f}", status
+            ]
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+
+    def _format_times(self, hours: np.ndarray) -> list:
+        """Hours into the season as dates and times; empty where NaN (not scheduled)."""
+        season_start = np.datetime64(self.season_start.date().toPython(), 'm')
+        valid = ~np.isnan(hours)
+        times = season_start + np.round(np.where(valid, hours, 0) * 60).astype('timedelta64[m]')
+        text = np.char.replace(np.datetime_as_string(times, unit='m'), 'T', ' ')
+        return np.where(valid, text, '').tolist()
+
+    def on_turn_selected(self):
+        """Put the selected turn's field into the request editor."""
+        rows = self.schedule_table.selectionModel().selectedRows()
+        if not rows or self.plan is None:
+            return
+        i = self.shown_rows[rows[0].row()]
+        field = int(self.plan.field[i])
+        self.field_input.setText(self.plan.graph.node_ids[field])
+        self.field_flow.setValue(self.scheduler.setting(field, 'flow'))
+        self.field_hours.setValue(self.scheduler.setting(field, 'hours'))
+        self.field_interval.setValue(self.scheduler.setting(field, 'interval_days'))
+
+    def export_csv(self):
+        if self.plan is None:
+            return
+        file_name, _ = QFileDialog.getSaveFileName(
+            self, "Export Schedule", "delivery_schedule.csv", "CSV Files (*.csv)"
+        )
+        if not file_name:
+            return
+        plan = self.plan
+        node_ids = plan.graph.node_ids
+        try:
+            with open(file_name, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file)
+                writer.writerow(['field', 'turn', 'requested', 'start', 'end', 'flow_lps', 'late'])
+                writer.writerows(zip(
+                    [node_ids[field] for field in plan.field.tolist()], (plan.turn + 1).tolist(),
+                    self._format_times(plan.release), self._format_times(plan.start),
+                    self._format_times(plan.end), plan.flow.tolist(), plan.late.astype(int).tolist()
+                ))
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Error writing file: {str(e)}")
+            return
+        QMessageBox.information(self, "Success", f"Exported {len(plan)} turns")
+
+    def on_profiled(self, run):
+        self.timing_panel.show_run(run)
+
+    def toggle_timings(self, visible: bool):
+        self.timing_panel.setVisible(visible)
+        self.timings_btn.setText("Hide Timings" if visible else "Show Timings")
+
+    def set_busy(self, busy: bool):
+        self.network_selector.set_enabled(not busy)
+        self.schedule_btn.setEnabled(not busy and self.network_id is not None)
+        self.export_btn.setEnabled(not busy and self.plan is not None)
+        self.reschedule_btn.setEnabled(not busy and self.scheduler is not None)
@@ -0,0 +1,204 @@
+# ui/tabs/measurement_db_ops.py
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to Python path
+sys.path.append(str(Path(__file__).parents[2]))
+
+from utils.profiling import span
+from utils.db import Analysis, AnalysisResult, SeriesFile
+from utils.timeseries_store import StoredSeries, TimeSeriesStore, store_for_url
+
+# Analysis.status values of a measurement import
+STATUS_INGESTING = 'ingesting'      # running, or stopped without a chance to say so
+STATUS_INTERRUPTED = 'interrupted'  # cancelled between two chunks
+STATUS_FAILED = 'failed'
+STATUS_INGESTED = 'ingested'
+STATUS_ANALYZED = 'analyzed'        # anomaly detection results are stored
+RESUMABLE_STATUSES = (STATUS_INGESTING, STATUS_INTERRUPTED, STATUS_FAILED)
+
+# Samples are kept in the columnar store (utils/timeseries_store.py), indexed
+# by series_files. Series imported before that have their samples in
+# analysis_results and are copied to the store on first use, one page at a
+# time in time order, continuing after the (timestamp, id) of the previous
+# page along ix_analysis_results_analysis_timestamp. Times come back as Unix
+# microseconds, computed by SQLite from the text SQLAlchemy stores (whole
+# seconds and fraction apart: strftime rounds to milliseconds).
+LEGACY_SAMPLE_PAGE = (
+    "SELECT id, timestamp, CAST(strftime('%s', substr(timestamp, 1, 19)) AS INTEGER) * 1000000 "
+    "+ CAST(substr(timestamp, 21, 6) AS INTEGER), original_value "
+    "FROM analysis_results WHERE analysis_id = ? AND (timestamp, id) > (?, ?) "
+    "ORDER BY timestamp, id LIMIT ?"
+)
+LEGACY_PAGE_SIZE = 100_000
+
+
+class MeasurementDatabaseOperations:
+    def __init__(self, session: Session):
+        self.session = session
+
+    def get_project_analyses(self, project_id: int) -> List[Analysis]:
+        """All measurement series of a project, by file and gauge."""
+        return self.session.query(Analysis).filter(
+            Analysis.project_id == project_id
+        ).order_by(Analysis.file_path, Analysis.gauge_id, Analysis.id).all()
+
+    def get_analysis(self, analysis_id: int) -> Optional[Analysis]:
+        return self.session.get(Analysis, analysis_id)
+
+    def get_file_analyses(self, project_id: int, file_path: str) -> List[Analysis]:
+        """The series imported from one file (one per gauge)."""
+        return self.session.query(Analysis).filter(
+            Analysis.project_id == project_id,
+            Analysis.file_path == file_path
+        ).order_by(Analysis.id).all()
+
+    def add_analysis(self, project_id: int, file_path: str, gauge_id: Optional[str],
+                     file_size: int, resume_offset: int) -> Analysis:
+        """Add the series of a gauge; committed with the chunk that first contains it."""
+        analysis = Analysis(
+            project_id=project_id,
+            file_path=file_path,
+            gauge_id=gauge_id,
+            status=STATUS_INGESTING,
+            file_size=file_size,
+            resume_offset=resume_offset,
+            rows_ingested=0,
+            rows_rejected=0
+        )
+        self.session.add(analysis)
+        self.session.flush()  # assigns analysis.id without committing
+        return analysis
+
+    def delete_analyses(self, analysis_ids: List[int]):
+        """Delete series and their samples, e.g. to restart an import of a changed file."""
+        if not analysis_ids:
+            return
+        try:
+            paths = [path for path, in self.session.query(SeriesFile.path).filter(
+                SeriesFile.analysis_id.in_(analysis_ids)
+            )]
+            self.session.query(SeriesFile).filter(
+                SeriesFile.analysis_id.in_(analysis_ids)
+            ).delete(synchronize_session=False)
+            self.session.query(AnalysisResult).filter(
+                AnalysisResult.analysis_id.in_(analysis_ids)
+            ).delete(synchronize_session=False)
+            self.session.query(Analysis).filter(
+                Analysis.id.in_(analysis_ids)
+            ).delete(synchronize_session=False)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        for path in paths:
+            self.store.remove(path)
+
+    @property
+    def store(self) -> TimeSeriesStore:
+        return store_for_url(self.session.get_bind().url.render_as_string(hide_password=False))
+
+    def add_series_file(self, analysis: Analysis) -> StoredSeries:
+        """
+        Start the empty stored series of a new Analysis; its index entry is
+        committed with the next checkpoint.
+        """
+        analysis.series_file = SeriesFile(path=str(analysis.id), samples=0)
+        self.session.flush()
+        series = self.store.series(analysis.series_file.path, 0)
+        series.discard_uncommitted()  # files left by an uncommitted series with the same ID
+        return series
+
+    def open_series(self, analysis: Analysis) -> StoredSeries:
+        """
+        The stored samples of a series. A series whose samples are still in
+        analysis_results is copied to the store first (and left there).
+        """
+        if analysis.series_file is None:
+            return self._copy_legacy_samples(analysis)
+        return self.store.series(analysis.series_file.path, analysis.series_file.samples or 0)
+
+    def _copy_legacy_samples(self, analysis: Analysis) -> StoredSeries:
+        try:
+            series = self.add_series_file(analysis)
+            with span("copy analysis_results", analysis_id=analysis.id):
+                after = ('', 0)
+                while True:
+                    rows = self.session.connection().exec_driver_sql(
+                        LEGACY_SAMPLE_PAGE, (analysis.id, *after, LEGACY_PAGE_SIZE)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    ids, timestamps, times, values = zip(*rows)
+                    after = (timestamps[-1], ids[-1])
+                    series.append(np.array(times, dtype=np.int64).view('datetime64[us]'),
+                                  np.array(values, dtype=float))
+                    if len(rows) < LEGACY_PAGE_SIZE:
+                        break
+            series.sync()
+            self.set_series_length(analysis, series)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return series
+
+    def set_series_length(self, analysis: Analysis, series: StoredSeries):
+        """
+        Record the length of a synced series and the times of its first and
+        last stored samples in its index entry; committed by the caller.
+        """
+        record = analysis.series_file
+        record.samples = series.length
+        if series.length:
+            record.first_time = series.times(0, 1)[0].item()
+            record.last_time = series.times(series.length - 1)[0].item()
+
+    def checkpoint(self, analyses: List[Analysis], counts: Dict[int, tuple], resume_offset: int,
+                   status: Optional[str] = None):
+        """
+        Commit the samples appended and synced since the last checkpoint
+        (set_series_length) together with each series' progress: counts maps
+        analysis ID -> (rows added, rows rejected), and every series of the
+        file moves to resume_offset.
+        """
+        try:
+            for analysis in analyses:
+                added, rejected = counts.get(analysis.id, (0, 0))
+                analysis.rows_ingested = (analysis.rows_ingested or 0) + added
+                analysis.rows_rejected = (analysis.rows_rejected or 0) + rejected
+                analysis.resume_offset = resume_offset
+                if status:
+                    analysis.status = status
+            with span("commit"):
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def set_status(self, analysis_ids: List[int], status: str):
+        try:
+            self.session.execute(
+                update(Analysis).where(Analysis.id.in_(analysis_ids)).values(status=status)
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+    def set_detection_parameters(self, analysis_ids: List[int], parameters: Dict):
+        """Store the anomaly detection parameters (Analysis column -> value) on each series."""
+        try:
+            self.session.execute(
+                update(Analysis).where(Analysis.id.in_(analysis_ids)).values(**parameters)
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
@@ -0,0 +1,308 @@
+# ui/tabs/measurement_ingest.py
+
+import csv
+import io
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from utils.profiling import span
+from .measurement_db_ops import (MeasurementDatabaseOperations, STATUS_FAILED, STATUS_INGESTED,
+                                 STATUS_INGESTING, STATUS_INTERRUPTED)
+from .network_analysis import AnalysisCancelled, _check_cancelled, _report
+
+# Streaming import of logger CSV exports into analyses and their stored
+# series (utils/timeseries_store.py).
+#
+# The file is read in fixed-size blocks cut at the last complete line, so
+# memory stays bounded whatever the file size and every block ends at a
+# known byte offset. Each block is parsed with pandas, its timestamps and
+# values converted and validated with vectorized code, and its samples
+# appended to the column files and synced; then the new series lengths are
+# committed in one transaction together with the offset reached. An import
+# that stops (cancelled, crashed, or the logger appended more rows since)
+# cuts the files back to the committed lengths and continues from the last
+# committed offset, without duplicating or losing samples.
+
+# Bytes read per block
+CHUNK_BYTES = 4 * 1024 * 1024
+
+# Column names recognized in the header (case-insensitive), in order of preference
+TIMESTAMP_COLUMNS = ('timestamp', 'datetime', 'date_time', 'time', 'date')
+VALUE_COLUMNS = ('value', 'level', 'water_level', 'discharge', 'flow', 'reading')
+GAUGE_COLUMNS = ('gauge', 'gauge_id', 'station', 'sensor', 'sensor_id')
+
+DELIMITERS = ',;\t|'
+
+
+class CsvLayout:
+    """Where the samples are in a logger file: delimiter, header and the columns used."""
+    def __init__(self, delimiter: str, columns: List[str], header_bytes: int,
+                 timestamp_column: str, value_column: str, gauge_column: Optional[str],
+                 decimal: str = '.'):
+        self.delimiter = delimiter
+        self.columns = columns
+        self.header_bytes = header_bytes  # offset of the first data line
+        self.timestamp_column = timestamp_column
+        self.value_column = value_column
+        self.gauge_column = gauge_column
+        self.decimal = decimal
+
+
+def _pick_column(columns: List[str], requested: Optional[str], candidates, exclude=()) -> Optional[str]:
+    if requested:
+        if requested not in columns:
+            raise ValueError(f"column '{requested}' is not in the file (columns: {', '.join(columns)})")
+        return requested
+    by_name = {column.strip().lower(): column for column in columns if column not in exclude}
+    return next((by_name[name] for name in candidates if name in by_name), None)
+
+
+def read_layout(path: str, timestamp_column: Optional[str] = None, value_column: Optional[str] = None,
+                gauge_column: Optional[str] = None) -> CsvLayout:
+    """
+    Read the header line and pick the timestamp, value and (optional) gauge
+    columns, by name unless given.
+    """
+    with open(path, 'rb') as file:
+        head = file.read(64 * 1024)
+    end = head.find(b'\n')
+    if end < 0:
+        raise ValueError("no header line found")
+    header = head[:end].decode('utf-8-sig').rstrip('\r')
+    sample_lines = head[end + 1:].decode('utf-8', errors='replace').splitlines()[:20]
+
+    delimiter = max(DELIMITERS, key=header.count)
+    columns = [column.strip() for column in next(csv.reader([header], delimiter=delimiter))]
+
+    timestamp_column = _pick_column(columns, timestamp_column, TIMESTAMP_COLUMNS)
+    if timestamp_column is None:
+        raise ValueError(f"no timestamp column (expected one of: {', '.join(TIMESTAMP_COLUMNS)})")
+    gauge_column = _pick_column(columns, gauge_column, GAUGE_COLUMNS, exclude=(timestamp_column,))
+    value_column = _pick_column(columns, value_column, VALUE_COLUMNS, exclude=(timestamp_column, gauge_column))
+    if value_column is None:
+        others = [column for column in columns if column not in (timestamp_column, gauge_column)]
+        if not others:
+            raise ValueError("no value column")
+        value_column = others[0]
+
+    # Decimal commas, as in exports with ';' separators
+    decimal = '.'
+    if delimiter != ',' and sample_lines:
+        position = columns.index(value_column)
+        samples = [line.split(delimiter)[position] for line in sample_lines
+                   if len(line.split(delimiter)) > position]
+        if any(',' in value for value in samples) and not any('.' in value for value in samples):
+            decimal = ','
+
+    return CsvLayout(delimiter, columns, end + 1, timestamp_column, value_column, gauge_column, decimal)
+
+
+def iter_blocks(path: str, start: int, chunk_bytes: int = CHUNK_BYTES) -> Iterator[Tuple[bytes, int]]:
+    """
+    Yield (block, end offset) pairs of complete lines from start to the end
+    of the file, about chunk_bytes each. A last line without its newline is
+    left out: the logger may still be writing it, and the next import reads
+    it whole from the offset after the last newline.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        offset = start
+        rest = b''
+        while True:
+            data = file.read(chunk_bytes)
+            if not data:
+                return
+            data = rest + data
+            cut = data.rfind(b'\n') + 1
+            if cut == 0:  # a line longer than a block
+                rest = data
+                continue
+            rest = data[cut:]
+            offset += cut
+            yield data[:cut], offset
+
+
+def parse_block(data: bytes, layout: CsvLayout, timestamp_format: Optional[str] = None):
+    """
+    Parse a block of lines into samples. Returns (timestamps as
+    datetime64[us], float values, a mask of the valid rows, per-row gauge
+    codes (-1 for none) and gauge names, the number of lines); the gauge
+    codes are None for files without a gauge column. Timestamps with a UTC
+    offset are converted to UTC.
+    """
+    import pandas as pd
+
+    usecols = [layout.timestamp_column, layout.value_column]
+    if layout.gauge_column:
+        usecols.append(layout.gauge_column)
+    frame = pd.read_csv(
+        io.BytesIO(data), sep=layout.delimiter, header=None, names=layout.columns, usecols=usecols,
+        # Values are left to the C parser's float conversion, much faster than to_numeric on strings
+        dtype={column: str for column in usecols if column != layout.value_column},
+        decimal=layout.decimal, skipinitialspace=True, skip_blank_lines=False, on_bad_lines='skip',
+        low_memory=False, engine='c'
+    )
+    lines = data.count(b'\n') + (0 if data.endswith(b'\n') else 1)
+
+    raw_timestamps = frame[layout.timestamp_column]
+    timestamps = pd.to_datetime(raw_timestamps, format=timestamp_format, errors='coerce', utc=True)
+    # Stripping every string costs as much as parsing them; retry only the failures
+    retry = timestamps.isna() & raw_timestamps.notna()
+    if retry.any():
+        timestamps[retry] = pd.to_datetime(raw_timestamps[retry].str.strip(), format=timestamp_format,
+                                           errors='coerce', utc=True)
+    timestamps = timestamps.dt.tz_localize(None).to_numpy(dtype='datetime64[us]')
+
+    values = frame[layout.value_column]
+    if not pd.api.types.is_numeric_dtype(values):  # some value didn't parse
+        if layout.decimal != '.':
+            values = values.str.replace(layout.decimal, '.', regex=False)
+        values = pd.to_numeric(values, errors='coerce')
+    values = values.to_numpy(dtype=float)
+
+    valid = ~np.isnat(timestamps) & np.isfinite(values)
+    codes = names = None
+    if layout.gauge_column:
+        # Strip the distinct names rather than every row
+        raw_codes, raw_names = pd.factorize(frame[layout.gauge_column])
+        stripped = [str(name).strip() for name in raw_names]
+        names = sorted(set(stripped) - {''})
+        lookup = {name: k for k, name in enumerate(names)}
+        mapping = np.array([lookup.get(name, -1) for name in stripped] + [-1], dtype=np.int64)
+        codes = mapping[raw_codes]  # the NaN code -1 picks the trailing -1
+        valid &= codes >= 0
+    return timestamps, values, valid, codes, names, lines
+
+
+def ingest_measurements(ops: MeasurementDatabaseOperations, project_id: int, path: str,
+                        timestamp_column: Optional[str] = None, value_column: Optional[str] = None,
+                        gauge_column: Optional[str] = None, timestamp_format: Optional[str] = None,
+                        restart: bool = False, chunk_bytes: int = CHUNK_BYTES,
+                        progress: Optional[Callable] = None,
+                        should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Import (or continue importing) a logger CSV into one Analysis per gauge.
+    Continues from the last committed offset when the file was imported
+    before; restart=True deletes the earlier series and starts over.
+    """
+    path = os.path.abspath(path)
+    size = os.path.getsize(path)
+    layout = read_layout(path, timestamp_column, value_column, gauge_column)
+
+    existing = ops.get_file_analyses(project_id, path)
+    offset = min((analysis.resume_offset or 0 for analysis in existing), default=0)
+    if existing and (restart or offset > size):
+        if not restart:
+            raise ValueError("the file is shorter than the part already imported; "
+                             "import it again from the start")
+        ops.delete_analyses([analysis.id for analysis in existing])
+        existing, offset = [], 0
+    offset = max(offset, layout.header_bytes)
+    resumed = offset > layout.header_bytes
+    for analysis in existing:
+        analysis.file_size = size  # the logger may have appended rows since
+    if existing:
+        ops.set_status([analysis.id for analysis in existing], STATUS_INGESTING)
+
+    analyses = {analysis.gauge_id: analysis for analysis in existing}
+    stored = {}
+    for analysis in existing:
+        stored[analysis.id] = ops.open_series(analysis)
+        stored[analysis.id].discard_uncommitted()
+    totals = {'rows': 0, 'rejected': 0, 'unattributed': 0}
+    _report(progress, int(100 * offset / max(size, 1)),
+            "Resuming import" if resumed else "Importing measurements")
+
+    def series(gauge_id, block_start):
+        if gauge_id not in analyses:
+            analysis = ops.add_analysis(project_id, path, gauge_id, size, block_start)
+            stored[analysis.id] = ops.add_series_file(analysis)
+            analyses[gauge_id] = analysis
+        return analyses[gauge_id]
+
+    def append(analysis, timestamps, values):
+        with span("append samples", rows=len(values)):
+            stored[analysis.id].append(timestamps, values)
+        return len(values)
+
+    try:
+        for data, end in iter_blocks(path, offset, chunk_bytes):
+            _check_cancelled(should_stop)
+            with span("ingest_block", bytes=len(data)) as timing:
+                with span("parse_block"):
+                    timestamps, values, valid, codes, names, lines = parse_block(data, layout, timestamp_format)
+
+                counts = {}
+                if codes is None:
+                    analysis = series(None, offset)
+                    counts[analysis.id] = (
+                        append(analysis, timestamps[valid], values[valid]),
+                        lines - int(valid.sum())
+                    )
+                else:
+                    # One series per gauge; rows without a gauge can't be attributed
+                    rows = np.flatnonzero(codes >= 0)
+                    order = rows[np.argsort(codes[rows], kind='stable')]
+                    bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+                    for k, gauge_id in enumerate(names):
+                        gauge_rows = order[bounds[k]:bounds[k + 1]]
+                        keep = gauge_rows[valid[gauge_rows]]
+                        analysis = series(gauge_id, offset)
+                        counts[analysis.id] = (
+                            append(analysis, timestamps[keep], values[keep]),
+                            len(gauge_rows) - len(keep)
+                        )
+                    totals['unattributed'] += lines - len(rows)
+
+                with span("sync"):
+                    for analysis_id in counts:
+                        stored[analysis_id].sync()
+                for analysis in analyses.values():
+                    if analysis.id in counts:
+                        ops.set_series_length(analysis, stored[analysis.id])
+                ops.checkpoint(list(analyses.values()), counts, end)
+                added = sum(count[0] for count in counts.values())
+                totals['rows'] += added
+                totals['rejected'] += lines - added
+                timing.set(lines=lines, rows=added)
+            offset = end
+            _report(progress, int(100 * end / max(size, 1)),
+                    f"Imported {totals['rows']:,} samples ({end / 1048576:,.0f} of {size / 1048576:,.0f} MB)")
+
+        if not analyses:
+            series(None, offset)
+        # Loggers write in time order, but merged or hand-edited files may not be
+        for analysis in analyses.values():
+            if not stored[analysis.id].in_time_order():
+                _report(progress, 99, f"Sorting {stored[analysis.id].length:,} samples")
+                with span("sort series", rows=stored[analysis.id].length):
+                    stored[analysis.id].sort()
+                    stored[analysis.id].sync()
+                ops.set_series_length(analysis, stored[analysis.id])
+        # The offset reached, not the size seen at the start: the logger may have
+        # appended rows since, which were imported, or be writing a last line, which wasn't
+        ops.checkpoint(list(analyses.values()), {}, offset, status=STATUS_INGESTED)
+    except Exception as error:
+        # Series first seen in the failed block were never committed; appended
+        # samples past the committed lengths are cut off when the import resumes
+        ops.session.rollback()
+        ids = [analysis.id for analysis in analyses.values() if analysis.id is not None]
+        if ids:
+            ops.set_status(ids, STATUS_INTERRUPTED if isinstance(error, AnalysisCancelled) else STATUS_FAILED)
+        raise
+
+    return {
+        'file_path': path,
+        'analyses': [analysis.id for analysis in analyses.values()],
+        'resumed': resumed,
+        **totals
+    }
+
+
+def run_measurement_import(db_ops, project_id: int, path: str, progress: Optional[Callable] = None,
+                           should_stop: Optional[Callable] = None, **options) -> Dict:
+    """Import a logger CSV on the worker's session; task for AnalysisWorker."""
+    return ingest_measurements(MeasurementDatabaseOperations(db_ops.session), project_id, path,
+                               progress=progress, should_stop=should_stop, **options)
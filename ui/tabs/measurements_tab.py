@@ -1,13 +1,357 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
-
 # ui/tabs/measurements_tab.py
 
+from pathlib import Path
+
+import numpy as np
+
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QComboBox,
+                               QCheckBox, QSpinBox, QDoubleSpinBox, QFileDialog, QMessageBox, QSplitter,
+                               QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox)
+from PySide6.QtCore import Qt, QItemSelectionModel
+
+from utils.db import get_db
+from .anomaly_engine import DEFAULT_PARAMETERS, DETRENDING_METHODS, DetectionParameters, run_anomaly_detection
+from .measurement_db_ops import MeasurementDatabaseOperations, RESUMABLE_STATUSES, STATUS_ANALYZED
+from .measurement_ingest import run_measurement_import
+from .network_db_ops import NetworkDatabaseOperations
+from .network_worker import TaskRunner
+from .series_chart import SeriesChart
+from .timing_panel import TimingPanel
+
+# Samples shown in the preview of the selected series
+PREVIEW_ROWS = 200
+
+
 class MeasurementsTab(QWidget):
+    """
+    Gauge time series of a project. Logger CSV exports are imported in the
+    background, one series per gauge; an import that was stopped continues
+    where it left off when the file is imported again (or resumed). Anomaly
+    detection runs on the selected series (all of them if none is selected)
+    with the parameters below, which are stored on each series. The selected
+    series is plotted; drag across the plot to zoom in.
+    """
     def __init__(self):
         super().__init__()
+        self.db = None
+        self._db_ops = None
+        self.measurement_ops = None
+        self.analyses = []
+        self.loaded_projects = False
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout()
-        layout.addWidget(QLabel("Measurements Tab"))
-        self.setLayout(layout)
\ No newline at end of file
+        layout.setSpacing(5)
+
+        controls = QHBoxLayout()
+        self.project_combo = QComboBox()
+        self.project_combo.setMinimumWidth(200)
+        self.project_combo.currentIndexChanged.connect(self.refresh_series)
+        self.refresh_btn = QPushButton("Refresh")
+        self.refresh_btn.clicked.connect(self.refresh)
+        self.import_btn = QPushButton("Import CSV")
+        self.import_btn.clicked.connect(self.import_file)
+        self.resume_btn = QPushButton("Resume Import")
+        self.resume_btn.clicked.connect(self.resume_import)
+        self.restart_check = QCheckBox("Start over")
+        self.restart_check.setToolTip("Delete the series already imported from the file and import it again")
+        self.timings_btn = QPushButton("Show Timings")
+        self.timings_btn.setCheckable(True)
+        self.timings_btn.toggled.connect(self.toggle_timings)
+        controls.addWidget(QLabel("Project:"))
+        controls.addWidget(self.project_combo)
+        controls.addWidget(self.refresh_btn)
+        controls.addWidget(self.import_btn)
+        controls.addWidget(self.resume_btn)
+        controls.addWidget(self.restart_check)
+        controls.addStretch()
+        controls.addWidget(self.timings_btn)
+        layout.addLayout(controls)
+
+        detection = QHBoxLayout()
+        self.window_spin = QSpinBox()
+        self.window_spin.setRange(2, 100000)
+        self.window_spin.setValue(DEFAULT_PARAMETERS['window'])
+        self.confidence_spin = QDoubleSpinBox()
+        self.confidence_spin.setRange(50.0, 99.9999)
+        self.confidence_spin.setDecimals(4)
+        self.confidence_spin.setSuffix(" %")
+        self.confidence_spin.setValue(100 * DEFAULT_PARAMETERS['confidence_level'])
+        self.threshold_spin = QDoubleSpinBox()
+        self.threshold_spin.setRange(0.0, 1e9)
+        self.threshold_spin.setDecimals(3)
+        self.threshold_spin.setSpecialValueText("off")  # 0 disables the threshold
+        self.detrending_combo = QComboBox()
+        self.detrending_combo.addItem("No detrending", None)
+        for method in DETRENDING_METHODS:
+            self.detrending_combo.addItem(method.replace('_', ' ').capitalize(), method)
+        self.detect_btn = QPushButton("Detect Anomalies")
+        self.detect_btn.clicked.connect(self.detect_anomalies)
+        for label, widget in (("Window (samples):", self.window_spin), ("Confidence:", self.confidence_spin),
+                              ("Threshold:", self.threshold_spin), ("Detrending:", self.detrending_combo)):
+            detection.addWidget(QLabel(label))
+            detection.addWidget(widget)
+        detection.addWidget(self.detect_btn)
+        detection.addStretch()
+        layout.addLayout(detection)
+
+        self.task_runner = TaskRunner()
+        self.task_runner.busyChanged.connect(self.on_busy_changed)
+        self.task_runner.profiled.connect(self.on_profiled)
+        layout.addWidget(self.task_runner)
+
+        main_splitter = QSplitter(Qt.Orientation.Horizontal)
+
+        series_group = QGroupBox("Series")
+        series_layout = QVBoxLayout(series_group)
+        self.series_table = self._create_table(
+            ["ID", "File", "Gauge", "Status", "Samples", "Rejected", "Imported", "Anomalies", "Date"], stretch=1
+        )
+        self.series_table.setSelectionMode(QTableWidget.SelectionMode.ExtendedSelection)
+        self.series_table.itemSelectionChanged.connect(self.on_series_selected)
+        series_layout.addWidget(self.series_table)
+        main_splitter.addWidget(series_group)
+
+        detail_splitter = QSplitter(Qt.Orientation.Vertical)
+        chart_group = QGroupBox("Plot")
+        chart_layout = QVBoxLayout(chart_group)
+        self.chart = SeriesChart()
+        chart_layout.addWidget(self.chart)
+        detail_splitter.addWidget(chart_group)
+
+        preview_group = QGroupBox(f"First {PREVIEW_ROWS} samples")
+        preview_layout = QVBoxLayout(preview_group)
+        self.preview_table = self._create_table(["Timestamp", "Value", "Processed", "Score", "Anomaly"], stretch=0)
+        preview_layout.addWidget(self.preview_table)
+        detail_splitter.addWidget(preview_group)
+        detail_splitter.setStretchFactor(0, 3)
+        detail_splitter.setStretchFactor(1, 1)
+        main_splitter.addWidget(detail_splitter)
+
+        self.timing_panel = TimingPanel()
+        self.timing_panel.setVisible(False)
+        main_splitter.addWidget(self.timing_panel)
+
+        layout.addWidget(main_splitter)
+        self.setLayout(layout)
+        self.set_busy(False)
+
+    def _create_table(self, headers, stretch: int) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(stretch, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @property
+    def db_ops(self) -> NetworkDatabaseOperations:
+        """Database operations; the session is opened on first use."""
+        if self._db_ops is None:
+            self.db = next(get_db())
+            self._db_ops = NetworkDatabaseOperations(self.db)
+            self.measurement_ops = MeasurementDatabaseOperations(self.db)
+        return self._db_ops
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.loaded_projects:
+            self.refresh()
+
+    def refresh(self):
+        """Reload the project list and the selected project's series."""
+        self.loaded_projects = True
+        selected = self.project_combo.currentData()
+        self.project_combo.blockSignals(True)
+        self.project_combo.clear()
+        for project in self.db_ops.get_projects():
+            self.project_combo.addItem(project.name, project.id)
+        self.project_combo.setCurrentIndex(max(self.project_combo.findData(selected), 0))
+        self.project_combo.blockSignals(False)
+        self.refresh_series()
+
+    def refresh_series(self):
+        selected_ids = {analysis.id for analysis in self.selected_analyses()}
+        project_id = self.project_combo.currentData()
+        if project_id is None:
+            self.analyses = []
+        else:
+            # End the session's read transaction so imports committed by the worker show up
+            self.db.rollback()
+            self.analyses = self.measurement_ops.get_project_analyses(project_id)
+        table = self.series_table
+        table.setRowCount(len(self.analyses))
+        for row, analysis in enumerate(self.analyses):
+            imported = ""
+            if analysis.file_size:
+                imported = f"{100 * min((analysis.resume_offset or 0) / analysis.file_size, 1):.0f}%"
+            values = [
+                str(analysis.id), Path(analysis.file_path or "").name, analysis.gauge_id or "",
+                analysis.status or "", f"{analysis.rows_ingested or 0:,}", f"{analysis.rows_rejected or 0:,}",
+                imported, "" if analysis.anomaly_count is None else f"{analysis.anomaly_count:,}",
+                f"{analysis.analysis_date:%Y-%m-%d %H:%M}" if analysis.analysis_date else ""
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 1:
+                    item.setToolTip(analysis.file_path or "")
+                table.setItem(row, column, item)
+
+        # Keep the selection (by series) across the reload
+        table.blockSignals(True)
+        table.clearSelection()
+        for row, analysis in enumerate(self.analyses):
+            if analysis.id in selected_ids:
+                table.selectionModel().select(
+                    table.model().index(row, 0),
+                    QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows
+                )
+        table.blockSignals(False)
+        self.on_series_selected()
+
+    def selected_analyses(self):
+        rows = sorted(index.row() for index in self.series_table.selectionModel().selectedRows())
+        return [self.analyses[row] for row in rows]
+
+    def selected_analysis(self):
+        selected = self.selected_analyses()
+        return selected[0] if len(selected) == 1 else None
+
+    def on_series_selected(self):
+        analysis = self.selected_analysis()
+        if analysis is not None and analysis.rolling_window:
+            self.show_parameters(DetectionParameters.from_analysis(analysis))
+        self.show_preview()
+
+    def show_parameters(self, parameters: DetectionParameters):
+        self.window_spin.setValue(parameters.window)
+        self.confidence_spin.setValue(100 * parameters.confidence_level)
+        self.threshold_spin.setValue(parameters.signal_threshold or 0.0)
+        self.detrending_combo.setCurrentIndex(max(self.detrending_combo.findData(parameters.detrending_method), 0))
+
+    def show_preview(self):
+        analysis = self.selected_analysis()
+        series = None
+        if analysis is not None and analysis.series_file is not None:
+            series = self.measurement_ops.open_series(analysis)
+        # Series imported before the store are copied to it by their next detection run
+        self.chart.set_series(series, "" if analysis is None or series is not None
+                              else "Run Detect Anomalies to move this series to the store and plot it.")
+
+        samples = []
+        rows = 0 if series is None else min(series.length, PREVIEW_ROWS)
+        if rows:
+            timestamps = np.char.replace(np.datetime_as_string(series.times(0, rows), unit='s'), 'T', ' ')
+            if analysis.status == STATUS_ANALYZED and series.has_results():
+                results = zip(series.read('processed_value', 0, rows), series.read('anomaly_score', 0, rows),
+                              series.read('is_anomaly', 0, rows))
+            else:
+                results = [(None, None, False)] * rows
+            samples = [(timestamp, value, *result) for timestamp, value, result
+                       in zip(timestamps.tolist(), series.read('value', 0, rows).tolist(), results)]
+        self.preview_table.setRowCount(len(samples))
+        for row, (timestamp, value, processed, score, is_anomaly) in enumerate(samples):
+            values = [
+                timestamp, f"{value:g}",
+                "" if processed is None else f"{processed:.4g}", "" if score is None else f"{score:.2f}",
+                "yes" if is_anomaly else ""
+            ]
+            for column, text in enumerate(values):
+                item = QTableWidgetItem(text)
+                if is_anomaly:
+                    item.setForeground(Qt.GlobalColor.red)
+                self.preview_table.setItem(row, column, item)
+        self.set_busy(self.task_runner.is_running())
+
+    def import_file(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Import Measurements", "", "CSV Files (*.csv *.txt);;All Files (*)"
+        )
+        if file_name:
+            self.start_import(file_name, restart=self.restart_check.isChecked())
+
+    def resume_import(self):
+        analysis = self.selected_analysis()
+        if analysis is None:
+            return
+        if not Path(analysis.file_path).exists():
+            QMessageBox.warning(self, "Warning", f"{analysis.file_path} no longer exists.")
+            return
+        self.start_import(analysis.file_path)
+
+    def start_import(self, path: str, restart: bool = False):
+        project_id = self.project_combo.currentData()
+        if project_id is None:
+            QMessageBox.warning(self, "Warning", "Create a project first (Network Upload tab).")
+            return
+        self.task_runner.cancelled_message = (
+            "Import stopped; the samples imported so far were kept. Resume to continue."
+        )
+        self.task_runner.start(
+            run_measurement_import, self.on_imported, "Error importing measurements",
+            project_id, path, restart=restart
+        )
+
+    def on_imported(self, result: dict):
+        self.restart_check.setChecked(False)
+        message = (f"{'Resumed' if result['resumed'] else 'Imported'} {Path(result['file_path']).name}: "
+                   f"{result['rows']:,} samples in {len(result['analyses'])} series")
+        if result['rejected']:
+            message += f"\n{result['rejected']:,} lines were rejected (bad timestamp, value or gauge)."
+        QMessageBox.information(self, "Success", message)
+
+    def detection_parameters(self) -> dict:
+        return {
+            'window': self.window_spin.value(),
+            'confidence_level': self.confidence_spin.value() / 100,
+            'signal_threshold': self.threshold_spin.value() or None,
+            'detrending_method': self.detrending_combo.currentData()
+        }
+
+    def detect_anomalies(self):
+        analyses = self.selected_analyses() or self.analyses
+        if not analyses:
+            return
+        self.task_runner.cancelled_message = (
+            "Detection stopped; series that were not finished have no results until it runs again."
+        )
+        self.task_runner.start(
+            run_anomaly_detection, self.on_detected, "Error detecting anomalies",
+            [analysis.id for analysis in analyses], self.detection_parameters()
+        )
+
+    def on_detected(self, result: dict):
+        share = result['anomalies'] / result['samples'] if result['samples'] else 0.0
+        QMessageBox.information(
+            self, "Success",
+            f"{result['anomalies']:,} anomalies ({share:.3%}) in {result['samples']:,} samples "
+            f"of {len(result['series'])} series"
+        )
+
+    def on_profiled(self, run):
+        self.timing_panel.show_run(run)
+
+    def toggle_timings(self, visible: bool):
+        self.timing_panel.setVisible(visible)
+        self.timings_btn.setText("Hide Timings" if visible else "Show Timings")
+
+    def on_busy_changed(self, busy: bool):
+        if not busy and self.loaded_projects:
+            # Show what a finished, failed or cancelled task committed
+            self.refresh_series()
+        else:
+            self.set_busy(busy)
+
+    def set_busy(self, busy: bool):
+        analysis = self.selected_analysis()
+        self.project_combo.setEnabled(not busy)
+        self.refresh_btn.setEnabled(not busy)
+        self.import_btn.setEnabled(not busy)
+        self.restart_check.setEnabled(not busy)
+        self.detect_btn.setEnabled(not busy and bool(self.analyses))
+        self.resume_btn.setEnabled(
+            not busy and analysis is not None and analysis.status in RESUMABLE_STATUSES
+        )
@@ -0,0 +1,259 @@
+# ui/tabs/mermaid_parser.py
+
+import hashlib
+import io
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Statements that carry no nodes or connections
+IGNORED_KEYWORDS = {'flowchart', 'graph', 'classDef', 'class', 'style', 'linkStyle',
+                    'click', 'direction'}
+# Statements _connect skips up to the next ';' when they start one mid-line;
+# subgraph boundaries on their own line are handled by _scan_lines
+SKIPPED_STATEMENTS = IGNORED_KEYWORDS | {'subgraph', 'end'}
+
+# One node reference, plus whatever joins it to the next one:
+#   ID, optional shape with label ([..], (..), {..}, [[..]], ((..)), ..), optional
+#   @{...} shape, :::class and "quoted" argument (click A call "tip"), then
+#   '&', ';' or a link (-->, --->, ---, ==>, -.->, --x, --o, <-->) with an
+#   optional |label| or "-- label -->" text
+TOKEN_RE = re.compile(r'''
+    \s*(\w+)
+    (
+        \[\[.*?\]\] | \[\(.*?\)\] | \(\[.*?\]\) | \(\(.*?\)\) | \{\{.*?\}\} | \[/.*?[/\\]\] |
+        \[(?:"[^"]*"|[^\]]*)\] | \((?:"[^"]*"|[^)]*)\) | \{(?:"[^"]*"|[^}]*)\} | >[^\]]*\]
+    )?
+    (?:\s*@\{[^}]*\})?
+    (?::::\w+)?
+    (?:\s*"[^"]*")?
+    \s*
+    (?:
+        (&) | (;) |
+        (?:(?:--|==|-\.)\s+([^|>]*?)\s+)?
+        (<?(?:-{2,}>|-{3,}|={2,}>|={3,}|-\.+->|-\.+-|-{2,}[ox]|={2,}[ox]))
+        \s*(?:\|([^|]*)\|)?
+    )?
+''', re.VERBOSE)
+DOUBLE_DELIMITERS = ('[[', '[(', '([', '((', '{{', '[/')
+SUBGRAPH_RE = re.compile(r'subgraph\s+(?P<id>[^\[\s]+)?\s*(?:\[(?P<title>[^\]]*)\])?')
+
+
+class NodeToken(NamedTuple):
+    """A node reference; label is None when the reference has no label."""
+    node_id: str
+    label: Optional[str]
+    line: int
+    subgraph: Optional[str]
+
+
+class EdgeToken(NamedTuple):
+    """One source -> target connection, expanded from '&' groups and chains."""
+    source: str
+    target: str
+    label: Optional[str]
+    line: int
+    subgraph: Optional[str]
+
+
+class SubgraphToken(NamedTuple):
+    """Start of a subgraph block."""
+    subgraph_id: str
+    title: str
+    line: int
+
+
+class SubgraphEndToken(NamedTuple):
+    """End of the innermost open subgraph block."""
+    subgraph_id: Optional[str]
+    line: int
+
+
+Token = Union[NodeToken, EdgeToken, SubgraphToken, SubgraphEndToken]
+
+
+def _clean_label(label: Optional[str]) -> Optional[str]:
+    if label is None:
+        return None
+    label = label.strip()
+    if label[:1] == '"' and label[-1:] == '"' and len(label) >= 2:
+        label = label[1:-1]
+    return label
+
+
+def _shape_label(shape: str) -> str:
+    """Strip the shape delimiters (and quotes) around a node label."""
+    width = 2 if shape[:2] in DOUBLE_DELIMITERS else 1
+    return _clean_label(shape[width:-width])
+
+
+def _connect(matches):
+    """
+    Walk the TOKEN_RE matches of one line, yielding ('node', node_id, label)
+    and ('edge', source, target, label) items with '&' groups and chains
+    fully expanded: A --> B & C --> D gives A->B, A->C, B->D and C->D.
+    Statements opened by a SKIPPED_STATEMENTS keyword (click A callback,
+    style A fill:#f9f, ...) are dropped whole, so their words never become nodes.
+    """
+    group = []
+    previous_group = []
+    previous_label = None
+    statement_start = True
+    skipping = False
+
+    for node_id, shape, amp, semi, text, arrow, label in matches:
+        if statement_start and node_id in SKIPPED_STATEMENTS:
+            skipping = True
+        statement_start = bool(semi)
+        if skipping:
+            skipping = not semi
+            continue
+
+        yield 'node', node_id, _shape_label(shape) if shape else None
+        group.append(node_id)
+        if amp:
+            continue
+
+        # The group is complete; connect it to the group before the last link
+        for source in previous_group:
+            for target in group:
+                yield 'edge', source, target, previous_label
+        if arrow:
+            previous_group = group
+            previous_label = _clean_label(label or text) or None
+        else:
+            previous_group = []
+        group = []
+
+
+def tokenize_line(text: str, line_no: int = 1, subgraph: Optional[str] = None) -> List[Token]:
+    """Tokenize one line (one or more ';'-separated statements) into node and edge tokens."""
+    return [
+        NodeToken(item[1], item[2], line_no, subgraph) if item[0] == 'node'
+        else EdgeToken(item[1], item[2], item[3], line_no, subgraph)
+        for item in _connect(TOKEN_RE.findall(text))
+    ]
+
+
+def _scan_lines(source: Union[str, Iterable[str]]):
+    """
+    Read the input once, line by line, yielding (line_no, subgraph, matches)
+    for statement lines and (line_no, event, None) for subgraph boundaries,
+    where event is a SubgraphToken or SubgraphEndToken.
+    """
+    lines = io.StringIO(source) if isinstance(source, str) else source
+    subgraphs: List[str] = []
+
+    for line_no, raw_line in enumerate(lines, 1):
+        text = raw_line.strip()
+        if not text or text.startswith('%%'):
+            continue
+        keyword = text.split(None, 1)[0]
+        if keyword in IGNORED_KEYWORDS:
+            continue
+
+        if keyword == 'subgraph':
+            match = SUBGRAPH_RE.match(text)
+            subgraph_id = (match.group('id') or '').strip() or f"subgraph_{line_no}"
+            title = match.group('title')
+            yield line_no, SubgraphToken(subgraph_id, title.strip('" ') if title else subgraph_id, line_no), None
+            subgraphs.append(subgraph_id)
+            continue
+        if text == 'end':
+            yield line_no, SubgraphEndToken(subgraphs.pop() if subgraphs else None, line_no), None
+            continue
+
+        yield line_no, subgraphs[-1] if subgraphs else None, TOKEN_RE.findall(text)
+
+
+def tokenize_mermaid(source: Union[str, Iterable[str]]) -> Iterator[Token]:
+    """
+    Stream tokens from Mermaid flowchart text, a file handle or any iterable
+    of lines. The input is read once, line by line, and node definitions,
+    fully expanded edges and subgraph boundaries are yielded with their
+    1-based line numbers.
+    """
+    for line_no, subgraph, matches in _scan_lines(source):
+        if matches is None:
+            yield subgraph
+            continue
+        for item in _connect(matches):
+            if item[0] == 'node':
+                yield NodeToken(item[1], item[2], line_no, subgraph)
+            else:
+                yield EdgeToken(item[1], item[2], item[3], line_no, subgraph)
+
+
+class MermaidNetwork:
+    """
+    Everything needed from one Mermaid file, collected in a single pass:
+    node labels, all referenced nodes, expanded edges and subgraphs.
+    """
+    def __init__(self):
+        self.node_labels: Dict[str, str] = {}
+        self.nodes: Dict[str, int] = {}  # node ID -> line of first reference
+        self.edges: List[Tuple[str, str]] = []
+        self.edge_labels: Dict[Tuple[str, str], str] = {}
+        self.subgraphs: Dict[str, Dict] = {}
+
+    @property
+    def has_components(self) -> bool:
+        return bool(self.node_labels)
+
+    @property
+    def has_connections(self) -> bool:
+        return bool(self.edges)
+
+    def fingerprint(self) -> str:
+        """
+        SHA-256 of the canonical node and edge set: sorted labels, nodes and
+        unique edges. Formatting, ordering, comments and repeated edges do
+        not change it.
+        """
+        canonical = json.dumps({
+            'labels': sorted(self.node_labels.items()),
+            'nodes': sorted(self.nodes),
+            'edges': sorted(set(self.edges))
+        }, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def parse_mermaid(source: Union[str, Iterable[str]]) -> MermaidNetwork:
+    """
+    Parse Mermaid text, a file handle or lines into a MermaidNetwork in one pass.
+    Works on the same line scan as tokenize_mermaid but skips building token
+    objects, which keeps multi-million-line exports fast.
+    """
+    network = MermaidNetwork()
+    node_labels = network.node_labels
+    nodes = network.nodes
+    edges = network.edges
+    edge_labels = network.edge_labels
+    subgraphs = network.subgraphs
+
+    for line_no, subgraph, matches in _scan_lines(source):
+        if matches is None:
+            if type(subgraph) is SubgraphToken:
+                subgraphs.setdefault(subgraph.subgraph_id, {
+                    'title': subgraph.title,
+                    'line': line_no,
+                    'nodes': {}  # node ID -> line of first reference inside the subgraph
+                })
+            continue
+
+        for item in _connect(matches):
+            if item[0] == 'node':
+                _, node_id, label = item
+                if node_id not in nodes:
+                    nodes[node_id] = line_no
+                if label:
+                    node_labels[node_id] = label
+                if subgraph:
+                    subgraphs[subgraph]['nodes'].setdefault(node_id, line_no)
+            else:
+                _, source_id, target_id, label = item
+                edges.append((source_id, target_id))
+                if label:
+                    edge_labels[(source_id, target_id)] = label
+
+    return network
@@ -0,0 +1,269 @@
+# ui/tabs/network_analysis.py
+
+import re
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from utils.profiling import span
+from .analysis_cache import analysis_cache
+from .mermaid_parser import MermaidNetwork, parse_mermaid
+from .network_graph import NetworkGraph
+from .path_extractor import PathExtractor
+
+# Component and path analysis without any Qt objects, so it can run on a
+# worker thread (see network_worker.py). Each step takes a `progress(percent,
+# message)` callback and a `should_stop()` poll for cooperative cancellation.
+
+
+# Component ID prefix -> component type name
+COMPONENT_TYPES = {
+    'DP': 'Distribution Point',
+    'MC': 'Canal',
+    'ZT': 'Gate',
+    'SW': 'Smart Water',
+    'F': 'Field'
+}
+
+
+class AnalysisCancelled(Exception):
+    """Raised when an analysis step is cancelled before it saved anything."""
+    pass
+
+
+def _report(progress: Optional[Callable], percent: int, message: str):
+    if progress:
+        progress(percent, message)
+
+
+def _check_cancelled(should_stop: Optional[Callable]):
+    if should_stop and should_stop():
+        raise AnalysisCancelled()
+
+
+def find_affected_end_points(db_ops, graph: NetworkGraph, previous_network) -> Tuple[Optional[Dict], Optional[Set[str]]]:
+    """
+    Diff the compiled graph against a previously analyzed network.
+    Returns the previous path data and the end points that lie downstream
+    of added or removed edges; only those need to be re-analyzed.
+    """
+    if previous_network is None:
+        return None, None
+
+    previous_data = db_ops.get_network_path_data(previous_network)
+    if not previous_data:
+        return None, None
+
+    previous_edges = {
+        tuple(connection.split('--->'))
+        for connection in db_ops.get_network_connections(previous_network)
+    }
+    changed_edges = previous_edges ^ set(graph.edges())
+
+    # Every path through a changed edge ends downstream of its target
+    changed_targets = [graph.index[target] for _, target in changed_edges
+                       if target in graph]
+    affected = {
+        graph.node_ids[node]
+        for node in graph.downstream(changed_targets).tolist()
+        if not graph.out_degree[node]
+    }
+    return previous_data, affected
+
+
+def extract_components(parsed: MermaidNetwork, component_types: Dict[str, str]) -> Tuple[Dict, Dict[str, str]]:
+    """
+    Group the labeled nodes of a parsed network by component type prefix.
+    Returns (components_data, node_labels) for the known component types.
+    """
+    components_data = {}
+    node_labels = {}
+    for component_id, component_label in parsed.node_labels.items():
+        component_type = re.match(r'[A-Za-z]+', component_id).group()
+
+        if component_type in component_types:
+            if component_type not in components_data:
+                components_data[component_type] = {}
+
+            components_data[component_type][component_id] = {
+                'label': component_label,
+                'properties': {}
+            }
+            node_labels[component_id] = component_label
+    return components_data, node_labels
+
+
+def connection_strings(graph: NetworkGraph):
+    """The graph's edges in the stored 'A--->B' form."""
+    return [f"{source}--->{target}" for source, target in graph.edges()]
+
+
+def run_component_analysis(db_ops, project_id: int, content: str, component_types: Dict[str, str],
+                           parsed: Optional[MermaidNetwork] = None,
+                           progress: Optional[Callable] = None,
+                           should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Extract the components, compile the connection graph and save the
+    network structure. When the project's latest network has the same
+    fingerprint it is reused instead of saving a copy (result 'cached').
+    Cancellation is honoured up to the database write.
+    """
+    if parsed is None:
+        _report(progress, 0, "Parsing Mermaid file")
+        with span("parse_mermaid", bytes=len(content)) as timing:
+            parsed = parse_mermaid(content)
+            timing.set(nodes=len(parsed.nodes), edges=len(parsed.edges))
+    with span("fingerprint"):
+        content_hash = parsed.fingerprint()
+    _check_cancelled(should_stop)
+
+    # Extract components and build data structure
+    _report(progress, 20, "Extracting components")
+    with span("extract_components") as timing:
+        components_data, node_labels = extract_components(parsed, component_types)
+        timing.set(components=len(node_labels))
+    _check_cancelled(should_stop)
+
+    # Compile the connections once; path analysis and the tree reuse this graph
+    _report(progress, 40, "Compiling connections")
+    with span("build_graph") as timing:
+        graph = NetworkGraph.from_edges(parsed.edges)
+        connections_list = connection_strings(graph)
+        timing.set(nodes=graph.num_nodes, edges=graph.num_edges)
+    _check_cancelled(should_stop)
+
+    result = {
+        'components_data': components_data,
+        'node_labels': node_labels,
+        'graph': graph,
+        'content_hash': content_hash,
+        'previous_path_data': None,
+        'affected_end_points': None,
+        'cached': False
+    }
+
+    # Same network as the latest upload: nothing to compare or save
+    latest_network = db_ops.get_latest_network(project_id)
+    if latest_network is not None and latest_network.content_hash == content_hash:
+        _report(progress, 100, "Network unchanged since the last upload")
+        result.update(network_id=latest_network.id, cached=True)
+        return result
+
+    # Compare with the latest upload so unchanged end points can reuse its paths
+    _report(progress, 60, "Comparing with the previous upload")
+    with span("compare_previous_upload") as timing:
+        previous_path_data, affected_end_points = find_affected_end_points(
+            db_ops, graph, latest_network
+        )
+        if affected_end_points is not None:
+            timing.set(affected_end_points=len(affected_end_points))
+    _check_cancelled(should_stop)
+
+    # Save to database
+    _report(progress, 80, "Saving network structure")
+    network = db_ops.save_network_structure(
+        project_id=project_id,
+        mermaid_content=content,
+        components_data=components_data,
+        connections=connections_list,
+        content_hash=content_hash
+    )
+    _report(progress, 100, "Network structure saved")
+
+    result.update(
+        network_id=network.id,
+        previous_path_data=previous_path_data,
+        affected_end_points=affected_end_points
+    )
+    return result
+
+
+def run_path_analysis(db_ops, network_id: int, graph: NetworkGraph,
+                      previous_path_data: Optional[Dict] = None,
+                      affected_end_points: Optional[Set[str]] = None,
+                      content_hash: Optional[str] = None,
+                      progress: Optional[Callable] = None,
+                      should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Count and list the paths from the network's roots to its leaves and save
+    the results. With a content_hash, results cached for the same network
+    are returned without re-analysis (result 'cached') unless their listing
+    was cut short by a smaller path budget, and new results are added to the
+    cache. Cancellation is honoured up to the database write.
+    """
+    def listing_progress(done, total):
+        _report(progress, 20 + 60 * done // max(total, 1),
+                f"Listing paths ({done}/{total} end points)")
+
+    path_extractor = PathExtractor(graph=graph, should_stop=should_stop,
+                                   progress=listing_progress)
+
+    # Find start and end points
+    start_points = graph.root_ids()
+    end_points = graph.leaf_ids()
+    result = {
+        'path_extractor': path_extractor,
+        'start_points': start_points,
+        'end_points': end_points,
+        'cached': False
+    }
+
+    with span("analysis_cache_lookup") as timing:
+        cached = analysis_cache.get(db_ops, content_hash, max_paths=path_extractor.max_paths,
+                                    time_budget=path_extractor.time_budget) if content_hash else None
+        timing.set(hit=cached is not None)
+    if cached is not None:
+        _report(progress, 50, "Loading cached path analysis")
+        path_extractor.should_stop = None
+        path_extractor.progress = None
+        path_extractor.start_points = start_points
+        path_extractor.load_path_data(cached['path_data'], cached['path_counts'])
+
+        # A copy of the network in another project still needs its own results
+        network = db_ops.get_network(network_id)
+        if network is not None and network.analysis_date is None:
+            db_ops.update_network_analysis(
+                network_id=network_id,
+                paths_data=cached['path_data'],
+                diagnostics=path_extractor.diagnostics
+            )
+        _report(progress, 100, "Path analysis loaded from cache")
+
+        result.update(path_counts=path_extractor.path_counts, cached=True)
+        return result
+
+    # Count paths first (cheap), then list them within the path budget
+    _report(progress, 0, "Counting paths")
+    path_counts = path_extractor.count_paths(start_points, end_points)
+    if path_extractor.cancelled:
+        raise AnalysisCancelled()
+
+    path_extractor.find_all_paths(
+        start_points,
+        end_points,
+        previous_data=previous_path_data,
+        affected=affected_end_points
+    )
+    if path_extractor.cancelled:
+        raise AnalysisCancelled()
+    path_data = path_extractor.get_path_data()
+
+    # Save analysis results
+    _report(progress, 80, "Saving path analysis")
+    db_ops.update_network_analysis(
+        network_id=network_id,
+        paths_data=path_data,
+        diagnostics=path_extractor.diagnostics
+    )
+    if content_hash:
+        analysis_cache.put(db_ops, content_hash, {
+            'path_data': path_data,
+            'path_counts': path_counts
+        }, max_paths=path_extractor.max_paths, time_budget=path_extractor.time_budget,
+           truncated=path_extractor.truncated)
+    _report(progress, 100, "Path analysis saved")
+
+    # The extractor keeps serving path pages on the GUI thread
+    path_extractor.should_stop = None
+    path_extractor.progress = None
+
+    result['path_counts'] = path_counts
+    return result
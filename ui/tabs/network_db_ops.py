@@ -1,8 +1,9 @@
 # ui/tabs/network_db_ops.py
 
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select, true, update
 from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
-import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from itertools import islice
 from datetime import datetime
 import sys
 from pathlib import Path
@@ -10,7 +11,12 @@ from pathlib import Path
 # Add parent directory to Python path
 sys.path.append(str(Path(__file__).parents[2]))
 
-from utils.db import Project, NetworkStructure, NetworkComponent
+from utils.profiling import annotate, span, timed
+from utils.db import (Project, NetworkStructure, NetworkComponent, NetworkPath, NetworkPathNode,
+                      AnalysisCacheEntry)
+
+# Rows per executemany batch in bulk inserts
+INSERT_CHUNK_SIZE = 5000
 
 class NetworkDatabaseOperations:
     def __init__(self, session: Session):
@@ -23,37 +29,70 @@ class NetworkDatabaseOperations:
         self.session.commit()
         return project
 
+    @timed("save_network_structure")
     def save_network_structure(
         self, 
         project_id: int, 
         mermaid_content: str,
         components_data: Dict,
-        connections: List[str]
+        connections: List[str],
+        content_hash: Optional[str] = None
     ) -> NetworkStructure:
-        """Save the network structure and its components to the database."""
+        """
+        Save the network structure and its components to the database in one
+        transaction. Components are bulk inserted in chunks of plain rows, so
+        no ORM objects are created for them.
+        """
         network = NetworkStructure(
             project_id=project_id,
             mermaid_content=mermaid_content,
-            components_json=json.dumps(components_data),
-            connections_json=json.dumps(connections)
+            components_json=components_data,
+            connections_json=connections,
+            content_hash=content_hash
         )
-        self.session.add(network)
-        self.session.commit()
-        
-        # Add individual components
+        try:
+            self.session.add(network)
+            self.session.flush()  # assigns network.id without committing
+            
+            # Add individual components
+            self._insert_chunked(NetworkComponent, self._component_rows(network.id, components_data))
+            
+            with span("commit"):
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return network
+
+    def _insert_chunked(self, model, rows: Iterable[Dict]):
+        """Insert plain row dicts with Core executemany, INSERT_CHUNK_SIZE rows at a time."""
+        with span(f"insert {model.__tablename__}") as timing:
+            rows = iter(rows)
+            count = 0
+            while True:
+                chunk = list(islice(rows, INSERT_CHUNK_SIZE))
+                if not chunk:
+                    break
+                self.session.execute(insert(model.__table__), chunk)
+                count += len(chunk)
+            timing.set(rows=count)
+
+    @staticmethod
+    def _component_rows(network_id: int, components_data: Dict) -> Iterator[Dict]:
+        """Yield one network_components row per component."""
         for comp_type, components in components_data.items():
             for comp_id, details in components.items():
-                component = NetworkComponent(
-                    network_id=network.id,
-                    component_id=comp_id,
-                    component_type=comp_type,
-                    label=details.get('label', ''),
-                    properties=json.dumps(details.get('properties', {}))
-                )
-                self.session.add(component)
-        
-        self.session.commit()
-        return network
+                yield {
+                    'network_id': network_id,
+                    'component_id': comp_id,
+                    'component_type': comp_type,
+                    'label': details.get('label', ''),
+                    'properties': details.get('properties', {})
+                }
+
+    def get_projects(self) -> List[Project]:
+        """Get all projects, newest first."""
+        return self.session.query(Project).order_by(Project.created_at.desc()).all()
 
     def get_project_networks(self, project_id: int) -> List[NetworkStructure]:
         """Get all network structures for a project."""
@@ -61,29 +100,267 @@ class NetworkDatabaseOperations:
             NetworkStructure.project_id == project_id
         ).all()
 
+    def get_network(self, network_id: int) -> Optional[NetworkStructure]:
+        """Get a network structure by id."""
+        return self.session.get(NetworkStructure, network_id)
+
+    @timed("get_component_rows")
+    def get_component_rows(self, network_id: int) -> List[Tuple]:
+        """
+        Get (component_id, component_type, label, properties) for every
+        component of a network, as plain rows without ORM objects.
+        """
+        rows = self.session.execute(
+            select(NetworkComponent.component_id, NetworkComponent.component_type,
+                   NetworkComponent.label, NetworkComponent.properties)
+            .where(NetworkComponent.network_id == network_id)
+        ).all()
+        annotate(rows=len(rows))
+        return rows
+
+    @timed("update_component_properties")
+    def update_component_properties(self, network_id: int, updates: Dict[str, Dict]) -> int:
+        """
+        Merge property values (e.g. {'capacity': 120.0}) into the properties
+        of a network's components, keyed by component ID; a None value removes
+        the key. Written with chunked executemany in one transaction. Returns
+        the number of components updated.
+        """
+        table = NetworkComponent.__table__
+        current = self.session.execute(
+            select(NetworkComponent.id, NetworkComponent.component_id, NetworkComponent.properties)
+            .where(NetworkComponent.network_id == network_id)
+        ).all()
+        
+        rows = []
+        for row_id, component_id, properties in current:
+            changes = updates.get(component_id)
+            if not changes:
+                continue
+            merged = dict(properties or {})
+            for key, value in changes.items():
+                if value is None:
+                    merged.pop(key, None)
+                else:
+                    merged[key] = value
+            rows.append({'row_id': row_id, 'new_properties': merged})
+        
+        statement = update(table).where(table.c.id == bindparam('row_id')).values(
+            properties=bindparam('new_properties')
+        )
+        try:
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                self.session.execute(statement, rows[start:start + INSERT_CHUNK_SIZE])
+            with span("commit"):
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        annotate(rows=len(rows))
+        return len(rows)
+
     def get_network_components(self, network_id: int) -> List[NetworkComponent]:
         """Get all components for a network structure."""
         return self.session.query(NetworkComponent).filter(
             NetworkComponent.network_id == network_id
         ).all()
 
+    @timed("update_network_analysis")
     def update_network_analysis(
         self,
         network_id: int,
         paths_data: Dict,
         diagnostics: List[str]
     ) -> NetworkStructure:
-        """Update network with analysis results."""
+        """
+        Update network with analysis results. Besides the paths_json blob,
+        every listed path and its nodes are written to the indexed
+        network_paths and network_path_nodes tables, replacing any rows from
+        an earlier analysis, in the same transaction.
+        """
         network = self.session.query(NetworkStructure).get(network_id)
         if network:
-            network.paths_json = json.dumps(paths_data)
-            network.diagnostics_json = json.dumps(diagnostics)
-            network.analysis_date = datetime.utcnow()
-            self.session.commit()
+            try:
+                network.paths_json = paths_data
+                network.diagnostics_json = diagnostics
+                network.analysis_date = datetime.utcnow()
+                
+                for model in (NetworkPathNode, NetworkPath):
+                    self.session.execute(
+                        delete(model.__table__).where(model.network_id == network_id)
+                    )
+                path_rows, node_rows = self._path_rows(network_id, paths_data.get("paths", {}))
+                self._insert_chunked(NetworkPath, path_rows)
+                self._insert_chunked(NetworkPathNode, node_rows)
+                
+                with span("commit"):
+                    self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
         return network
 
+    @staticmethod
+    def _path_rows(network_id: int, paths: Dict):
+        """Build the network_paths and network_path_nodes rows for a paths dict."""
+        path_rows = []
+        node_rows = []
+        for end_point, path_infos in sorted(paths.items()):
+            for info in path_infos:
+                path = info["path"]
+                path_index = len(path_rows)
+                path_rows.append({
+                    'network_id': network_id,
+                    'path_index': path_index,
+                    'start_point': path[0],
+                    'end_point': end_point,
+                    'length': info.get("length", len(path) - 1),
+                    'path_type': info.get("type")
+                })
+                node_rows.extend(
+                    {
+                        'network_id': network_id,
+                        'path_index': path_index,
+                        'position': position,
+                        'node_id': node_id
+                    }
+                    for position, node_id in enumerate(path)
+                )
+        return path_rows, node_rows
+
+    def get_paths_through(self, network_id: int, node_id: str) -> List[List[str]]:
+        """Get every listed path of a network that passes through a node."""
+        path_indexes = select(NetworkPathNode.path_index).where(
+            NetworkPathNode.network_id == network_id,
+            NetworkPathNode.node_id == node_id
+        )
+        rows = self.session.execute(
+            select(NetworkPathNode.path_index, NetworkPathNode.node_id).where(
+                NetworkPathNode.network_id == network_id,
+                NetworkPathNode.path_index.in_(path_indexes)
+            ).order_by(NetworkPathNode.path_index, NetworkPathNode.position)
+        )
+        
+        paths = {}
+        for path_index, path_node in rows:
+            paths.setdefault(path_index, []).append(path_node)
+        return list(paths.values())
+
+    def get_end_points_through(self, network_id: int, node_id: str) -> List[str]:
+        """Get the end points (e.g. fields) with at least one listed path through a node."""
+        return list(self.session.scalars(
+            select(NetworkPath.end_point).distinct().join(
+                NetworkPathNode,
+                (NetworkPathNode.network_id == NetworkPath.network_id)
+                & (NetworkPathNode.path_index == NetworkPath.path_index)
+            ).where(
+                NetworkPathNode.network_id == network_id,
+                NetworkPathNode.node_id == node_id
+            ).order_by(NetworkPath.end_point)
+        ))
+
+    def get_end_points_cut_off(self, network_id: int, node_id: str) -> List[str]:
+        """
+        Get the end points that lose water when a node (e.g. gate ZT3) closes:
+        those whose every listed path passes through it. Only exact when the
+        path listing was not truncated.
+        """
+        through = dict(self.session.execute(
+            select(NetworkPath.end_point, func.count()).join(
+                NetworkPathNode,
+                (NetworkPathNode.network_id == NetworkPath.network_id)
+                & (NetworkPathNode.path_index == NetworkPath.path_index)
+            ).where(
+                NetworkPathNode.network_id == network_id,
+                NetworkPathNode.node_id == node_id
+            ).group_by(NetworkPath.end_point)
+        ).all())
+        if not through:
+            return []
+            
+        totals = self.session.execute(
+            select(NetworkPath.end_point, func.count()).where(
+                NetworkPath.network_id == network_id,
+                NetworkPath.end_point.in_(list(through))
+            ).group_by(NetworkPath.end_point)
+        )
+        return sorted(end_point for end_point, total in totals if through[end_point] == total)
+
     def get_latest_network(self, project_id: int) -> Optional[NetworkStructure]:
         """Get the most recently created network structure for a project."""
         return self.session.query(NetworkStructure).filter(
             NetworkStructure.project_id == project_id
-        ).order_by(NetworkStructure.upload_date.desc()).first()
\ No newline at end of file
+        ).order_by(NetworkStructure.upload_date.desc()).first()
+
+    def get_network_connections(self, network: NetworkStructure) -> List[str]:
+        """Get the stored connection list ('A--->B' strings) of a network structure."""
+        return network.connections_json or []
+
+    def get_network_path_data(self, network: NetworkStructure) -> Optional[Dict]:
+        """Get the stored path analysis results of a network structure, if any."""
+        return network.paths_json
+
+    @staticmethod
+    def _within_budget(max_paths: Optional[int], time_budget: Optional[float]):
+        """
+        Condition on cache entries that serve a path listing budget: complete
+        results, or results cut short under at least that budget. Without a
+        budget every entry qualifies.
+        """
+        if max_paths is None or time_budget is None:
+            return true()
+        return or_(
+            AnalysisCacheEntry.truncated.is_(False),
+            and_(AnalysisCacheEntry.max_paths >= max_paths,
+                 AnalysisCacheEntry.time_budget >= time_budget)
+        )
+
+    @timed("get_cached_analysis")
+    def get_cached_analysis(self, content_hash: str, kind: str = 'paths',
+                            max_paths: Optional[int] = None,
+                            time_budget: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get a cached analysis result for a network fingerprint, if any; with a
+        path listing budget, only a result that serves it.
+        """
+        entry = self.session.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.content_hash == content_hash,
+            AnalysisCacheEntry.kind == kind,
+            self._within_budget(max_paths, time_budget)
+        ).first()
+        annotate(hit=entry is not None)
+        return entry.result if entry else None
+
+    def get_cached_hashes(self, kind: str = 'paths', max_paths: Optional[int] = None,
+                          time_budget: Optional[float] = None) -> List[str]:
+        """Get the network fingerprints with a cached analysis result (serving the budget, if given)."""
+        return list(self.session.scalars(
+            select(AnalysisCacheEntry.content_hash).where(
+                AnalysisCacheEntry.kind == kind,
+                self._within_budget(max_paths, time_budget)
+            )
+        ))
+
+    @timed("save_cached_analysis")
+    def save_cached_analysis(self, content_hash: str, result: Dict, kind: str = 'paths',
+                             max_paths: Optional[int] = None, time_budget: Optional[float] = None,
+                             truncated: bool = False):
+        """
+        Store (or replace) the cached analysis result for a network fingerprint,
+        with the path listing budget it was produced under and whether it was
+        cut short by it.
+        """
+        entry = self.session.query(AnalysisCacheEntry).filter(
+            AnalysisCacheEntry.content_hash == content_hash,
+            AnalysisCacheEntry.kind == kind
+        ).first()
+        if entry is None:
+            entry = AnalysisCacheEntry(content_hash=content_hash, kind=kind)
+            self.session.add(entry)
+        entry.result = result
+        entry.truncated = truncated
+        entry.max_paths = max_paths
+        entry.time_budget = time_budget
+        entry.created_at = datetime.utcnow()
+        with span("commit"):
+            self.session.commit()
@@ -0,0 +1,408 @@
+# ui/tabs/network_graph.py
+
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+
+
+def csr_gather(offsets: np.ndarray, values: np.ndarray, nodes: np.ndarray):
+    """
+    Gather the CSR rows of several nodes at once.
+    Returns (owners, neighbors): for every edge leaving one of `nodes`,
+    the node it belongs to and the node at its other end.
+    """
+    nodes = np.asarray(nodes, dtype=np.int64)
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    owners = np.repeat(nodes, counts)
+    # Position of every edge inside its row, added to the row start
+    row_starts = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    neighbors = values[row_starts + np.arange(total)]
+    return owners, neighbors.astype(np.int64)
+
+
+class NetworkGraph:
+    """
+    Compiled, integer-indexed network graph.
+
+    Node IDs are interned once into consecutive integers. Forward and
+    reverse edges are stored CSR-style (offsets + neighbor arrays), and
+    degree, root and leaf arrays are computed once on construction, so
+    every consumer of an upload can share a single instance.
+    """
+    def __init__(self, node_ids: List[str], sources: np.ndarray, targets: np.ndarray):
+        self.node_ids = node_ids
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        n = len(node_ids)
+
+        # Deduplicate edges; np.unique also sorts them by source
+        keys = np.unique(sources.astype(np.int64) * max(n, 1) + targets.astype(np.int64))
+        sources = keys // max(n, 1)
+        targets = keys % max(n, 1)
+
+        # Forward edges (CSR)
+        self.out_degree = np.bincount(sources, minlength=n).astype(np.int64)
+        self.out_offsets = np.concatenate(([0], np.cumsum(self.out_degree))).astype(np.int64)
+        self.out_targets = targets.astype(np.int32)
+
+        # Reverse edges (CSR)
+        order = np.argsort(targets, kind='stable')
+        self.in_degree = np.bincount(targets, minlength=n).astype(np.int64)
+        self.in_offsets = np.concatenate(([0], np.cumsum(self.in_degree))).astype(np.int64)
+        self.in_sources = sources[order].astype(np.int32)
+
+        # Nodes without incoming / outgoing connections
+        self.roots = np.flatnonzero(self.in_degree == 0)
+        self.leaves = np.flatnonzero(self.out_degree == 0)
+
+        self._successor_lists = None
+        self._predecessor_lists = None
+        self._levels = None
+        self._components = None
+        self._condensation = None
+        self._component_exits = {}
+        self._component_routes = {}
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str]], nodes: Iterable[str] = ()) -> 'NetworkGraph':
+        """Build a graph from (source, target) ID pairs, plus optional isolated nodes."""
+        index: Dict[str, int] = {}
+        node_ids: List[str] = []
+
+        def intern(node_id):
+            i = index.get(node_id)
+            if i is None:
+                i = index[node_id] = len(node_ids)
+                node_ids.append(node_id)
+            return i
+
+        sources = []
+        targets = []
+        for source, target in edges:
+            sources.append(intern(source))
+            targets.append(intern(target))
+        for node_id in nodes:
+            intern(node_id)
+
+        return cls(
+            node_ids,
+            np.array(sources, dtype=np.int64),
+            np.array(targets, dtype=np.int64)
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.out_targets)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.index
+
+    def successors(self, i: int) -> np.ndarray:
+        """Indices of the nodes node i connects to."""
+        return self.out_targets[self.out_offsets[i]:self.out_offsets[i + 1]]
+
+    def predecessors(self, i: int) -> np.ndarray:
+        """Indices of the nodes connecting to node i."""
+        return self.in_sources[self.in_offsets[i]:self.in_offsets[i + 1]]
+
+    def successor_lists(self) -> List[List[int]]:
+        """Per-node successor lists, for algorithms that loop in Python."""
+        if self._successor_lists is None:
+            self._successor_lists = self._split_rows(self.out_offsets, self.out_targets)
+        return self._successor_lists
+
+    def predecessor_lists(self) -> List[List[int]]:
+        """Per-node predecessor lists, for algorithms that loop in Python."""
+        if self._predecessor_lists is None:
+            self._predecessor_lists = self._split_rows(self.in_offsets, self.in_sources)
+        return self._predecessor_lists
+
+    @staticmethod
+    def _split_rows(offsets: np.ndarray, values: np.ndarray) -> List[List[int]]:
+        flat = values.tolist()
+        bounds = offsets.tolist()
+        return [flat[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+    def ids(self, indices: Iterable[int]) -> List[str]:
+        """Translate node indices back to node IDs."""
+        node_ids = self.node_ids
+        return [node_ids[i] for i in indices]
+
+    def root_ids(self) -> List[str]:
+        """Sorted IDs of nodes without incoming connections."""
+        return sorted(self.ids(self.roots.tolist()))
+
+    def leaf_ids(self) -> List[str]:
+        """Sorted IDs of nodes without outgoing connections."""
+        return sorted(self.ids(self.leaves.tolist()))
+
+    def edges(self):
+        """Iterate over all (source, target) ID pairs."""
+        node_ids = self.node_ids
+        sources = np.repeat(np.arange(self.num_nodes), self.out_degree).tolist()
+        for source, target in zip(sources, self.out_targets.tolist()):
+            yield node_ids[source], node_ids[target]
+
+    def downstream(self, nodes: Iterable[int]) -> np.ndarray:
+        """Indices of the given nodes and of every node reachable from them."""
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        frontier = np.unique(np.asarray(list(nodes), dtype=np.int64))
+        seen[frontier] = True
+        while len(frontier):
+            _, targets = csr_gather(self.out_offsets, self.out_targets, frontier)
+            targets = np.unique(targets)
+            frontier = targets[~seen[targets]]
+            seen[frontier] = True
+        return np.flatnonzero(seen)
+
+    def upstream(self, nodes: Iterable[int]) -> np.ndarray:
+        """Indices of the given nodes and of every node that can reach them."""
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        frontier = np.unique(np.asarray(list(nodes), dtype=np.int64))
+        seen[frontier] = True
+        while len(frontier):
+            _, sources = csr_gather(self.in_offsets, self.in_sources, frontier)
+            sources = np.unique(sources)
+            frontier = sources[~seen[sources]]
+            seen[frontier] = True
+        return np.flatnonzero(seen)
+
+    def supply_tree(self) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """
+        Breadth-first spanning tree from the roots: each reachable node's
+        feeder on a shortest route (first one found when several are as
+        short), -1 for roots and unreachable nodes, plus the nodes grouped
+        by depth.
+        """
+        parent = np.full(self.num_nodes, -1, dtype=np.int64)
+        seen = np.zeros(self.num_nodes, dtype=bool)
+        seen[self.roots] = True
+        levels = []
+        frontier = self.roots
+        while len(frontier):
+            levels.append(frontier)
+            owners, targets = csr_gather(self.out_offsets, self.out_targets, frontier)
+            new = ~seen[targets]
+            frontier, first = np.unique(targets[new], return_index=True)
+            parent[frontier] = owners[new][first]
+            seen[frontier] = True
+        return parent, levels
+
+    def strongly_connected_components(self) -> Tuple[List[int], List[List[int]]]:
+        """
+        Strongly connected components (iterative Tarjan).
+        Returns (component, members): the component number of every node and
+        the nodes of every component. Components are numbered in reverse
+        topological order, so iterating them backwards visits every component
+        after all components that feed it.
+        """
+        if self._components is None:
+            successors = self.successor_lists()
+            n = self.num_nodes
+            order = [-1] * n
+            low = [0] * n
+            on_stack = [False] * n
+            component = [-1] * n
+            members = []
+            stack = []
+            counter = 0
+            
+            for root in range(n):
+                if order[root] != -1:
+                    continue
+                work = [(root, 0)]
+                while work:
+                    node, i = work[-1]
+                    if i == 0:
+                        order[node] = low[node] = counter
+                        counter += 1
+                        stack.append(node)
+                        on_stack[node] = True
+                        
+                    # Resume scanning successors where this frame left off
+                    descended = False
+                    next_nodes = successors[node]
+                    while i < len(next_nodes):
+                        next_node = next_nodes[i]
+                        i += 1
+                        if order[next_node] == -1:
+                            work[-1] = (node, i)
+                            work.append((next_node, 0))
+                            descended = True
+                            break
+                        if on_stack[next_node]:
+                            low[node] = min(low[node], order[next_node])
+                    if descended:
+                        continue
+                        
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == order[node]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component[member] = len(members)
+                            group.append(member)
+                            if member == node:
+                                break
+                        members.append(group)
+                        
+            self._components = (component, members)
+        return self._components
+
+    def condensation(self) -> Tuple[np.ndarray, 'NetworkGraph']:
+        """
+        The graph with every strongly connected component collapsed to one node.
+        Returns (component, condensed): the component number of every node as
+        an array, and the acyclic graph between components (node i of the
+        condensed graph is component i).
+        """
+        if self._condensation is None:
+            component, members = self.strongly_connected_components()
+            component = np.array(component, dtype=np.int64)
+            sources = np.repeat(component, self.out_degree)
+            targets = component[self.out_targets]
+            between = sources != targets
+            condensed = NetworkGraph(list(range(len(members))), sources[between], targets[between])
+            self._condensation = (component, condensed)
+        return self._condensation
+
+    def loops(self) -> List[List[int]]:
+        """Components that contain a cycle (several nodes, or a node connected to itself)."""
+        _, members = self.strongly_connected_components()
+        successors = self.successor_lists()
+        return [
+            group for group in members
+            if len(group) > 1 or group[0] in successors[group[0]]
+        ]
+
+    def component_exits(self, c: int) -> List[Tuple[int, int]]:
+        """Edges (source, target) leaving component c."""
+        exits = self._component_exits.get(c)
+        if exits is None:
+            component, members = self.strongly_connected_components()
+            successors = self.successor_lists()
+            exits = [
+                (node, next_node)
+                for node in members[c]
+                for next_node in successors[node]
+                if component[next_node] != c
+            ]
+            self._component_exits[c] = exits
+        return exits
+
+    def route_within_component(self, source: int, target: int) -> List[int]:
+        """Shortest route from source to target that stays inside their component."""
+        if source == target:
+            return [source]
+        parents = self._component_routes.get(source)
+        if parents is None:
+            # Breadth-first search from source, limited to its component
+            component, _ = self.strongly_connected_components()
+            successors = self.successor_lists()
+            c = component[source]
+            parents = {source: None}
+            frontier = [source]
+            while frontier:
+                next_frontier = []
+                for node in frontier:
+                    for next_node in successors[node]:
+                        if next_node not in parents and component[next_node] == c:
+                            parents[next_node] = node
+                            next_frontier.append(next_node)
+                frontier = next_frontier
+            self._component_routes[source] = parents
+            
+        route = [target]
+        while route[-1] != source:
+            route.append(parents[route[-1]])
+        route.reverse()
+        return route
+
+    def topological_levels(self) -> List[np.ndarray]:
+        """
+        Group nodes into topological levels (Kahn's algorithm, one level per step).
+        Every node comes after all of its predecessors. Nodes on or below a
+        cycle never reach in-degree zero and are left out.
+        """
+        if self._levels is None:
+            remaining = self.in_degree.copy()
+            level = self.roots
+            self._levels = []
+            while len(level):
+                self._levels.append(level)
+                _, targets = csr_gather(self.out_offsets, self.out_targets, level)
+                np.subtract.at(remaining, targets, 1)
+                candidates = np.unique(targets)
+                level = candidates[remaining[candidates] == 0]
+        return self._levels
+
+    def topological_order(self) -> np.ndarray:
+        """All orderable nodes, each after its predecessors."""
+        levels = self.topological_levels()
+        if not levels:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(levels)
+
+
+class ReachabilityIndex:
+    """
+    Which source nodes can reach each node, as packed bitsets.
+
+    Bit k of a node's row is set when sources[k] has a path to the node.
+    Rows are NumPy uint64 blocks filled in one topological sweep over the
+    condensed (loop-free) graph, after which reachability questions are
+    constant-time lookups.
+    """
+    def __init__(self, graph: NetworkGraph, sources: Iterable[int]):
+        self.graph = graph
+        self.sources = np.asarray(sorted(set(sources)), dtype=np.int64)
+        self.position = {source: k for k, source in enumerate(self.sources.tolist())}
+        words = max(1, -(-len(self.sources) // 64))
+
+        self.bits = np.zeros((graph.num_nodes, words), dtype=np.uint64)
+        if not len(self.sources):
+            return
+        k = np.arange(len(self.sources))
+        self.bits[self.sources, k // 64] |= np.left_shift(np.uint64(1), (k % 64).astype(np.uint64))
+
+        # Collapse loops so the graph is acyclic, then sweep it once in
+        # topological order, pushing each level's bits to its successors
+        component, condensed = graph.condensation()
+        component_bits = np.zeros((condensed.num_nodes, words), dtype=np.uint64)
+        np.bitwise_or.at(component_bits, component, self.bits)
+        for level in condensed.topological_levels():
+            owners, targets = csr_gather(condensed.out_offsets, condensed.out_targets, level)
+            if len(targets):
+                np.bitwise_or.at(component_bits, targets, component_bits[owners])
+        self.bits = component_bits[component]
+
+    def mask(self, nodes: Iterable[int]) -> np.ndarray:
+        """Bit mask selecting the given source nodes."""
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint64)
+        for node in nodes:
+            k = self.position.get(node)
+            if k is not None:
+                mask[k // 64] |= np.uint64(1) << np.uint64(k % 64)
+        return mask
+
+    def reaches(self, node: int, mask: np.ndarray) -> bool:
+        """Whether any source selected by mask has a path to node."""
+        return bool(np.any(self.bits[node] & mask))
+
+    def sources_reaching(self, node: int, mask: np.ndarray = None) -> np.ndarray:
+        """Source nodes (optionally limited to mask) that have a path to node."""
+        row = self.bits[node] if mask is None else self.bits[node] & mask
+        flags = np.unpackbits(row.view(np.uint8), bitorder='little')[:len(self.sources)]
+        return self.sources[flags.astype(bool)]
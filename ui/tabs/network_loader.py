@@ -0,0 +1,103 @@
+# ui/tabs/network_loader.py
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from utils.profiling import span
+from .network_graph import NetworkGraph
+
+# Loaded networks kept in memory, shared by the tabs that work on a saved network
+LOADED_NETWORKS = 4
+
+
+class LoadedNetwork:
+    """A saved network structure compiled for analysis: graph plus component data."""
+    def __init__(self, network_id: int, project_id: int, graph: NetworkGraph,
+                 component_types: Dict[str, str], labels: Dict[str, str],
+                 properties: Dict[str, Dict], content_hash: Optional[str] = None):
+        self.network_id = network_id
+        self.project_id = project_id
+        self.graph = graph
+        self.component_types = component_types  # component ID -> type prefix ('F', 'MC', ...)
+        self.labels = labels                    # component ID -> label
+        self.properties = properties            # component ID -> properties dict
+        self.content_hash = content_hash
+
+
+class NetworkLoader:
+    """
+    Loads saved networks (connections and component rows) into LoadedNetwork
+    objects, keeping the most recent few in memory so the Capacity, Delivery
+    and Requirements tabs share one compiled graph per network. Loaded
+    networks are shared between threads and must be treated as read-only;
+    change properties through save_properties().
+    """
+    def __init__(self, max_entries: int = LOADED_NETWORKS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, db_ops, network_id: int) -> LoadedNetwork:
+        """Get a network from memory, else load it from the database."""
+        with self._lock:
+            if network_id in self._entries:
+                self._entries.move_to_end(network_id)
+                return self._entries[network_id]
+
+        network = db_ops.get_network(network_id)
+        if network is None:
+            raise ValueError(f"Network {network_id} not found")
+
+        with span("load_network") as timing:
+            edges = [connection.split('--->') for connection in db_ops.get_network_connections(network)]
+            component_types, labels, properties = {}, {}, {}
+            for component_id, component_type, label, props in db_ops.get_component_rows(network_id):
+                component_types[component_id] = component_type
+                labels[component_id] = label
+                properties[component_id] = props or {}
+            graph = NetworkGraph.from_edges(edges, nodes=labels)
+            timing.set(nodes=graph.num_nodes, edges=graph.num_edges)
+
+        loaded = LoadedNetwork(network_id, network.project_id, graph, component_types,
+                               labels, properties, network.content_hash)
+        with self._lock:
+            self._entries[network_id] = loaded
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return loaded
+
+    def save_properties(self, db_ops, loaded: LoadedNetwork, updates: Dict[str, Dict]) -> int:
+        """Store component property changes and apply them to the loaded network."""
+        count = db_ops.update_component_properties(loaded.network_id, updates)
+        with self._lock:
+            for component_id, changes in updates.items():
+                if component_id not in loaded.properties:
+                    continue
+                merged = dict(loaded.properties[component_id])
+                for key, value in changes.items():
+                    if value is None:
+                        merged.pop(key, None)
+                    else:
+                        merged[key] = value
+                loaded.properties[component_id] = merged
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every tab and worker in the process
+network_loader = NetworkLoader()
+
+
+def run_save_properties(db_ops, network_id: int, updates: Dict[str, Dict],
+                        progress=None, should_stop=None) -> int:
+    """Store component property changes of a saved network; task for AnalysisWorker."""
+    if progress:
+        progress(0, f"Saving properties of {len(updates)} components")
+    count = network_loader.save_properties(db_ops, network_loader.load(db_ops, network_id), updates)
+    if progress:
+        progress(100, f"Updated {count} components")
+    return count
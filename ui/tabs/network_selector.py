@@ -0,0 +1,85 @@
+# ui/tabs/network_selector.py
+
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel, QComboBox, QPushButton
+from PySide6.QtCore import Signal
+
+
+class NetworkSelector(QWidget):
+    """
+    Project and network pickers for tabs that work on a saved network.
+    Lists are read when the selector is first shown or refreshed; Load emits
+    networkSelected with the chosen network's id.
+    """
+    networkSelected = Signal(int)
+
+    def __init__(self, db_ops_provider, parent=None):
+        super().__init__(parent)
+        self.db_ops_provider = db_ops_provider  # callable, so the tab's session opens lazily
+        self.loaded_lists = False
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.project_combo = QComboBox()
+        self.project_combo.setMinimumWidth(200)
+        self.project_combo.currentIndexChanged.connect(self.refresh_networks)
+
+        self.network_combo = QComboBox()
+        self.network_combo.setMinimumWidth(260)
+
+        self.refresh_btn = QPushButton("Refresh")
+        self.refresh_btn.clicked.connect(self.refresh)
+
+        self.load_btn = QPushButton("Load Network")
+        self.load_btn.clicked.connect(self.load_selected)
+
+        layout.addWidget(QLabel("Project:"))
+        layout.addWidget(self.project_combo)
+        layout.addWidget(QLabel("Network:"))
+        layout.addWidget(self.network_combo)
+        layout.addWidget(self.refresh_btn)
+        layout.addWidget(self.load_btn)
+        layout.addStretch()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.loaded_lists:
+            self.refresh()
+
+    def refresh(self):
+        """Reload the project list (and the selected project's networks)."""
+        self.loaded_lists = True
+        selected = self.project_combo.currentData()
+        self.project_combo.blockSignals(True)
+        self.project_combo.clear()
+        for project in self.db_ops_provider().get_projects():
+            self.project_combo.addItem(project.name, project.id)
+        index = self.project_combo.findData(selected)
+        self.project_combo.setCurrentIndex(max(index, 0))
+        self.project_combo.blockSignals(False)
+        self.refresh_networks()
+
+    def refresh_networks(self):
+        self.network_combo.clear()
+        project_id = self.project_combo.currentData()
+        if project_id is None:
+            return
+        networks = sorted(self.db_ops_provider().get_project_networks(project_id),
+                          key=lambda network: network.upload_date, reverse=True)
+        for network in networks:
+            analyzed = "analyzed" if network.analysis_date else "not analyzed"
+            self.network_combo.addItem(
+                f"#{network.id}  {network.upload_date:%Y-%m-%d %H:%M}  ({analyzed})", network.id
+            )
+        self.load_btn.setEnabled(bool(networks))
+
+    def load_selected(self):
+        network_id = self.network_combo.currentData()
+        if network_id is not None:
+            self.networkSelected.emit(network_id)
+
+    def set_enabled(self, enabled: bool):
+        self.load_btn.setEnabled(enabled and self.network_combo.count() > 0)
+        self.refresh_btn.setEnabled(enabled)
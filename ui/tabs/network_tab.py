@@ -1,12 +1,9 @@
 # ui/tabs/network_tab.py
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                             QLabel, QTextEdit, QFileDialog, QTreeWidget, QTreeWidgetItem,
+                             QLabel, QTextEdit, QFileDialog, QTreeView,
                              QMessageBox, QHeaderView, QSplitter, QDialog, QLineEdit, QFormLayout)
-from PySide6.QtCore import Qt
-from PySide6.QtWebEngineWidgets import QWebEngineView
-import json
-import re
+from PySide6.QtCore import Qt, QUrl
 from datetime import datetime
 import sys
 from pathlib import Path
@@ -15,8 +12,14 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parents[2]))
 
 from utils.db import get_db
-from .path_extractor import PathExtractor
+from utils.profiling import continue_run, profile_run, span
+from .path_viewer import PathViewerBridge, VIEWER_PAGE
+from .component_tree_model import ComponentTreeModel
 from .network_db_ops import NetworkDatabaseOperations
+from .mermaid_parser import parse_mermaid
+from .network_analysis import COMPONENT_TYPES, run_component_analysis, run_path_analysis
+from .network_worker import TaskRunner
+from .timing_panel import TimingPanel
 
 class ProjectDialog(QDialog):
     """Dialog for creating or selecting a project."""
@@ -115,22 +118,30 @@ class NetworkTab(QWidget):
     def __init__(self):
         super().__init__()
         self.network_data = None
-        self.components = {
-            'DP': 'Distribution Point',
-            'MC': 'Canal',
-            'ZT': 'Gate',
-            'SW': 'Smart Water',
-            'F': 'Field'
-        }
-        self.connections = []
+        self.parsed_network = None
+        self.components = dict(COMPONENT_TYPES)
+        self.graph = None
         self.node_labels = {}
         
-        # Database integration
-        self.db = next(get_db())
-        self.db_ops = NetworkDatabaseOperations(self.db)
+        # Database integration (the session is opened on first use)
+        self.db = None
+        self._db_ops = None
         self.current_project_id = None
         self.current_network_id = None
         
+        # Path viewer, fed page by page over QWebChannel; the web view is
+        # created with the first path results so startup doesn't load WebEngine
+        self.path_extractor = None
+        self.paths_display = None
+        self.path_viewer_bridge = PathViewerBridge(self)
+        self.path_viewer_bridge.timingReported.connect(self.on_viewer_timing)
+        self.last_run = None  # profiling run of the latest analysis, see utils/profiling.py
+        
+        # Incremental re-analysis against the project's previous upload
+        self.previous_path_data = None
+        self.affected_end_points = None
+        self.content_hash = None  # fingerprint of the analyzed network, for the analysis cache
+        
         self.setup_ui()
 
     def setup_ui(self):
@@ -182,8 +193,20 @@ class NetworkTab(QWidget):
         network_layout.addWidget(self.analyze_components_btn)
         network_layout.addStretch()
         
+        self.timings_btn = QPushButton("Show Timings")
+        self.timings_btn.setCheckable(True)
+        self.timings_btn.toggled.connect(self.toggle_timings)
+        network_layout.addWidget(self.timings_btn)
+        
         layout.addLayout(network_layout)
         
+        # Background analysis (one task at a time), with its progress and a Cancel button
+        self.task_runner = TaskRunner()
+        self.task_runner.cancelled_message = "Analysis cancelled; nothing was saved."
+        self.task_runner.busyChanged.connect(self.set_busy)
+        self.task_runner.profiled.connect(self.on_worker_profiled)
+        layout.addWidget(self.task_runner)
+        
         # Content and Results section
         middle_splitter = QSplitter(Qt.Orientation.Horizontal)
         
@@ -193,11 +216,27 @@ class NetworkTab(QWidget):
         self.content_preview.setPlaceholderText("Mermaid file content will appear here")
         middle_splitter.addWidget(self.content_preview)
         
-        # Results tree
-        self.results_tree = QTreeWidget()
-        self.results_tree.setHeaderLabels(["Component Type", "ID", "Details"])
-        self.results_tree.header().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
-        middle_splitter.addWidget(self.results_tree)
+        # Results tree (rows are created by the model as they are needed)
+        results_widget = QWidget()
+        results_layout = QVBoxLayout(results_widget)
+        results_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.component_filter = QLineEdit()
+        self.component_filter.setPlaceholderText("Filter components by ID or label")
+        self.component_filter.textChanged.connect(self.filter_components)
+        results_layout.addWidget(self.component_filter)
+        
+        self.component_model = ComponentTreeModel(self.components, self)
+        self.results_tree = QTreeView()
+        self.results_tree.setModel(self.component_model)
+        self.results_tree.setUniformRowHeights(True)
+        self.results_tree.setSortingEnabled(True)
+        self.results_tree.sortByColumn(1, Qt.SortOrder.AscendingOrder)
+        self.results_tree.header().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.results_tree.header().setStretchLastSection(True)
+        results_layout.addWidget(self.results_tree)
+        
+        middle_splitter.addWidget(results_widget)
         
         # Add middle section to vertical splitter
         main_splitter = QSplitter(Qt.Orientation.Vertical)
@@ -212,16 +251,49 @@ class NetworkTab(QWidget):
         self.analyze_paths_btn.setEnabled(False)
         bottom_layout.addWidget(self.analyze_paths_btn)
         
-        self.paths_display = QWebEngineView()
-        self.paths_display.setMinimumHeight(400)
-        bottom_layout.addWidget(self.paths_display)
+        self.paths_placeholder = QLabel("Path analysis results will appear here.")
+        self.paths_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.paths_placeholder.setMinimumHeight(400)
+        self.paths_placeholder.setStyleSheet("color: #6b7280;")
+        self.bottom_layout = bottom_layout
+        bottom_layout.addWidget(self.paths_placeholder)
         
         main_splitter.addWidget(bottom_widget)
         
+        # Per-run timing breakdown, hidden until asked for
+        self.timing_panel = TimingPanel()
+        self.timing_panel.setVisible(False)
+        main_splitter.addWidget(self.timing_panel)
+        
         # Add the main splitter to the layout
         layout.addWidget(main_splitter)
         self.setLayout(layout)
 
+    @property
+    def db_ops(self) -> NetworkDatabaseOperations:
+        """Database operations; the session is opened on first use."""
+        if self._db_ops is None:
+            self.db = next(get_db())
+            self._db_ops = NetworkDatabaseOperations(self.db)
+        return self._db_ops
+
+    def show_path_viewer(self):
+        """Replace the placeholder with the web path viewer (loads WebEngine)."""
+        if self.paths_display is not None:
+            return
+        from PySide6.QtWebEngineWidgets import QWebEngineView
+        from PySide6.QtWebChannel import QWebChannel
+        
+        # Local viewer page; paths are requested from the bridge as they scroll into view
+        self.paths_display = QWebEngineView()
+        self.paths_display.setMinimumHeight(400)
+        self.path_viewer_channel = QWebChannel(self.paths_display.page())
+        self.path_viewer_channel.registerObject('pathViewer', self.path_viewer_bridge)
+        self.paths_display.page().setWebChannel(self.path_viewer_channel)
+        self.paths_display.setUrl(QUrl.fromLocalFile(str(VIEWER_PAGE)))
+        self.bottom_layout.replaceWidget(self.paths_placeholder, self.paths_display)
+        self.paths_placeholder.deleteLater()
+
     def create_project(self):
         """Open dialog to create a new project and save to database."""
         dialog = ProjectDialog(self.db_ops, self)
@@ -263,358 +335,200 @@ class NetworkTab(QWidget):
         
         if file_name:
             try:
-                with open(file_name, 'r', encoding='utf-8') as file:
-                    content = file.read()
+                with open(file_name, 'r', encoding='utf-8') as file, profile_run("Load file") as run:
+                    with span("read_file") as timing:
+                        content = file.read()
+                        timing.set(bytes=len(content))
                     
-                    # Validate Mermaid content
-                    if not self._validate_mermaid_content(content):
+                    # Parse once; validation and analysis both use this result
+                    with span("parse_mermaid") as timing:
+                        parsed = parse_mermaid(content)
+                        timing.set(nodes=len(parsed.nodes), edges=len(parsed.edges))
+                    self.last_run = run
+                    if not self._validate_mermaid_content(content, parsed):
                         raise ValueError("Invalid Mermaid file format")
                     
                     self.network_data = content
+                    self.parsed_network = parsed
                     self.file_label.setText(file_name.split('/')[-1])
-                    self.content_preview.setText(content)
+                    with span("show_preview"):
+                        self.content_preview.setText(content)
                     self.analyze_components_btn.setEnabled(True)
-                    self.connections = []
+                    self.graph = None
                     self.node_labels.clear()
+                self.show_last_run()
                     
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Error reading file: {str(e)}")
 
-    def _validate_mermaid_content(self, content: str) -> bool:
+    def _validate_mermaid_content(self, content: str, parsed=None) -> bool:
         """Validate the Mermaid file content format."""
         # Check for basic Mermaid graph syntax
         if not content.strip():
             return False
             
-        # Check for required components
-        has_components = bool(re.search(r'\w+\["[^\]]+"\]', content))
-        has_connections = bool(re.search(r'\w+\s*-+>\s*\w+', content))
+        # Check for required components (labeled nodes and at least one link)
+        if parsed is None:
+            parsed = parse_mermaid(content)
         
-        return has_components and has_connections
+        return parsed.has_components and parsed.has_connections
 
     def analyze_components(self):
-        """Analyze network components and save to database."""
-        if not self.network_data:
+        """Analyze network components and save to database on a worker thread."""
+        if not self.network_data or self.task_runner.is_running():
             return
         
-        try:
-            # Clear previous results
-            self.results_tree.clear()
-            self.connections.clear()
-            self.node_labels.clear()
-            
-            # Extract components and build data structure
-            components_data = {}
-            extracted_components = re.findall(r'(\w+)\["([^\]]+)"\]', self.network_data)
-            
-            for component_id, component_label in extracted_components:
-                component_type = re.match(r'[A-Za-z]+', component_id).group()
-                
-                if component_type in self.components:
-                    if component_type not in components_data:
-                        components_data[component_type] = {}
-                    
-                    components_data[component_type][component_id] = {
-                        'label': component_label,
-                        'properties': {}
-                    }
-                    self.node_labels[component_id] = component_label
-            
-            # Extract connections
-            self.connections = re.findall(r'(\w+)\s*-+>\s*(\w+)', self.network_data)
-            connections_list = [f"{source}--->{target}" for source, target in self.connections]
-            
-            # Save to database
-            network = self.db_ops.save_network_structure(
-                project_id=self.current_project_id,
-                mermaid_content=self.network_data,
-                components_data=components_data,
-                connections=connections_list
-            )
-            self.current_network_id = network.id
-            
-            # Update UI
+        # Clear previous results
+        self.component_model.clear()
+        self.graph = None
+        self.node_labels.clear()
+        
+        self.task_runner.start(
+            run_component_analysis,
+            self.on_components_analyzed,
+            "Error analyzing network",
+            self.current_project_id,
+            self.network_data,
+            self.components,
+            parsed=self.parsed_network
+        )
+
+    def on_components_analyzed(self, result: dict):
+        """Show the saved network structure once the worker is done."""
+        self.graph = result['graph']
+        self.node_labels = result['node_labels']
+        self.current_network_id = result['network_id']
+        self.previous_path_data = result['previous_path_data']
+        self.affected_end_points = result['affected_end_points']
+        self.content_hash = result['content_hash']
+        components_data = result['components_data']
+        
+        # Update UI
+        with continue_run(self.last_run), span("update_results_tree", components=len(self.node_labels)):
             self.update_results_tree(components_data)
-            self.analyze_paths_btn.setEnabled(True)
-            
-            # Show success message
-            component_counts = "\n".join(
-                f"{self.components[ctype]}: {len(comps)}"
-                for ctype, comps in sorted(components_data.items())
-            )
-            
-            QMessageBox.information(
-                self,
-                "Success", 
-                f"Network structure saved successfully!\n\n"
-                f"Component counts:\n{component_counts}"
-            )
-                
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Error",
-                f"Error analyzing network: {str(e)}"
-            )
+        self.show_last_run()
+        self.analyze_paths_btn.setEnabled(True)
+        
+        # Show success message
+        component_counts = "\n".join(
+            f"{self.components[ctype]}: {len(comps)}"
+            for ctype, comps in sorted(components_data.items())
+        )
+        
+        if result['cached']:
+            status = "Network unchanged since the last upload; using the saved structure."
+        else:
+            status = "Network structure saved successfully!"
+        
+        QMessageBox.information(
+            self,
+            "Success", 
+            f"{status}\n\n"
+            f"Component counts:\n{component_counts}"
+        )
 
     def update_results_tree(self, components_data: dict):
         """Update the results tree with analyzed component data."""
-        self.results_tree.clear()
-        
-        for comp_type, components in sorted(components_data.items()):
-            parent = QTreeWidgetItem(self.results_tree)
-            parent.setText(0, self.components[comp_type])
-            parent.setText(1, f"Total: {len(components)}")
-            parent.setExpanded(True)
-            
-            for comp_id, details in sorted(components.items()):
-                child = QTreeWidgetItem(parent)
-                child.setText(0, self.components[comp_type])
-                child.setText(1, comp_id)
-                
-                # Add label and connectivity information
-                details_text = details['label']
-                if comp_type == 'F':  # For Field components, show connections
-                    predecessors = [src for src, tgt in self.connections if tgt == comp_id]
-                    if predecessors:
-                        details_text += f" (Connected to: {', '.join(predecessors)})"
-                
-                child.setText(2, details_text)
+        self.component_model.set_components(components_data, self.graph)
+        self.expand_component_groups()
+
+    def filter_components(self, text: str):
+        """Show only the components matching the filter text."""
+        self.component_model.set_filter(text)
+        self.expand_component_groups()
+
+    def expand_component_groups(self):
+        for row in range(self.component_model.rowCount()):
+            self.results_tree.expand(self.component_model.index(row, 0))
+        for column in range(2):
+            self.results_tree.resizeColumnToContents(column)
 
     def analyze_paths(self):
-        """Analyze network paths and save results to database."""
-        if not self.network_data or not self.current_network_id:
+        """Analyze network paths and save results to database on a worker thread."""
+        if (not self.network_data or not self.current_network_id or self.graph is None
+                or self.task_runner.is_running()):
             return
+        
+        self.task_runner.start(
+            run_path_analysis,
+            self.on_paths_analyzed,
+            "Error analyzing paths",
+            self.current_network_id,
+            self.graph,
+            previous_path_data=self.previous_path_data,
+            affected_end_points=self.affected_end_points,
+            content_hash=self.content_hash
+        )
 
-        try:
-            # Create path extractor and analyze
-            connection_lines = [line.strip() for line in self.network_data.split('\n') 
-                              if '-->' in line]
-            
-            path_extractor = PathExtractor(connection_lines)
-            
-            # Build connection maps
-            outgoing_map = {}
-            incoming_map = {}
-            all_nodes = set()
-            
-            for conn in connection_lines:
-                for source, target in path_extractor.extract_connections(conn):
-                    all_nodes.add(source)
-                    all_nodes.add(target)
-                    
-                    if source not in outgoing_map:
-                        outgoing_map[source] = set()
-                    outgoing_map[source].add(target)
-                    
-                    if target not in incoming_map:
-                        incoming_map[target] = set()
-                    incoming_map[target].add(source)
-            
-            # Find start and end points
-            start_points = sorted([node for node in all_nodes if node not in incoming_map])
-            end_points = sorted([node for node in all_nodes if node not in outgoing_map])
-            
-            # Find all paths
-            path_extractor.find_all_paths(start_points, end_points)
-            path_data = path_extractor.get_path_data()
-            
-            # Save analysis results
-            self.db_ops.update_network_analysis(
-                network_id=self.current_network_id,
-                paths_data=path_data,
-                diagnostics=path_extractor.diagnostics
-            )
-            
-            # Update UI
-            html_content = self.get_react_html(path_data)
-            self.paths_display.setHtml(html_content)
-            
-            # Calculate and show statistics
-            total_paths = sum(len(paths) for paths in path_extractor.paths.values())
-            total_endpoints = len(end_points)
-            endpoints_with_paths = sum(1 for paths in path_extractor.paths.values() if paths)
-            
-            if total_paths == 0:
-                QMessageBox.warning(
-                    self,
-                    "Analysis Complete", 
-                    f"No valid paths found from detected source points ({', '.join(start_points)}) "
-                    f"to end points ({', '.join(end_points)}).\n"
-                    "Please check the diagnostic information for details."
-                )
-                return
-            
-            # Calculate average path length
-            path_lengths = [len(path) - 1 for paths in path_extractor.paths.values() 
-                          for path in paths]
-            avg_path_length = sum(path_lengths) / len(path_lengths) if path_lengths else 0
-            
-            QMessageBox.information(
+    def on_paths_analyzed(self, result: dict):
+        """Show the paths and the statistics once the worker is done."""
+        path_extractor = result['path_extractor']
+        path_counts = result['path_counts']
+        start_points = result['start_points']
+        end_points = result['end_points']
+        
+        # Update the path viewer; it pulls pages of paths as needed
+        self.path_extractor = path_extractor
+        with continue_run(self.last_run), span("show_path_viewer"):
+            self.show_path_viewer()
+            self.path_viewer_bridge.set_path_extractor(path_extractor)
+        self.show_last_run()
+        
+        # Calculate and show statistics from path counts (no path listing needed)
+        total_paths = sum(stats["count"] for stats in path_counts.values())
+        total_endpoints = len(end_points)
+        endpoints_with_paths = sum(1 for stats in path_counts.values() if stats["count"])
+        
+        if total_paths == 0:
+            QMessageBox.warning(
                 self,
                 "Analysis Complete", 
-                f"Found paths to {endpoints_with_paths} out of {total_endpoints} end points.\n"
-                f"Start points detected: {', '.join(start_points)}\n"
-                f"End points detected: {', '.join(end_points)}\n"
-                f"Total number of unique paths: {total_paths}\n"
-                f"Average path length: {avg_path_length:.1f} segments"
-            )
-                
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Error",
-                f"Error analyzing paths: {str(e)}"
+                f"No valid paths found from detected source points ({', '.join(start_points)}) "
+                f"to end points ({', '.join(end_points)}).\n"
+                "Please check the diagnostic information for details."
             )
+            return
+        
+        # Calculate average path length
+        total_length = sum(stats["total_length"] for stats in path_counts.values())
+        avg_path_length = total_length / total_paths
+        
+        QMessageBox.information(
+            self,
+            "Analysis Complete", 
+            f"Found paths to {endpoints_with_paths} out of {total_endpoints} end points.\n"
+            f"Start points detected: {', '.join(start_points)}\n"
+            f"End points detected: {', '.join(end_points)}\n"
+            f"Total number of unique paths: {total_paths}\n"
+            f"Average path length: {avg_path_length:.1f} segments\n"
+            f"End points reused from the previous upload: "
+            f"{len(path_extractor.reused_end_points)}"
+            + ("\nResults loaded from the analysis cache." if result['cached'] else "")
+        )
 
-    def get_react_html(self, path_data):
-        """Generate HTML with React component and data."""
-        return f'''
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/react/18.2.0/umd/react.production.min.js"></script>
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/react-dom/18.2.0/umd/react-dom.production.min.js"></script>
-            <script src="https://cdnjs.cloudflare.com/ajax/libs/babel-standalone/7.23.5/babel.min.js"></script>
-            <script src="https://cdn.tailwindcss.com"></script>
-        </head>
-        <body>
-            <div id="root"></div>
-            <script type="text/babel">
-                const pathData = {json.dumps(path_data)};
-                
-                {self.get_react_component()}
-                
-                ReactDOM.render(
-                    React.createElement(PathSummaryDisplay, {{ data: pathData }}),
-                    document.getElementById('root')
-                );
-            </script>
-        </body>
-        </html>
-        '''
-
-    def get_react_component(self):
-        """Return the React component code as a string."""
-        return '''
-        function PathSummaryDisplay({ data }) {
-            const [expandedPaths, setExpandedPaths] = React.useState({});
-            const [expandedSections, setExpandedSections] = React.useState({
-                diagnostics: true,
-                paths: true
-            });
-
-            const toggleSection = (section) => {
-                setExpandedSections(prev => ({
-                    ...prev,
-                    [section]: !prev[section]
-                }));
-            };
-
-            const togglePath = (endPoint) => {
-                setExpandedPaths(prev => ({
-                    ...prev,
-                    [endPoint]: !prev[endPoint]
-                }));
-            };
-
-            const getNodeTypeClass = (node) => {
-                if (node.startsWith('F')) return 'text-green-600';
-                if (node.startsWith('MC')) return 'text-blue-600';
-                if (node.startsWith('SW')) return 'text-purple-600';
-                if (node.startsWith('ZT')) return 'text-orange-600';
-                if (node.startsWith('DP')) return 'text-red-600';
-                return 'text-gray-600';
-            };
-
-            return (
-                <div className="w-full p-4 bg-white">
-                    <h2 className="text-2xl font-bold mb-4">Path Analysis Results</h2>
-
-                    {/* Diagnostics Section */}
-                    {data.diagnostics.length > 0 && (
-                        <div className="mb-6">
-                            <div 
-                                className="flex items-center cursor-pointer bg-gray-100 p-2 rounded"
-                                onClick={() => toggleSection('diagnostics')}
-                            >
-                                <span className="transform transition-transform">
-                                    {expandedSections.diagnostics ? '▼' : '▶'}
-                                </span>
-                                <h3 className="text-lg font-semibold ml-2">Diagnostic Information</h3>
-                            </div>
-                            
-                            {expandedSections.diagnostics && (
-                                <div className="mt-2 ml-6">
-                                    {data.diagnostics.map((diagnostic, index) => (
-                                        <div key={index} className="text-gray-700 mb-1">
-                                            • {diagnostic}
-                                        </div>
-                                    ))}
-                                </div>
-                            )}
-                        </div>
-                    )}
+    def on_worker_profiled(self, run):
+        self.last_run = run
+        self.show_last_run()
 
-                    {/* Paths Section */}
-                    <div>
-                        <div 
-                            className="flex items-center cursor-pointer bg-gray-100 p-2 rounded"
-                            onClick={() => toggleSection('paths')}
-                        >
-                            <span className="transform transition-transform">
-                                {expandedSections.paths ? '▼' : '▶'}
-                            </span>
-                            <h3 className="text-lg font-semibold ml-2">Paths Found</h3>
-                        </div>
+    def on_viewer_timing(self, name: str, milliseconds: float):
+        """Time reported by the path viewer page, added to the latest run."""
+        if self.last_run is not None:
+            self.last_run.add(name, milliseconds / 1000)
+            self.show_last_run()
 
-                        {expandedSections.paths && (
-                            <div className="mt-2">
-                                {Object.entries(data.paths).map(([endPoint, paths]) => (
-                                    <div key={endPoint} className="mb-4 ml-4">
-                                        <div 
-                                            className="flex items-center cursor-pointer hover:bg-gray-50 p-2"
-                                            onClick={() => togglePath(endPoint)}
-                                        >
-                                            <span className="transform transition-transform">
-                                                {expandedPaths[endPoint] ? '▼' : '▶'}
-                                            </span>
-                                            <span className="font-medium ml-2">
-                                                Paths to {endPoint} ({paths.length} found)
-                                            </span>
-                                        </div>
+    def show_last_run(self):
+        if self.last_run is not None:
+            self.timing_panel.show_run(self.last_run)
 
-                                        {expandedPaths[endPoint] && (
-                                            <div className="ml-8">
-                                                {paths.map((pathInfo, index) => (
-                                                    <div key={index} className="mb-2">
-                                                        <div className="font-medium text-sm text-gray-600 mb-1">
-                                                            Path {index + 1} ({pathInfo.length} segments) - {pathInfo.type}
-                                                        </div>
-                                                        <div className="flex flex-wrap items-center">
-                                                            {pathInfo.path.map((node, nodeIndex) => (
-                                                                <React.Fragment key={nodeIndex}>
-                                                                    <span className={`${getNodeTypeClass(node)}`}>
-                                                                        {node}
-                                                                    </span>
-                                                                    {nodeIndex < pathInfo.path.length - 1 && (
-                                                                        <span className="mx-2 text-gray-400">→</span>
-                                                                    )}
-                                                                </React.Fragment>
-                                                            ))}
-                                                        </div>
-                                                    </div>
-                                                ))}
-                                            </div>
-                                        )}
-                                    </div>
-                                ))}
-                            </div>
-                        )}
-                    </div>
-                </div>
-            );
-        }
-        '''
+    def toggle_timings(self, visible: bool):
+        self.timing_panel.setVisible(visible)
+        self.timings_btn.setText("Hide Timings" if visible else "Show Timings")
 
+    def set_busy(self, busy: bool):
+        """Lock the controls that would start or change an analysis while one runs."""
+        self.create_project_btn.setEnabled(not busy)
+        self.upload_btn.setEnabled(not busy and self.current_project_id is not None)
+        self.analyze_components_btn.setEnabled(not busy and bool(self.network_data))
+        self.analyze_paths_btn.setEnabled(
+            not busy and self.graph is not None and self.current_network_id is not None
+        )
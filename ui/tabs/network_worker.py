@@ -0,0 +1,178 @@
+# ui/tabs/network_worker.py
+
+import threading
+import time
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushButton, QMessageBox
+
+from utils.db import get_db
+from utils.profiling import profile_run
+from .network_db_ops import NetworkDatabaseOperations
+from .network_analysis import AnalysisCancelled
+
+# Minimum time between two progress signals with the same percentage
+PROGRESS_INTERVAL = 0.1  # seconds
+
+
+class AnalysisSignals(QObject):
+    """Signals of an AnalysisWorker; delivered on the GUI thread."""
+    progress = Signal(int, str)   # percent, message
+    finished = Signal(object)     # the task's result
+    error = Signal(str)
+    cancelled = Signal()
+    profiled = Signal(object)     # the utils.profiling ProfileRun, before any other outcome
+
+
+class AnalysisWorker(QRunnable):
+    """
+    Run one analysis task from network_analysis.py on a QThreadPool thread.
+    The task is called as task(db_ops, *args, progress=..., should_stop=...,
+    **kwargs) with database operations on the worker's own session, inside
+    a profiling run named after the task ("run_path_analysis" -> "Path analysis").
+    """
+    def __init__(self, task, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # the tab keeps a reference until it is done
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = AnalysisSignals()
+        self._stop = threading.Event()
+        self._last_progress = (None, 0.0)
+        self.name = task.__name__.removeprefix('run_').replace('_', ' ').capitalize()
+
+    def cancel(self):
+        """Ask the task to stop at its next cancellation point."""
+        self._stop.set()
+
+    def is_cancelled(self) -> bool:
+        return self._stop.is_set()
+
+    def _progress(self, percent: int, message: str):
+        # Drop rapid updates that would not change the progress bar
+        last_percent, last_time = self._last_progress
+        now = time.monotonic()
+        if percent == last_percent and now - last_time < PROGRESS_INTERVAL:
+            return
+        self._last_progress = (percent, now)
+        self.signals.progress.emit(percent, message)
+
+    def run(self):
+        sessions = get_db()
+        db = next(sessions)
+        result = error = None
+        try:
+            with profile_run(self.name) as run:
+                try:
+                    result = self.task(
+                        NetworkDatabaseOperations(db),
+                        *self.args,
+                        progress=self._progress,
+                        should_stop=self.is_cancelled,
+                        **self.kwargs
+                    )
+                except Exception as e:
+                    error = e
+                    run.set(outcome='cancelled' if isinstance(e, AnalysisCancelled) else 'error')
+        finally:
+            sessions.close()
+        
+        self.signals.profiled.emit(run)
+        if isinstance(error, AnalysisCancelled):
+            self.signals.cancelled.emit()
+        elif error is not None:
+            self.signals.error.emit(str(error))
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QWidget):
+    """
+    Runs one AnalysisWorker task at a time for a tab, showing its progress
+    with a Cancel button while it runs (hidden otherwise). Outcomes are
+    delivered on the GUI thread: the on_finished callback given to start(),
+    an error message box, or a cancellation notice.
+    """
+    busyChanged = Signal(bool)
+    profiled = Signal(object)  # ProfileRun of every task
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.worker = None
+        self.on_finished = None
+        self.error_title = ""
+        # Shown when a task is cancelled; tasks that commit as they go replace it
+        self.cancelled_message = "Task cancelled; nothing was saved."
+        
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_label = QLabel("")
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.progress_label)
+        layout.addWidget(self.cancel_btn)
+        self.setVisible(False)
+
+    def is_running(self) -> bool:
+        return self.worker is not None
+
+    def start(self, task, on_finished, error_title: str, *args, **kwargs) -> bool:
+        """Start task(db_ops, *args, **kwargs) unless another task is running."""
+        if self.worker:
+            return False
+        worker = AnalysisWorker(task, *args, **kwargs)
+        # Bound methods, so the signals are queued to the GUI thread
+        worker.signals.progress.connect(self.on_progress)
+        worker.signals.profiled.connect(self.profiled)
+        worker.signals.finished.connect(self.on_worker_finished)
+        worker.signals.error.connect(self.on_worker_error)
+        worker.signals.cancelled.connect(self.on_worker_cancelled)
+        
+        self.worker = worker
+        self.on_finished = on_finished
+        self.error_title = error_title
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("")
+        self.cancel_btn.setEnabled(True)
+        self.setVisible(True)
+        self.busyChanged.emit(True)
+        self.thread_pool.start(worker)
+        return True
+
+    def cancel(self):
+        if self.worker:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.progress_label.setText("Cancelling...")
+
+    def on_progress(self, percent: int, message: str):
+        self.progress_bar.setValue(percent)
+        self.progress_label.setText(message)
+
+    def _idle(self):
+        self.setVisible(False)
+        self.busyChanged.emit(False)
+
+    def on_worker_finished(self, result):
+        self.worker = None
+        try:
+            self.on_finished(result)
+        finally:
+            # The handler may have started a follow-up task; a failing one mustn't leave the tab busy
+            if self.worker is None:
+                self._idle()
+
+    def on_worker_error(self, message: str):
+        self.worker = None
+        self._idle()
+        QMessageBox.critical(self, "Error", f"{self.error_title}: {message}")
+
+    def on_worker_cancelled(self):
+        self.worker = None
+        self._idle()
+        QMessageBox.information(self, "Cancelled", self.cancelled_message)
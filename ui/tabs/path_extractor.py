@@ -1,191 +1,495 @@
-import re
+import time
+from itertools import islice
+
+from utils.profiling import annotate, timed
+from .network_graph import NetworkGraph, ReachabilityIndex
+from .mermaid_parser import EdgeToken, parse_mermaid, tokenize_line
+
+# Global budget for listing paths; counting (count_paths) is never limited
+MAX_PATHS = 10000
+TIME_BUDGET = 10.0  # seconds
+PAGE_SIZE = 50
 
 class PathExtractor:
-    def __init__(self, connections):
-        self.connections = connections
+    def __init__(self, connections=None, graph=None, max_paths=MAX_PATHS, time_budget=TIME_BUDGET,
+                 should_stop=None, progress=None):
+        self.connections = connections or []
+        self._graph = graph
+        self.max_paths = max_paths
+        self.time_budget = time_budget
+        self.should_stop = should_stop  # polled; returning True cancels the running analysis
+        self.progress = progress        # called as progress(end points done, total)
+        self.cancelled = False
         self.paths = {}
+        self.path_counts = {}
         self.diagnostics = []
+        self.end_diagnostics = {}
+        self.reused_end_points = []
+        self.count_diagnostics = []
+        self.truncated = False
+        self.start_points = []
+        
+    @property
+    def start_points(self):
+        return self._start_points
+
+    @start_points.setter
+    def start_points(self, start_points):
+        self._start_points = list(start_points)
+        self._start_positions = None
+        
+    def _get_start_positions(self):
+        """Map each start node index to its position in start_points."""
+        if self._start_positions is None:
+            index = self.graph.index
+            self._start_positions = {}
+            for position, start in enumerate(self._start_points):
+                if start in index:
+                    self._start_positions.setdefault(index[start], position)
+        return self._start_positions
         
-    def extract_connections(self, line):
+    @staticmethod
+    def extract_connections(line):
         """
         Extract all connections from a line that might contain multiple targets.
+        Any Mermaid link style is accepted, and chains are expanded.
         Example: 
         'MC01["Label"] ---> DP1["Label"] & DP2["Label"]' 
         -> [('MC01', 'DP1'), ('MC01', 'DP2')]
         """
-        # First split on '--->
-        parts = line.split('--->')
-        if len(parts) != 2:
-            return []
-            
-        source_part, targets_part = parts
-        
-        # Extract source node ID
-        source_match = re.match(r'(\w+)(?:\[[^\]]+\])?', source_part.strip())
-        if not source_match:
-            return []
-        source = source_match.group(1)
-        
-        # Split targets on & and extract each target node ID
-        connections = []
-        targets = targets_part.split('&')
-        for target in targets:
-            target_match = re.match(r'(\w+)(?:\[[^\]]+\])?', target.strip())
-            if target_match:
-                target_id = target_match.group(1)
-                connections.append((source, target_id))
-                
-        return connections
-
-    def find_all_paths(self, start_points, end_points):
-        """Find all possible paths from start points to end points."""
-        # Create adjacency maps
-        outgoing_map = {}
-        incoming_map = {}
-        
-        # Process connections
-        for conn_line in self.connections:
-            for source, target in self.extract_connections(conn_line):
-                # Build outgoing connections
-                if source not in outgoing_map:
-                    outgoing_map[source] = set()
-                outgoing_map[source].add(target)
-                
-                # Build incoming connections
-                if target not in incoming_map:
-                    incoming_map[target] = set()
-                incoming_map[target].add(source)
+        return [(token.source, token.target)
+                for token in tokenize_line(line.strip())
+                if isinstance(token, EdgeToken)]
+
+    @property
+    def graph(self):
+        """The compiled network graph, built from the connection lines if none was given."""
+        if self._graph is None:
+            self._graph = NetworkGraph.from_edges(parse_mermaid(self.connections).edges)
+        return self._graph
+
+    @timed("find_all_paths")
+    def find_all_paths(self, start_points, end_points, previous_data=None, affected=None):
+        """
+        Find paths from start points to end points, within the global budget.
+        Stops listing once max_paths paths are stored or time_budget seconds
+        have passed, and marks the results as truncated.
+        
+        When previous_data (an earlier get_path_data() result) and the set of
+        affected end points are given, the paths and diagnostics of every
+        other end point are copied from previous_data instead of recomputed.
         
-        # Find root nodes (nodes with no incoming connections)
-        all_nodes = set(outgoing_map.keys()) | set(incoming_map.keys())
-        root_nodes = {node for node in all_nodes if node not in incoming_map}
+        should_stop is polled between end points and while listing; once it
+        returns True the run stops early and cancelled is set.
+        """
+        graph = self.graph
+        self.start_points = list(start_points)
+        
+        # Which roots and start points reach every node, computed once for all end points
+        start_nodes = [graph.index[start] for start in start_points if start in graph]
+        reachability = ReachabilityIndex(graph, graph.roots.tolist() + start_nodes)
+        root_mask = reachability.mask(graph.roots.tolist())
+        start_mask = reachability.mask(start_nodes)
         
         # Clear previous results
         self.paths = {}
-        self.diagnostics = []
+        self.diagnostics = self._describe_loops()
+        self.end_diagnostics = {}
+        self.reused_end_points = []
+        self.truncated = False
+        self.cancelled = False
+        remaining = self.max_paths
+        deadline = time.monotonic() + self.time_budget
+        reusable = self._get_reusable_results(previous_data, affected)
+        end_points = list(end_points)
         
         # Process each end point
-        for end in end_points:
+        for done, end in enumerate(end_points):
+            if self._stopped():
+                break
+            if self.progress:
+                self.progress(done, len(end_points))
             self.paths[end] = []
+            self.end_diagnostics[end] = []
+            
+            # Unchanged part of the network: take the stored results as they are
+            if end in reusable:
+                paths, diagnostics = reusable[end]
+                if len(paths) > remaining:
+                    paths = paths[:max(remaining, 0)]
+                    self.truncated = True
+                self.paths[end] = paths
+                remaining -= len(paths)
+                for message in diagnostics:
+                    self._add_diagnostic(end, message)
+                self.reused_end_points.append(end)
+                continue
             
             # Verify end point exists in the graph
-            if end not in incoming_map and end not in outgoing_map:
-                self.diagnostics.append(f"Warning: End point {end} is not connected to the network")
+            end_index = graph.index.get(end)
+            if end_index is None:
+                self._add_diagnostic(end, f"Warning: End point {end} is not connected to the network")
                 continue
                 
             # For efficiency, first check if end point is reachable from any root
-            reachable_nodes = self._get_reachable_nodes(end, incoming_map)
-            if not (reachable_nodes & root_nodes):
-                self.diagnostics.append(f"Warning: No complete path exists to {end} from any source")
-                self._analyze_path_breaks(end, incoming_map, outgoing_map)
+            if not reachability.reaches(end_index, root_mask):
+                self._add_diagnostic(end, f"Warning: No complete path exists to {end} from any source")
+                self._analyze_path_breaks(end, end_index, reachability, start_mask)
+                continue
+                
+            if not reachability.reaches(end_index, start_mask):
+                self._add_diagnostic(end, f"Warning: No paths found to {end} from specified start points")
+                self._analyze_path_breaks(end, end_index, reachability, start_mask)
+                continue
+                
+            # List paths from the start points until the budget runs out
+            if remaining <= 0 or self.truncated:
+                self.truncated = True
+                continue
+                
+            # Ask for one extra path to detect that the budget cuts this end point short
+            self.paths[end] = list(
+                self.iter_paths(end, limit=remaining + 1, deadline=deadline, on_deadline=self._mark_truncated)
+            )
+            if len(self.paths[end]) > remaining:
+                self.paths[end].pop()
+                self.truncated = True
+            remaining -= len(self.paths[end])
+            
+        if self.progress and not self.cancelled:
+            self.progress(len(end_points), len(end_points))
+        if self.truncated:
+            self.diagnostics.append(
+                f"Note: Path listing truncated after {self.max_paths - remaining} paths "
+                f"(budget: {self.max_paths} paths, {self.time_budget:g} s)"
+            )
+        annotate(end_points=len(end_points), listed_paths=self.max_paths - remaining,
+                 reused_end_points=len(self.reused_end_points), truncated=self.truncated)
+
+    def _mark_truncated(self):
+        self.truncated = True
+
+    def _stopped(self):
+        """Poll should_stop and remember a cancellation."""
+        if not self.cancelled and self.should_stop and self.should_stop():
+            self.cancelled = True
+        return self.cancelled
+
+    def _add_diagnostic(self, end, message):
+        """Record a diagnostic line that belongs to one end point."""
+        self.diagnostics.append(message)
+        self.end_diagnostics[end].append(message)
+
+    @staticmethod
+    def _get_reusable_results(previous_data, affected):
+        """
+        Map each end point outside `affected` to its (paths, diagnostics) in
+        previous_data. Nothing is reusable when the previous listing was
+        truncated or predates per-end-point diagnostics.
+        """
+        if (not previous_data or affected is None or previous_data.get("truncated")
+                or "end_diagnostics" not in previous_data):
+            return {}
+            
+        previous_paths = previous_data.get("paths", {})
+        return {
+            end: ([info["path"] for info in previous_paths.get(end, [])], diagnostics)
+            for end, diagnostics in previous_data["end_diagnostics"].items()
+            if end not in affected
+        }
+
+    def iter_paths(self, end, offset=0, limit=None, deadline=None, on_deadline=None):
+        """
+        Lazily yield paths from the start points to one end point.
+        Skips the first `offset` paths and stops after `limit` paths or when
+        the time budget (or the given deadline) is exceeded, in which case
+        on_deadline() is called. Only one path is held at a time.
+        """
+        graph = self.graph
+        end_index = graph.index.get(end)
+        if end_index is None:
+            return
+        if deadline is None:
+            deadline = time.monotonic() + self.time_budget
+            
+        # Only walk nodes that can still reach the end point
+        reachable_nodes = self._get_reachable_nodes(end_index)
+        
+        # Start points among those nodes, in start point order
+        start_positions = self._get_start_positions()
+        if len(reachable_nodes) < len(start_positions):
+            starts = sorted((node for node in reachable_nodes if node in start_positions),
+                            key=start_positions.get)
+        else:
+            starts = [node for node in start_positions if node in reachable_nodes]
+        
+        def walk():
+            for start_index in starts:
+                for path in self._find_paths(start_index, end_index, reachable_nodes):
+                    if self._stopped():
+                        return
+                    if time.monotonic() > deadline:
+                        if on_deadline:
+                            on_deadline()
+                        return
+                    yield graph.ids(path)
+        
+        stop = None if limit is None else offset + limit
+        yield from islice(walk(), offset, stop)
+
+    @timed("count_paths")
+    def count_paths(self, start_points, end_points):
+        """
+        Count paths from start points to each end point without listing them.
+        Runs one topological sweep over the condensed graph (loops collapsed
+        into single steps) and returns, per end point, the number of paths and
+        their shortest, longest and total length (in segments).
+        """
+        graph = self.graph
+        successors = graph.successor_lists()
+        component, members = graph.strongly_connected_components()
+        starts = {graph.index[start] for start in start_points if start in graph}
+        self.start_points = list(start_points)
+        self.count_diagnostics = self._describe_loops()
+        self.path_counts = {}
+        self.cancelled = False
+        
+        def add(stats, node, current, steps):
+            # Extend the paths summarized by current by `steps` segments into node
+            count, shortest, longest, total = current
+            following = stats.get(node)
+            if following is None:
+                stats[node] = [count, shortest + steps, longest + steps, total + count * steps]
+            else:
+                following[0] += count
+                following[1] = min(following[1], shortest + steps)
+                following[2] = max(following[2], longest + steps)
+                following[3] += total + count * steps
+        
+        # Per node: [path count, shortest length, longest length, total length]
+        arriving = {}  # paths entering a node from outside its component
+        stats = {}     # paths ending at a node
+        for c in range(len(members) - 1, -1, -1):
+            if not c % 1024 and self._stopped():
+                return self.path_counts
+            group = members[c]
+            for node in group:
+                if node in starts:
+                    add(arriving, node, [1, 0, 0, 0], 0)
+            entries = [(node, arriving[node]) for node in group if node in arriving]
+            if not entries:
+                continue
+                
+            if len(group) == 1:
+                node, current = entries[0]
+                stats[node] = current
+                for next_node in successors[node]:
+                    if next_node != node:
+                        add(arriving, next_node, current, 1)
                 continue
                 
-            # Find paths from each start point
-            for start in start_points:
-                paths = self._find_paths(start, end, outgoing_map)
-                if paths:
-                    self.paths[end].extend(paths)
+            # Loop: each entry reaches every member, and every exit, along one shortest route
+            for node in group:
+                for entry, current in entries:
+                    add(stats, node, current, len(graph.route_within_component(entry, node)) - 1)
+            for exit_node, next_node in graph.component_exits(c):
+                for entry, current in entries:
+                    add(arriving, next_node, current, len(graph.route_within_component(entry, exit_node)))
+        
+        for end in end_points:
+            count, shortest, longest, total = stats.get(graph.index.get(end), (0, 0, 0, 0))
+            self.path_counts[end] = {
+                "count": count,
+                "min_length": shortest,
+                "max_length": longest,
+                "total_length": total
+            }
             
-            if not self.paths[end]:
-                self.diagnostics.append(f"Warning: No paths found to {end} from specified start points")
-                self._analyze_path_breaks(end, incoming_map, outgoing_map)
+        annotate(nodes=graph.num_nodes, edges=graph.num_edges, end_points=len(self.path_counts),
+                 paths=sum(stats["count"] for stats in self.path_counts.values()))
+        return self.path_counts
 
-    def _get_reachable_nodes(self, target, incoming_map):
-        """Get all nodes that can reach the target."""
+    def _describe_loops(self):
+        """One diagnostic line per loop in the network."""
+        node_ids = self.graph.node_ids
+        return [
+            f"Warning: Loop detected between {', '.join(sorted(node_ids[node] for node in loop))}; "
+            "paths cross it once along its shortest route"
+            for loop in self.graph.loops()
+        ]
+
+    def _get_reachable_nodes(self, target):
+        """Get the indices of all nodes that can reach the target."""
+        predecessors = self.graph.predecessor_lists()
         reachable = set()
         to_visit = {target}
         
         while to_visit:
             node = to_visit.pop()
             reachable.add(node)
-            if node in incoming_map:
-                for prev_node in incoming_map[node]:
-                    if prev_node not in reachable:
-                        to_visit.add(prev_node)
+            for prev_node in predecessors[node]:
+                if prev_node not in reachable:
+                    to_visit.add(prev_node)
         
         return reachable
 
-    def _analyze_path_breaks(self, end_node, incoming_map, outgoing_map):
-        """Analyze and report where paths break."""
-        current_nodes = {end_node}
-        visited = set()
-        level = 0
-        
-        while current_nodes:
-            next_nodes = set()
-            for node in current_nodes:
-                if node not in incoming_map:
-                    self.diagnostics.append(f"  - Path breaks at {node} (level {level}): No incoming connections")
-                else:
-                    for prev_node in incoming_map[node]:
-                        if prev_node not in visited:
-                            next_nodes.add(prev_node)
-                            visited.add(prev_node)
-            current_nodes = next_nodes
-            level += 1
-
-    def _find_paths(self, start, end, outgoing_map, path=None, visited=None):
-        """
-        Recursively find all paths from start to end.
-        Uses visited set to prevent cycles.
-        """
-        if path is None:
-            path = [start]
-        if visited is None:
-            visited = {start}
-            
-        if start == end:
-            return [path]
+    def _analyze_path_breaks(self, end, end_node, reachability, start_mask):
+        """
+        Analyze and report where paths break: the upstream nodes without
+        incoming connections that feed the end point but are not start points.
+        """
+        node_ids = self.graph.node_ids
+        for node in reachability.sources_reaching(end_node, ~start_mask).tolist():
+            if not self.graph.in_degree[node]:
+                self._add_diagnostic(end, f"  - Path breaks at {node_ids[node]}: No incoming connections")
+
+    def _find_paths(self, start, end, allowed):
+        """
+        Yield all paths (as node indices) from start to end through allowed nodes.
+        Walks the condensed graph with an explicit stack and one shared path
+        buffer; the yielded list is reused, so callers must copy it. Each loop
+        is crossed once along its shortest route, so loops never multiply paths.
+        """
+        path = [start]
+        stack = [(self._path_steps(start, end, allowed), 1)]
+        
+        while stack:
+            steps, length = stack[-1]
+            step = next(steps, None)
+            if step is None:
+                stack.pop()
+                continue
+                
+            # Drop whatever the previous step of this frame appended
+            del path[length:]
+            segment, next_node = step
+            path.extend(segment)
+            if next_node is None:
+                yield path
+            else:
+                stack.append((self._path_steps(next_node, end, allowed), len(path)))
+
+    def _path_steps(self, node, end, allowed):
+        """
+        Yield the ways to continue a path that has just entered node's component:
+        (segment, next_node) to leave it towards next_node, or (segment, None)
+        when the segment finishes the path at end.
+        """
+        graph = self.graph
+        component, members = graph.strongly_connected_components()
+        c = component[node]
+        
+        if component[end] == c:
+            yield graph.route_within_component(node, end)[1:], None
+            return
             
-        if start not in outgoing_map:
-            return []
+        if len(members[c]) == 1:
+            for next_node in graph.successor_lists()[node]:
+                if next_node != node and next_node in allowed:
+                    yield [next_node], next_node
+            return
             
-        paths = []
-        for next_node in outgoing_map[start]:
-            if next_node not in visited:
-                visited.add(next_node)
-                new_paths = self._find_paths(next_node, end, outgoing_map, 
-                                           path + [next_node], visited)
-                paths.extend(new_paths)
-                visited.remove(next_node)
-                
-        return paths
+        for exit_node, next_node in graph.component_exits(c):
+            if next_node in allowed:
+                yield graph.route_within_component(node, exit_node)[1:] + [next_node], next_node
+
+    def _get_path_type(self, end_point):
+        """Determine path type based on end point."""
+        if end_point.startswith('F'):
+            return "Field Connection"
+        elif end_point.startswith('MC'):
+            return "Canal Connection"
+        elif end_point.startswith('ZT'):
+            return "Gate Connection"
+        elif end_point.startswith('SW'):
+            return "Smart Water Connection"
+        return "Other Connection"
+
+    def _describe_paths(self, end_point, paths):
+        """Wrap paths to one end point in path info dicts."""
+        path_type = self._get_path_type(end_point)
+        return [
+            {
+                "path": path,
+                "length": len(path) - 1,  # Number of segments
+                "type": path_type
+            }
+            for path in paths
+        ]
+
+    def get_path_page(self, end_point, offset, limit):
+        """
+        One page of path info dicts to a single end point, from the paths
+        stored by find_all_paths (or load_path_data). Paths past the stored
+        listing aren't served: reaching them would mean enumerating every path
+        before them again, for each page.
+        """
+        return self._describe_paths(end_point, self.paths.get(end_point, [])[offset:offset + limit])
 
-    def get_path_data(self):
+    def get_end_point_summary(self):
+        """
+        Per end point (sorted): its path count, how many of those paths are
+        stored (and can be paged through) and its path type.
         """
-        Get path data in a structured format suitable for the React component.
-        Returns a dictionary with diagnostics and paths.
+        return [
+            {
+                "end_point": end_point,
+                "count": self.path_counts.get(end_point, {}).get("count", len(self.paths[end_point])),
+                "listed": len(self.paths[end_point]),
+                "type": self._get_path_type(end_point)
+            }
+            for end_point in sorted(self.paths)
+        ]
+
+    @timed("get_path_data")
+    def get_path_data(self, offset=0, limit=None):
+        """
+        Get path data in a structured format suitable for the path viewer.
+        Returns a dictionary with diagnostics and paths. Without a limit the
+        paths stored by find_all_paths are returned; with a limit, one page of
+        paths per end point is listed lazily starting at offset.
         """
         data = {
             "diagnostics": self.diagnostics,
-            "paths": {}
+            "end_diagnostics": self.end_diagnostics,
+            "paths": {},
+            "path_counts": {end: stats["count"] for end, stats in self.path_counts.items()},
+            "offset": offset,
+            "limit": limit
         }
         
-        for end_point, paths in sorted(self.paths.items()):
-            if paths:
-                data["paths"][end_point] = []
-                for path in paths:
-                    # Determine path type based on end point
-                    if end_point.startswith('F'):
-                        path_type = "Field Connection"
-                    elif end_point.startswith('MC'):
-                        path_type = "Canal Connection"
-                    elif end_point.startswith('ZT'):
-                        path_type = "Gate Connection"
-                    elif end_point.startswith('SW'):
-                        path_type = "Smart Water Connection"
-                    else:
-                        path_type = "Other Connection"
-                    
-                    path_info = {
-                        "path": path,
-                        "length": len(path) - 1,  # Number of segments
-                        "type": path_type
-                    }
-                    data["paths"][end_point].append(path_info)
+        if limit is None:
+            pages = sorted(self.paths.items())
+        else:
+            pages = [(end_point, self.iter_paths(end_point, offset, limit))
+                     for end_point in sorted(self.paths)]
         
+        for end_point, paths in pages:
+            path_infos = self._describe_paths(end_point, paths)
+            if path_infos:
+                data["paths"][end_point] = path_infos
+        
+        data["truncated"] = self.truncated
         return data
 
+    @timed("load_path_data")
+    def load_path_data(self, path_data, path_counts):
+        """
+        Restore the results of an earlier run from its get_path_data() output
+        (without a limit) and count_paths() result, e.g. from the analysis cache.
+        Set start_points first; paging then works as after find_all_paths.
+        """
+        stored_paths = path_data.get("paths", {})
+        self.diagnostics = list(path_data.get("diagnostics", []))
+        self.end_diagnostics = dict(path_data.get("end_diagnostics", {}))
+        self.paths = {
+            end: [info["path"] for info in stored_paths.get(end, [])]
+            for end in self.end_diagnostics
+        }
+        self.path_counts = path_counts
+        self.reused_end_points = []
+        self.truncated = path_data.get("truncated", False)
+
     def get_path_summary(self):
         """Get a text summary of all found paths with diagnostics (legacy format)."""
         summary = "Path Summary:\n"
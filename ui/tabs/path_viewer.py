@@ -0,0 +1,55 @@
+# ui/tabs/path_viewer.py
+
+import json
+from pathlib import Path
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from .path_extractor import PAGE_SIZE
+
+# Offline viewer page; loads only local files and Qt's qwebchannel.js
+VIEWER_PAGE = Path(__file__).parent / 'path_viewer' / 'index.html'
+
+
+class PathViewerBridge(QObject):
+    """
+    Serves path analysis results to the path viewer page over QWebChannel
+    (registered as 'pathViewer'). The page asks for a summary first and then
+    for pages of paths as they scroll into view, so no result set is ever
+    sent to the page as a whole.
+    """
+    dataChanged = Signal()
+    timingReported = Signal(str, float)  # step name, milliseconds measured by the page
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path_extractor = None
+
+    def set_path_extractor(self, path_extractor):
+        """Show the results of a PathExtractor (None clears the viewer)."""
+        self.path_extractor = path_extractor
+        self.dataChanged.emit()
+
+    @Slot(result=str)
+    def getSummary(self) -> str:
+        """Diagnostics and per-end-point path counts, as JSON."""
+        if not self.path_extractor:
+            return json.dumps(None)
+        return json.dumps({
+            "diagnostics": self.path_extractor.diagnostics,
+            "endPoints": self.path_extractor.get_end_point_summary(),
+            "truncated": self.path_extractor.truncated,
+            "pageSize": PAGE_SIZE
+        })
+
+    @Slot(str, float)
+    def reportTiming(self, name: str, milliseconds: float):
+        """Called by the page with its own measurements (e.g. rendering)."""
+        self.timingReported.emit(name, milliseconds)
+
+    @Slot(str, int, int, result=str)
+    def getPathPage(self, end_point: str, offset: int, limit: int) -> str:
+        """One page of paths to an end point, as a JSON list of path infos."""
+        if not self.path_extractor or end_point not in self.path_extractor.paths:
+            return json.dumps([])
+        return json.dumps(self.path_extractor.get_path_page(end_point, offset, limit))
@@ -0,0 +1,246 @@
+// ui/tabs/path_viewer/path_viewer.js
+//
+// Windowed path viewer. Plain browser JavaScript (no build step, no external
+// libraries): only the rows inside the viewport are in the DOM, and paths are
+// fetched from Python (PathViewerBridge) one page at a time over QWebChannel.
+
+(function () {
+    "use strict";
+
+    var ROW_HEIGHT = 24;       // must match .row in path_viewer.css
+    var OVERSCAN = 20;         // rows rendered above and below the viewport
+    var MAX_CACHED_PAGES = 200;
+
+    var bridge = null;
+    var summary = null;
+    var blocks = [];           // [{start, length, kind, index}] covering every row
+    var totalRows = 0;
+    var expandedSections = { diagnostics: true, paths: true };
+    var expandedEnds = {};
+    var pages = new Map();     // "endPoint|page" -> array of path infos, or null while loading
+    var renderQueued = false;
+    var summaryRequested = null;   // performance.now() of the pending summary request
+
+    var viewport, spacer, rowsElement, statusElement;
+
+    function escapeHtml(text) {
+        return String(text)
+            .replace(/&/g, "&amp;")
+            .replace(/</g, "&lt;")
+            .replace(/>/g, "&gt;")
+            .replace(/"/g, "&quot;");
+    }
+
+    function nodeClass(node) {
+        if (node.startsWith("F")) return "node-F";
+        if (node.startsWith("MC")) return "node-MC";
+        if (node.startsWith("SW")) return "node-SW";
+        if (node.startsWith("ZT")) return "node-ZT";
+        if (node.startsWith("DP")) return "node-DP";
+        return "node-other";
+    }
+
+    // Row layout --------------------------------------------------------------
+
+    function addBlock(kind, length, index) {
+        blocks.push({ start: totalRows, length: length, kind: kind, index: index });
+        totalRows += length;
+    }
+
+    function buildBlocks() {
+        blocks = [];
+        totalRows = 0;
+        if (!summary) {
+            return;
+        }
+        if (summary.diagnostics.length > 0) {
+            addBlock("section", 1, "diagnostics");
+            if (expandedSections.diagnostics) {
+                addBlock("diagnostics", summary.diagnostics.length, 0);
+            }
+        }
+        addBlock("section", 1, "paths");
+        if (expandedSections.paths) {
+            summary.endPoints.forEach(function (endPoint, index) {
+                addBlock("end", 1, index);
+                // Only the stored paths can be paged through; the count may be far larger
+                // (and its rows taller than the browser can scroll)
+                if (expandedEnds[endPoint.end_point] && endPoint.listed > 0) {
+                    addBlock("paths", endPoint.listed, index);
+                }
+            });
+        }
+    }
+
+    function blockAt(row) {
+        var low = 0;
+        var high = blocks.length - 1;
+        while (low < high) {
+            var middle = (low + high + 1) >> 1;
+            if (blocks[middle].start <= row) {
+                low = middle;
+            } else {
+                high = middle - 1;
+            }
+        }
+        return blocks[low];
+    }
+
+    // Paging ------------------------------------------------------------------
+
+    function getPathInfo(endPoint, index) {
+        var pageSize = summary.pageSize;
+        var page = Math.floor(index / pageSize);
+        var key = endPoint + "|" + page;
+        if (!pages.has(key)) {
+            if (pages.size >= MAX_CACHED_PAGES) {
+                pages.clear();
+            }
+            pages.set(key, null);
+            bridge.getPathPage(endPoint, page * pageSize, pageSize, function (result) {
+                pages.set(key, JSON.parse(result));
+                queueRender();
+            });
+        }
+        var infos = pages.get(key);
+        return infos ? (infos[index - page * pageSize] || null) : undefined;
+    }
+
+    // Rendering ---------------------------------------------------------------
+
+    function renderRow(row) {
+        var block = blockAt(row);
+        var offset = row - block.start;
+        var top = "style=\"top:" + (row * ROW_HEIGHT) + "px\"";
+
+        if (block.kind === "section") {
+            var open = expandedSections[block.index] ? "▼" : "▶";
+            var title = block.index === "diagnostics" ? "Diagnostic Information" : "Paths Found";
+            return "<div class=\"row section\" data-section=\"" + block.index + "\" " + top + ">" +
+                open + " " + title + "</div>";
+        }
+        if (block.kind === "diagnostics") {
+            var diagnostic = summary.diagnostics[offset];
+            return "<div class=\"row diagnostic\" title=\"" + escapeHtml(diagnostic) + "\" " + top + ">• " +
+                escapeHtml(diagnostic) + "</div>";
+        }
+
+        var endPoint = summary.endPoints[block.index];
+        if (block.kind === "end") {
+            var expanded = expandedEnds[endPoint.end_point] ? "▼" : "▶";
+            var listed = endPoint.listed < endPoint.count ? ", first " + endPoint.listed + " listed" : "";
+            return "<div class=\"row end-point\" data-end=\"" + block.index + "\" " + top + ">" +
+                expanded + " Paths to " + escapeHtml(endPoint.end_point) + " (" + endPoint.count + " found" +
+                listed + ")</div>";
+        }
+
+        var info = getPathInfo(endPoint.end_point, offset);
+        if (info === undefined) {
+            return "<div class=\"row path loading\" " + top + ">Loading path " + (offset + 1) + "…</div>";
+        }
+        if (info === null) {
+            return "<div class=\"row path loading\" " + top + ">Path " + (offset + 1) +
+                " not listed (path budget exceeded)</div>";
+        }
+        var nodes = info.path.map(function (node) {
+            return "<span class=\"" + nodeClass(node) + "\">" + escapeHtml(node) + "</span>";
+        }).join("<span class=\"arrow\">→</span>");
+        return "<div class=\"row path\" title=\"" + escapeHtml(info.path.join(" → ")) + "\" " + top + ">" +
+            "<span class=\"path-title\">Path " + (offset + 1) + " (" + info.length + " segments) - " +
+            escapeHtml(info.type) + "</span>" + nodes + "</div>";
+    }
+
+    function render() {
+        renderQueued = false;
+        spacer.style.height = (totalRows * ROW_HEIGHT) + "px";
+        if (totalRows === 0) {
+            rowsElement.innerHTML = "";
+            return;
+        }
+        var first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+        var last = Math.min(totalRows - 1,
+            Math.ceil((viewport.scrollTop + viewport.clientHeight) / ROW_HEIGHT) + OVERSCAN);
+        var html = [];
+        for (var row = first; row <= last; row++) {
+            html.push(renderRow(row));
+        }
+        rowsElement.innerHTML = html.join("");
+        reportSummaryTiming();
+    }
+
+    function reportSummaryTiming() {
+        // Time from asking for new results to their first rendered rows, shown in the timing panel
+        if (summaryRequested !== null && summary) {
+            bridge.reportTiming("path viewer summary and first render", performance.now() - summaryRequested);
+        }
+        summaryRequested = null;
+    }
+
+    function queueRender() {
+        if (!renderQueued) {
+            renderQueued = true;
+            window.requestAnimationFrame(render);
+        }
+    }
+
+    // Data --------------------------------------------------------------------
+
+    function showSummary(result) {
+        summary = JSON.parse(result);
+        expandedEnds = {};
+        pages.clear();
+        viewport.scrollTop = 0;
+
+        if (!summary) {
+            statusElement.textContent = "No path analysis yet";
+        } else {
+            var total = summary.endPoints.reduce(function (sum, endPoint) { return sum + endPoint.count; }, 0);
+            statusElement.textContent = summary.endPoints.length + " end points, " + total + " paths" +
+                (summary.truncated ? " (stored listing truncated by the path budget)" : "");
+        }
+        buildBlocks();
+        queueRender();
+    }
+
+    function loadSummary() {
+        summaryRequested = performance.now();
+        bridge.getSummary(showSummary);
+    }
+
+    function onClick(event) {
+        var target = event.target.closest(".section, .end-point");
+        if (!target || !summary) {
+            return;
+        }
+        if (target.dataset.section) {
+            var section = target.dataset.section;
+            expandedSections[section] = !expandedSections[section];
+        } else {
+            var endPoint = summary.endPoints[Number(target.dataset.end)].end_point;
+            expandedEnds[endPoint] = !expandedEnds[endPoint];
+        }
+        buildBlocks();
+        queueRender();
+    }
+
+    window.addEventListener("DOMContentLoaded", function () {
+        viewport = document.getElementById("viewport");
+        spacer = document.getElementById("spacer");
+        rowsElement = document.getElementById("rows");
+        statusElement = document.getElementById("status");
+
+        viewport.addEventListener("scroll", queueRender);
+        window.addEventListener("resize", queueRender);
+        rowsElement.addEventListener("click", onClick);
+
+        if (typeof qt === "undefined") {
+            statusElement.textContent = "Path viewer must be opened from the application";
+            return;
+        }
+        new QWebChannel(qt.webChannelTransport, function (channel) {
+            bridge = channel.objects.pathViewer;
+            bridge.dataChanged.connect(loadSummary);
+            loadSummary();
+        });
+    });
+})();
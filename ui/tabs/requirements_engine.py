@@ -0,0 +1,430 @@
+# ui/tabs/requirements_engine.py
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from utils.profiling import span
+from .delivery_scheduler import FIELD_TYPES, component_prefix
+from .network_analysis import _check_cancelled, _report
+from .network_graph import NetworkGraph
+from .network_loader import network_loader
+
+# Crop water requirements on a compiled NetworkGraph, without any Qt objects.
+#
+# Reference evapotranspiration ET0 is computed per weather station and day
+# with the FAO-56 Penman-Monteith equation (FAO Irrigation and Drainage
+# Paper 56, chapters 3 and 4), and crop evapotranspiration as
+# ETc = Kc * ET0 with the FAO-56 four-stage crop coefficient curves.
+# Everything is an array shaped fields x days: a field's Kc row is shared
+# by all fields with the same crop and planting date, its ET0 and rain rows
+# are its station's.
+#
+# The gross irrigation requirement of a field is ETc less effective rain,
+# divided by the field's irrigation efficiency, times its area. Canal and
+# distribution point totals sum the fields they supply, following the same
+# breadth-first supply tree as the delivery scheduler, in one sparse
+# matrix product.
+
+# Node types that demand is aggregated to
+AGGREGATE_TYPES = ('DP', 'MC')
+
+# FAO-56 Tables 11 and 12: Kc ini, Kc mid, Kc end and the initial,
+# development, mid-season and late stage lengths in days
+CROPS = {
+    'cotton': (0.35, 1.15, 0.70, (30, 50, 60, 55)),
+    'winter wheat': (0.70, 1.15, 0.25, (30, 140, 40, 30)),
+    'maize': (0.30, 1.20, 0.60, (30, 40, 50, 30)),
+    'rice': (1.05, 1.20, 0.90, (30, 30, 60, 30)),
+    'alfalfa': (0.40, 0.95, 0.90, (10, 30, 130, 10)),
+    'tomato': (0.60, 1.15, 0.80, (30, 40, 40, 25)),
+    'potato': (0.50, 1.15, 0.75, (25, 30, 45, 30)),
+    'melon': (0.50, 0.85, 0.60, (25, 35, 40, 20))
+}
+
+DEFAULT_SETTINGS = {
+    'crop': 'cotton',
+    'planting_date': None,   # ISO date; None plants at the season start
+    'area_ha': 1.0,
+    'efficiency': 0.7,       # share of the water delivered to a field that the crop uses
+    'effective_rain': 0.8,   # share of rain the crop uses
+    'latitude': 40.5,        # degrees, south negative
+    'elevation': 450.0,      # m above sea level
+    'station': None          # weather station; None takes the first
+}
+
+# Field properties overriding the settings above
+FIELD_PROPERTIES = ('crop', 'planting_date', 'area_ha', 'efficiency', 'station')
+
+# Weather files kept in memory
+WEATHER_CACHE_SIZE = 4
+
+SOLAR_CONSTANT = 0.0820   # MJ m-2 min-1
+STEFAN_BOLTZMANN = 4.903e-9  # MJ K-4 m-2 day-1
+
+
+def saturation_vapour_pressure(temperature: np.ndarray) -> np.ndarray:
+    """e°(T) in kPa (FAO-56 eq. 11)."""
+    return 0.6108 * np.exp(17.27 * temperature / (temperature + 237.3))
+
+
+def extraterrestrial_radiation(latitude: float, day_of_year: np.ndarray):
+    """Ra in MJ m-2 day-1 and daylight hours N (FAO-56 eqs. 21-25, 34)."""
+    phi = np.radians(latitude)
+    inverse_distance = 1 + 0.033 * np.cos(2 * np.pi * day_of_year / 365)
+    declination = 0.409 * np.sin(2 * np.pi * day_of_year / 365 - 1.39)
+    sunset_angle = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1.0, 1.0))
+    ra = (24 * 60 / np.pi) * SOLAR_CONSTANT * inverse_distance * (
+        sunset_angle * np.sin(phi) * np.sin(declination)
+        + np.cos(phi) * np.cos(declination) * np.sin(sunset_angle)
+    )
+    return ra, 24 / np.pi * sunset_angle
+
+
+def penman_monteith_et0(tmin, tmax, day_of_year, latitude: float, elevation: float,
+                        wind=None, rh_mean=None, rh_min=None, rh_max=None, tdew=None,
+                        solar_radiation=None, sunshine_hours=None) -> np.ndarray:
+    """
+    Daily FAO-56 Penman-Monteith reference evapotranspiration (mm/day).
+    Arguments are arrays of the same shape (or None where not measured):
+    temperatures in °C, wind speed at 2 m in m/s, relative humidity in %,
+    solar radiation in MJ m-2 day-1. Missing humidity falls back to
+    Tdew = Tmin, missing radiation to sunshine hours or the Hargreaves
+    estimate from the temperature range, missing wind to 2 m/s (FAO-56
+    chapter 3).
+    """
+    tmin = np.asarray(tmin, dtype=float)
+    tmax = np.asarray(tmax, dtype=float)
+    tmean = (tmin + tmax) / 2
+
+    pressure = 101.3 * ((293 - 0.0065 * elevation) / 293) ** 5.26
+    psychrometric = 0.665e-3 * pressure
+    e_tmin = saturation_vapour_pressure(tmin)
+    e_tmax = saturation_vapour_pressure(tmax)
+    es = (e_tmin + e_tmax) / 2
+    slope = 4098 * saturation_vapour_pressure(tmean) / (tmean + 237.3) ** 2
+
+    if tdew is not None:
+        ea = saturation_vapour_pressure(np.asarray(tdew, dtype=float))
+    elif rh_min is not None and rh_max is not None:
+        ea = (e_tmin * np.asarray(rh_max) / 100 + e_tmax * np.asarray(rh_min) / 100) / 2
+    elif rh_mean is not None:
+        ea = es * np.asarray(rh_mean) / 100
+    else:
+        ea = e_tmin
+
+    ra, daylight_hours = extraterrestrial_radiation(latitude, np.asarray(day_of_year, dtype=float))
+    if solar_radiation is not None:
+        rs = np.asarray(solar_radiation, dtype=float)
+    elif sunshine_hours is not None:
+        rs = (0.25 + 0.50 * np.asarray(sunshine_hours) / daylight_hours) * ra
+    else:
+        rs = 0.16 * np.sqrt(np.maximum(tmax - tmin, 0.0)) * ra
+    clear_sky = (0.75 + 2e-5 * elevation) * ra
+
+    net_shortwave = (1 - 0.23) * rs
+    relative_shortwave = np.clip(np.divide(rs, clear_sky, out=np.ones_like(rs), where=clear_sky > 0), 0.3, 1.0)
+    net_longwave = (
+        STEFAN_BOLTZMANN * ((tmax + 273.16) ** 4 + (tmin + 273.16) ** 4) / 2
+        * (0.34 - 0.14 * np.sqrt(np.maximum(ea, 0.0)))
+        * (1.35 * relative_shortwave - 0.35)
+    )
+    net_radiation = net_shortwave - net_longwave  # soil heat flux G is ~0 for daily steps
+
+    u2 = np.full_like(tmean, 2.0) if wind is None else np.asarray(wind, dtype=float)
+    et0 = (
+        0.408 * slope * net_radiation
+        + psychrometric * (900 / (tmean + 273)) * u2 * (es - ea)
+    ) / (slope + psychrometric * (1 + 0.34 * u2))
+    return np.maximum(et0, 0.0)
+
+
+class WeatherData:
+    """
+    Daily weather per station as arrays shaped stations x days. ET0 is
+    computed once per site (latitude, elevation) and kept.
+    """
+    VARIABLES = ('tmin', 'tmax', 'rh_mean', 'rh_min', 'rh_max', 'tdew', 'wind',
+                 'solar_radiation', 'sunshine_hours', 'rain')
+
+    def __init__(self, dates: np.ndarray, stations: List[str], variables: Dict[str, np.ndarray], source: str = ""):
+        self.dates = dates.astype('datetime64[D]')
+        self.stations = stations
+        self.variables = variables
+        self.source = source
+        self._et0 = {}
+        self._lock = threading.Lock()
+
+    @property
+    def first_date(self) -> date:
+        return self.dates[0].item()
+
+    @property
+    def last_date(self) -> date:
+        return self.dates[-1].item()
+
+    def et0(self, latitude: float, elevation: float) -> np.ndarray:
+        key = (round(latitude, 4), round(elevation, 1))
+        with self._lock:
+            if key not in self._et0:
+                day_of_year = (self.dates - self.dates.astype('datetime64[Y]')).astype(int) + 1
+                self._et0[key] = penman_monteith_et0(
+                    self.variables['tmin'], self.variables['tmax'],
+                    np.broadcast_to(day_of_year, self.variables['tmin'].shape),
+                    latitude, elevation,
+                    **{name: self.variables.get(name) for name in self.VARIABLES[2:-1]}
+                )
+            return self._et0[key]
+
+    def on_days(self, values: np.ndarray, dates: np.ndarray) -> np.ndarray:
+        """
+        Station values on the given dates. Days without a record are
+        interpolated; days before the first or after the last record take
+        the nearest one.
+        """
+        days = self.dates.astype(np.int64)
+        wanted = dates.astype('datetime64[D]').astype(np.int64)
+        return np.stack([np.interp(wanted, days, row) for row in values])
+
+
+def load_weather(path: str) -> WeatherData:
+    """
+    Read a daily weather CSV: a date column, tmin and tmax (°C), and as
+    available rh_mean / rh_min and rh_max (%) or tdew (°C), wind (m/s at
+    2 m), solar_radiation (MJ/m²) or sunshine_hours, rain (mm), and a
+    station column when it holds several stations. Gaps in a measured
+    column are interpolated; a column with no values at all for some
+    station is left out for every station.
+    """
+    import pandas as pd
+
+    frame = pd.read_csv(path)
+    frame.columns = [column.strip().lower() for column in frame.columns]
+    missing = {'date', 'tmin', 'tmax'} - set(frame.columns)
+    if missing:
+        raise ValueError(f"weather file is missing columns: {', '.join(sorted(missing))}")
+    frame['date'] = pd.to_datetime(frame['date']).dt.normalize()
+    if 'station' not in frame.columns:
+        frame['station'] = 'default'
+    frame['station'] = frame['station'].astype(str)
+
+    dates = np.sort(frame['date'].unique()).astype('datetime64[D]')
+    stations = sorted(frame['station'].unique())
+    variables = {}
+    for name in WeatherData.VARIABLES:
+        if name not in frame.columns:
+            continue
+        table = frame.pivot_table(index='station', columns='date', values=name, aggfunc='mean')
+        table = table.reindex(index=stations, columns=pd.DatetimeIndex(dates))
+        table = table.interpolate(axis=1, limit_direction='both')
+        if name == 'rain':
+            table = table.fillna(0.0)
+        if table.isna().to_numpy().any():
+            if name in ('tmin', 'tmax'):
+                raise ValueError(f"no {name} values for station(s) "
+                                 f"{', '.join(table.index[table.isna().all(axis=1)])}")
+            continue
+        variables[name] = table.to_numpy(dtype=float)
+    return WeatherData(dates, stations, variables, path)
+
+
+class WeatherCache:
+    """Parsed weather files by path, reloaded when the file changes."""
+    def __init__(self, max_entries: int = WEATHER_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> WeatherData:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        weather = load_weather(path)
+        with self._lock:
+            self._entries[key] = weather
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return weather
+
+
+weather_cache = WeatherCache()
+
+
+@lru_cache(maxsize=256)
+def kc_curve(crop: str, planting_offset: int, days: int) -> np.ndarray:
+    """
+    FAO-56 crop coefficient per season day for a crop planted planting_offset
+    days after the season start: Kc ini through the initial stage, rising to
+    Kc mid over development, Kc mid through mid-season, falling to Kc end
+    over the late stage, 0 outside the growing period. Read-only.
+    """
+    kc_ini, kc_mid, kc_end, stages = CROPS[crop]
+    ends = np.cumsum(stages)
+    day = np.arange(days) - planting_offset
+    curve = np.interp(day, [0, ends[0], ends[1], ends[2], ends[3]],
+                      [kc_ini, kc_ini, kc_mid, kc_mid, kc_end], left=0.0, right=0.0)
+    curve[day >= ends[3]] = 0.0
+    curve.setflags(write=False)
+    return curve
+
+
+class RequirementsResult:
+    """
+    Daily requirements of a season. Field arrays are shaped fields x days
+    (rows follow `fields`), aggregate arrays nodes x days (rows follow
+    `nodes`); volumes are m³/day.
+    """
+    def __init__(self, graph: NetworkGraph, dates: np.ndarray, fields: np.ndarray, crops: List[str],
+                 area: np.ndarray, etc: np.ndarray, gross: np.ndarray,
+                 nodes: np.ndarray, node_gross: np.ndarray, node_fields: np.ndarray):
+        self.graph = graph
+        self.dates = dates
+        self.fields = fields
+        self.crops = crops
+        self.area = area                # ha
+        self.etc = etc                  # mm/day
+        self.gross = gross              # m³/day at the field inlet
+        self.nodes = nodes
+        self.node_gross = node_gross    # m³/day summed over the fields a node supplies
+        self.node_fields = node_fields  # number of fields a node supplies
+
+    @staticmethod
+    def peak_flow(daily: np.ndarray) -> np.ndarray:
+        """Highest daily volume of each row as a continuous flow in l/s."""
+        if daily.shape[1] == 0:
+            return np.zeros(daily.shape[0])
+        return daily.max(axis=1) / 86.4
+
+    def summary(self) -> Dict:
+        return {
+            'fields': len(self.fields),
+            'days': len(self.dates),
+            'area_ha': float(self.area.sum()),
+            'season_etc_mm': float(self.etc.sum(axis=1).mean()) if len(self.fields) else 0.0,
+            'season_volume_m3': float(self.gross.sum()),
+            'peak_flow_lps': float(self.gross.sum(axis=0).max() / 86.4) if self.gross.size else 0.0
+        }
+
+
+def _field_settings(graph: NetworkGraph, properties: Dict[str, Dict], fields: List[int],
+                    settings: Dict, season_start: date, stations: List[str]):
+    """Per-field crop, planting offset, area, efficiency and station index."""
+    crops, offsets, area, efficiency, station = [], [], [], [], []
+    station_index = {name: k for k, name in enumerate(stations)}
+    default_station = station_index.get(settings['station'], 0)
+    for field in fields:
+        props = properties.get(graph.node_ids[field]) or {}
+        value = {key: props[key] if props.get(key) is not None else settings[key] for key in FIELD_PROPERTIES}
+        crop = str(value['crop']).strip().lower()
+        if crop not in CROPS:
+            raise ValueError(f"{graph.node_ids[field]}: unknown crop '{value['crop']}'")
+        planting = value['planting_date']
+        offsets.append((date.fromisoformat(str(planting)) - season_start).days if planting else 0)
+        crops.append(crop)
+        area.append(float(value['area_ha']))
+        efficiency.append(min(max(float(value['efficiency']), 0.05), 1.0))
+        station.append(station_index.get(str(value['station']), default_station)
+                       if value['station'] is not None else default_station)
+    return crops, offsets, np.array(area), np.array(efficiency), np.array(station, dtype=np.int64)
+
+
+def supply_matrix(graph: NetworkGraph, fields: np.ndarray, nodes: np.ndarray):
+    """
+    Sparse nodes x fields matrix with a 1 where the node supplies the field
+    on the breadth-first supply tree, so that matrix @ field values sums
+    them per node.
+    """
+    from scipy.sparse import csr_matrix
+
+    parent, _ = graph.supply_tree()
+    row_of = np.full(graph.num_nodes, -1, dtype=np.int64)
+    row_of[nodes] = np.arange(len(nodes))
+
+    rows, columns = [], []
+    current = parent[fields]
+    column = np.arange(len(fields))
+    while len(current):
+        keep = current >= 0
+        current, column = current[keep], column[keep]
+        hit = row_of[current] >= 0
+        rows.append(row_of[current[hit]])
+        columns.append(column[hit])
+        current = parent[current]
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    columns = np.concatenate(columns) if columns else np.empty(0, dtype=np.int64)
+    return csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(nodes), len(fields)))
+
+
+def run_requirements(graph: NetworkGraph, properties: Dict[str, Dict], weather: WeatherData,
+                     season_start: date, days: int, settings: Optional[Dict] = None) -> RequirementsResult:
+    """Crop water requirements of every field for a season, and their totals per canal."""
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    prefixes = [component_prefix(node_id) for node_id in graph.node_ids]
+    fields = np.array([i for i, prefix in enumerate(prefixes) if prefix in FIELD_TYPES], dtype=np.int64)
+    nodes = np.array([i for i, prefix in enumerate(prefixes) if prefix in AGGREGATE_TYPES], dtype=np.int64)
+    dates = np.datetime64(season_start, 'D') + np.arange(days)
+
+    with span("field_settings", fields=len(fields)):
+        crops, offsets, area, efficiency, station = _field_settings(
+            graph, properties, fields.tolist(), settings, season_start, weather.stations
+        )
+
+    with span("et0", stations=len(weather.stations), days=days):
+        et0 = weather.on_days(weather.et0(settings['latitude'], settings['elevation']), dates)
+        rain = weather.variables.get('rain')
+        effective_rain = (weather.on_days(rain, dates) * settings['effective_rain']
+                          if rain is not None else np.zeros_like(et0))
+
+    with span("crop_coefficients") as timing:
+        # One curve per distinct crop and planting date, gathered into fields x days
+        curve_keys = {}
+        curve_of_field = np.array([curve_keys.setdefault(key, len(curve_keys))
+                                   for key in zip(crops, offsets)], dtype=np.int64)
+        curves = np.stack([kc_curve(crop, offset, days) for crop, offset in curve_keys]) \
+            if curve_keys else np.empty((0, days))
+        timing.set(curves=len(curve_keys))
+
+    with span("field_requirements", fields=len(fields), days=days):
+        kc = curves[curve_of_field]
+        etc = kc * et0[station]
+        net = np.maximum(etc - effective_rain[station], 0.0)
+        gross = net * (10.0 * area / efficiency)[:, None]  # 1 mm on 1 ha = 10 m³
+
+    with span("aggregate_demand", nodes=len(nodes)):
+        matrix = supply_matrix(graph, fields, nodes)
+        node_gross = np.asarray(matrix @ gross)
+        node_fields = np.asarray(matrix.sum(axis=1)).ravel().astype(np.int64)
+
+    return RequirementsResult(graph, dates, fields, crops, area, etc, gross, nodes, node_gross, node_fields)
+
+
+def run_requirements_analysis(db_ops, network_id: int, weather_path: str, season_start: date, days: int,
+                              settings: Optional[Dict] = None, progress: Optional[Callable] = None,
+                              should_stop: Optional[Callable] = None) -> Dict:
+    """
+    Load a saved network (shared network_loader) and its weather file
+    (weather_cache) and compute the season's requirements; task for
+    AnalysisWorker.
+    """
+    _report(progress, 0, "Loading network")
+    loaded = network_loader.load(db_ops, network_id)
+    _check_cancelled(should_stop)
+
+    _report(progress, 30, "Loading weather")
+    with span("load_weather"):
+        weather = weather_cache.load(weather_path)
+    _check_cancelled(should_stop)
+
+    _report(progress, 50, "Computing ET0 and crop requirements")
+    result = run_requirements(loaded.graph, loaded.properties, weather, season_start, days, settings)
+    _report(progress, 100, "Requirements ready")
+    return {'network': loaded, 'weather': weather, 'result': result}
+
@@ -1,13 +1,281 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel
-
 # ui/tabs/requirements_tab.py
 
+from pathlib import Path
+
+import numpy as np
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                               QDoubleSpinBox, QSpinBox, QDateEdit, QComboBox, QFileDialog,
+                               QMessageBox, QSplitter, QTableWidget, QTableWidgetItem,
+                               QHeaderView, QGroupBox)
+from PySide6.QtCore import Qt, QDate
+
+from utils.db import get_db
+from .network_db_ops import NetworkDatabaseOperations
+from .network_loader import run_save_properties
+from .network_selector import NetworkSelector
+from .network_worker import TaskRunner
+from .requirements_engine import CROPS, DEFAULT_SETTINGS, RequirementsResult, run_requirements_analysis
+from .timing_panel import TimingPanel
+
+# Rows shown per results table; the full results stay in memory
+MAX_TABLE_ROWS = 500
+
+
 class RequirementsTab(QWidget):
+    """
+    Crop water requirements of a saved network: FAO-56 ET0 from a weather
+    file, ETc per field from its crop (field properties or the defaults
+    below), and daily totals per canal and distribution point.
+    """
     def __init__(self):
         super().__init__()
+        self.db = None
+        self._db_ops = None
+        self.network_id = None
+        self.weather_path = None
+        self.loaded = None
+        self.result = None
         self.setup_ui()
 
     def setup_ui(self):
         layout = QVBoxLayout()
-        layout.addWidget(QLabel("Water Requirements Tab"))
-        self.setLayout(layout)
\ No newline at end of file
+        layout.setSpacing(5)
+
+        self.network_selector = NetworkSelector(lambda: self.db_ops)
+        self.network_selector.networkSelected.connect(self.select_network)
+        layout.addWidget(self.network_selector)
+
+        weather_layout = QHBoxLayout()
+        self.weather_btn = QPushButton("Load Weather (CSV)")
+        self.weather_btn.clicked.connect(self.choose_weather)
+        self.weather_label = QLabel("No weather file")
+        self.latitude = self._spin_box(-90.0, 90.0, DEFAULT_SETTINGS['latitude'], 2)
+        self.elevation = self._spin_box(-500.0, 6000.0, DEFAULT_SETTINGS['elevation'], 0)
+        weather_layout.addWidget(self.weather_btn)
+        weather_layout.addWidget(self.weather_label)
+        weather_layout.addWidget(QLabel("Latitude:"))
+        weather_layout.addWidget(self.latitude)
+        weather_layout.addWidget(QLabel("Elevation (m):"))
+        weather_layout.addWidget(self.elevation)
+        weather_layout.addStretch()
+        layout.addLayout(weather_layout)
+
+        # Season and the defaults for fields without their own crop properties
+        settings_layout = QHBoxLayout()
+        self.season_start = QDateEdit(QDate(QDate.currentDate().year(), 4, 1))
+        self.season_start.setCalendarPopup(True)
+        self.season_days = QSpinBox()
+        self.season_days.setRange(1, 366)
+        self.season_days.setValue(200)
+        self.default_crop = QComboBox()
+        self.default_crop.addItems(list(CROPS))
+        self.default_crop.setCurrentText(DEFAULT_SETTINGS['crop'])
+        self.default_area = self._spin_box(0.01, 10000.0, DEFAULT_SETTINGS['area_ha'], 2)
+        self.efficiency = self._spin_box(0.05, 1.0, DEFAULT_SETTINGS['efficiency'], 2)
+        self.efficiency.setSingleStep(0.05)
+        for label, widget in (("Season start:", self.season_start), ("Days:", self.season_days),
+                              ("Crop:", self.default_crop), ("Area (ha):", self.default_area),
+                              ("Efficiency:", self.efficiency)):
+            settings_layout.addWidget(QLabel(label))
+            settings_layout.addWidget(widget)
+
+        self.calculate_btn = QPushButton("Calculate")
+        self.calculate_btn.clicked.connect(self.calculate)
+        self.store_btn = QPushButton("Store Peak Field Demands")
+        self.store_btn.setToolTip("Save each field's peak flow as its demand, used by the Capacity and Delivery tabs")
+        self.store_btn.clicked.connect(self.store_demands)
+        self.timings_btn = QPushButton("Show Timings")
+        self.timings_btn.setCheckable(True)
+        self.timings_btn.toggled.connect(self.toggle_timings)
+        settings_layout.addWidget(self.calculate_btn)
+        settings_layout.addWidget(self.store_btn)
+        settings_layout.addStretch()
+        settings_layout.addWidget(self.timings_btn)
+        layout.addLayout(settings_layout)
+
+        self.task_runner = TaskRunner()
+        self.task_runner.busyChanged.connect(self.set_busy)
+        self.task_runner.profiled.connect(self.on_profiled)
+        layout.addWidget(self.task_runner)
+
+        self.summary_label = QLabel("Load a network and a weather file to compute requirements.")
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        main_splitter = QSplitter(Qt.Orientation.Horizontal)
+
+        canal_group = QGroupBox("Canals and distribution points")
+        canal_layout = QVBoxLayout(canal_group)
+        self.canal_table = self._create_table(
+            ["Component", "Label", "Fields", "Season (m³)", "Peak (l/s)", "Peak day", "Capacity (l/s)"]
+        )
+        canal_layout.addWidget(self.canal_table)
+        main_splitter.addWidget(canal_group)
+
+        field_group = QGroupBox("Fields")
+        field_layout = QVBoxLayout(field_group)
+        self.field_table = self._create_table(
+            ["Field", "Crop", "Area (ha)", "ETc (mm)", "Season (m³)", "Peak (l/s)"]
+        )
+        field_layout.addWidget(self.field_table)
+        main_splitter.addWidget(field_group)
+
+        self.timing_panel = TimingPanel()
+        self.timing_panel.setVisible(False)
+        main_splitter.addWidget(self.timing_panel)
+
+        layout.addWidget(main_splitter)
+        self.setLayout(layout)
+        self.set_busy(False)
+
+    @staticmethod
+    def _spin_box(minimum: float, maximum: float, value: float, decimals: int) -> QDoubleSpinBox:
+        spin_box = QDoubleSpinBox()
+        spin_box.setDecimals(decimals)
+        spin_box.setRange(minimum, maximum)
+        spin_box.setValue(value)
+        return spin_box
+
+    def _create_table(self, headers) -> QTableWidget:
+        table = QTableWidget(0, len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.verticalHeader().setVisible(False)
+        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    @property
+    def db_ops(self) -> NetworkDatabaseOperations:
+        """Database operations; the session is opened on first use."""
+        if self._db_ops is None:
+            self.db = next(get_db())
+            self._db_ops = NetworkDatabaseOperations(self.db)
+        return self._db_ops
+
+    def settings(self) -> dict:
+        return {
+            'crop': self.default_crop.currentText(),
+            'area_ha': self.default_area.value(),
+            'efficiency': self.efficiency.value(),
+            'latitude': self.latitude.value(),
+            'elevation': self.elevation.value()
+        }
+
+    def choose_weather(self):
+        file_name, _ = QFileDialog.getOpenFileName(
+            self, "Open Weather File", "", "CSV Files (*.csv);;All Files (*)"
+        )
+        if file_name:
+            self.weather_path = file_name
+            self.weather_label.setText(Path(file_name).name)
+            self.calculate()
+
+    def select_network(self, network_id: int):
+        self.network_id = network_id
+        self.calculate()
+
+    def calculate(self):
+        if self.network_id is None or self.weather_path is None:
+            self.set_busy(False)
+            return
+        self.task_runner.start(
+            run_requirements_analysis, self.on_calculated, "Error computing requirements",
+            self.network_id, self.weather_path, self.season_start.date().toPython(),
+            self.season_days.value(), self.settings()
+        )
+
+    def on_calculated(self, result: dict):
+        self.loaded, self.result = result['network'], result['result']
+        weather = result['weather']
+        summary = self.result.summary()
+        self.summary_label.setText(
+            f"Network #{self.loaded.network_id}: {summary['fields']} fields, "
+            f"{summary['area_ha']:,.1f} ha, {summary['days']} days "
+            f"(weather {weather.first_date} to {weather.last_date}, {len(weather.stations)} station(s)).\n"
+            f"Mean season ETc {summary['season_etc_mm']:.0f} mm; gross requirement "
+            f"{summary['season_volume_m3']:,.0f} m³, peak {summary['peak_flow_lps']:,.1f} l/s."
+        )
+        self.show_canals()
+        self.show_fields()
+
+    def show_canals(self):
+        """Canals and distribution points, largest peak first; flags peaks over capacity."""
+        result = self.result
+        node_ids = result.graph.node_ids
+        peaks = RequirementsResult.peak_flow(result.node_gross)
+        order = np.argsort(-peaks, kind='stable')[:MAX_TABLE_ROWS]
+        table = self.canal_table
+        table.setRowCount(len(order))
+        for row, k in enumerate(order):
+            node_id = node_ids[result.nodes[k]]
+            capacity = (self.loaded.properties.get(node_id) or {}).get('capacity')
+            values = [
+                node_id, self.loaded.labels.get(node_id, ""), str(result.node_fields[k]),
+                f"{result.node_gross[k].sum():,.0f}", f"{peaks[k]:,.1f}",
+                str(result.dates[int(result.node_gross[k].argmax())]) if result.node_gross.shape[1] else "",
+                "" if capacity is None else f"{float(capacity):,.1f}"
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 6 and capacity is not None and peaks[k] > float(capacity):
+                    item.setForeground(Qt.GlobalColor.red)
+                    item.setToolTip("Peak requirement exceeds the capacity")
+                table.setItem(row, column, item)
+
+    def show_fields(self):
+        """Fields, largest season volume first."""
+        result = self.result
+        node_ids = result.graph.node_ids
+        season = result.gross.sum(axis=1)
+        season_etc = result.etc.sum(axis=1)
+        peaks = RequirementsResult.peak_flow(result.gross)
+        order = np.argsort(-season, kind='stable')[:MAX_TABLE_ROWS]
+        table = self.field_table
+        table.setRowCount(len(order))
+        for row, k in enumerate(order):
+            values = [
+                node_ids[result.fields[k]], result.crops[k], f"{result.area[k]:,.2f}",
+                f"{season_etc[k]:,.0f}", f"{season[k]:,.0f}", f"{peaks[k]:,.2f}"
+            ]
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+
+    def store_demands(self):
+        """Save every field's peak requirement (l/s) as its 'demand' property."""
+        if self.result is None:
+            return
+        result = self.result
+        node_ids = result.graph.node_ids
+        peaks = RequirementsResult.peak_flow(result.gross)
+        updates = {
+            node_ids[field]: {'demand': round(float(peak), 3)}
+            for field, peak in zip(result.fields.tolist(), peaks.tolist())
+        }
+        self.task_runner.start(
+            run_save_properties, self.on_demands_stored, "Error storing demands",
+            self.loaded.network_id, updates
+        )
+
+    def on_demands_stored(self, count: int):
+        skipped = len(self.result.fields) - count
+        QMessageBox.information(
+            self, "Success",
+            f"Stored the peak demand of {count} fields"
+            + (f"\n{skipped} fields have no component record and were skipped." if skipped else "")
+        )
+
+    def on_profiled(self, run):
+        self.timing_panel.show_run(run)
+
+    def toggle_timings(self, visible: bool):
+        self.timing_panel.setVisible(visible)
+        self.timings_btn.setText("Hide Timings" if visible else "Show Timings")
+
+    def set_busy(self, busy: bool):
+        self.network_selector.set_enabled(not busy)
+        self.weather_btn.setEnabled(not busy)
+        self.calculate_btn.setEnabled(
+            not busy and self.network_id is not None and self.weather_path is not None
+        )
+        self.store_btn.setEnabled(not busy and self.result is not None)
@@ -0,0 +1,135 @@
+# ui/tabs/series_chart.py
+
+from typing import Optional
+
+import numpy as np
+from PySide6.QtCharts import QAreaSeries, QChart, QChartView, QDateTimeAxis, QLineSeries, QScatterSeries, QValueAxis
+from PySide6.QtCore import Qt, QDateTime, QPointF, QTimer
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+
+from utils.timeseries_store import StoredSeries
+
+# Points per line; the overview reads the pyramid level that gives about this many
+MAX_POINTS = 2000
+
+# Wait for the zoom to settle before reading the visible range
+RELOAD_DELAY_MS = 150
+
+
+def _milliseconds(times: np.ndarray) -> np.ndarray:
+    return times.astype('datetime64[ms]').astype(np.int64).astype(float)
+
+
+def _points(x: np.ndarray, y: np.ndarray):
+    return [QPointF(a, b) for a, b in zip(x.tolist(), y.tolist())]
+
+
+class SeriesChart(QWidget):
+    """
+    Plot of a stored series: the min/max envelope and mean of its values,
+    anomalies as red dots. Drag across the plot to zoom into a time range
+    (right click zooms out); each zoom reads only the pyramid buckets of the
+    visible range (StoredSeries.overview), so a year and an hour cost the same.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.series = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header_layout = QHBoxLayout()
+        self.info_label = QLabel()
+        header_layout.addWidget(self.info_label)
+        header_layout.addStretch()
+        self.reset_btn = QPushButton("Reset Zoom")
+        self.reset_btn.clicked.connect(self.reset_zoom)
+        header_layout.addWidget(self.reset_btn)
+        layout.addLayout(header_layout)
+
+        self.chart = QChart()
+        self.chart.legend().setVisible(False)
+
+        self.upper = QLineSeries()
+        self.lower = QLineSeries()
+        self.envelope = QAreaSeries(self.upper, self.lower)
+        self.envelope.setColor(QColor(70, 130, 180, 80))
+        self.envelope.setPen(QPen(Qt.PenStyle.NoPen))
+        self.mean_line = QLineSeries()
+        self.mean_line.setPen(QPen(QColor(30, 80, 140), 1))
+        self.anomaly_dots = QScatterSeries()
+        self.anomaly_dots.setColor(Qt.GlobalColor.red)
+        self.anomaly_dots.setBorderColor(Qt.GlobalColor.red)
+        self.anomaly_dots.setMarkerSize(6)
+
+        self.x_axis = QDateTimeAxis()
+        self.x_axis.setFormat("yyyy-MM-dd<br>HH:mm")
+        self.x_axis.setTickCount(6)
+        self.y_axis = QValueAxis()
+        self.chart.addAxis(self.x_axis, Qt.AlignmentFlag.AlignBottom)
+        self.chart.addAxis(self.y_axis, Qt.AlignmentFlag.AlignLeft)
+        for series in (self.envelope, self.mean_line, self.anomaly_dots):
+            self.chart.addSeries(series)
+            series.attachAxis(self.x_axis)
+            series.attachAxis(self.y_axis)
+
+        self.view = QChartView(self.chart)
+        self.view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.view.setRubberBand(QChartView.RubberBand.HorizontalRubberBand)
+        layout.addWidget(self.view)
+
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload)
+        self.x_axis.rangeChanged.connect(lambda *_: self.reload_timer.start())
+
+        self.set_series(None)
+
+    def set_series(self, series: Optional[StoredSeries], message: str = ""):
+        """Show a series over its whole time range; None clears the plot (showing message)."""
+        self.series = series if series is not None and series.length else None
+        self.reset_btn.setEnabled(self.series is not None)
+        if self.series is None:
+            for line in (self.upper, self.lower, self.mean_line, self.anomaly_dots):
+                line.clear()
+            self.info_label.setText(message)
+            return
+        self.reset_zoom()
+
+    def reset_zoom(self):
+        if self.series is None:
+            return
+        first = _milliseconds(self.series.times(0, 1))[0]
+        last = _milliseconds(self.series.times(self.series.length - 1))[0]
+        self.chart.zoomReset()
+        self.x_axis.setRange(QDateTime.fromMSecsSinceEpoch(int(first)),
+                             QDateTime.fromMSecsSinceEpoch(int(max(last, first + 1))))
+        self.reload()
+
+    def reload(self):
+        """Read the visible time range at the resolution that fits MAX_POINTS."""
+        self.reload_timer.stop()
+        if self.series is None:
+            return
+        start = np.datetime64(self.x_axis.min().toMSecsSinceEpoch(), 'ms')
+        end = np.datetime64(self.x_axis.max().toMSecsSinceEpoch(), 'ms') + np.timedelta64(1, 'ms')
+        view = self.series.overview(start, end, max_points=MAX_POINTS)
+
+        x = _milliseconds(view['time'])
+        self.upper.replace(_points(x, view['max']))
+        self.lower.replace(_points(x, view['min']))
+        self.mean_line.replace(_points(x, view['mean']))
+        self.anomaly_dots.replace(_points(_milliseconds(view['anomaly_time']), view['anomaly_value']))
+
+        if len(x):
+            low, high = float(view['min'].min()), float(view['max'].max())
+            margin = 0.05 * (high - low) or max(abs(high) * 0.05, 1.0)
+            self.y_axis.setRange(low - margin, high + margin)
+        per_point = view['samples_per_point']
+        resolution = "samples" if per_point == 1 else f"min/mean/max per {per_point:,} samples"
+        self.info_label.setText(f"{view['samples']:,} samples in view ({resolution}), "
+                                f"{len(view['anomaly_time']):,} anomalies shown")
@@ -0,0 +1,77 @@
+# ui/tabs/timing_panel.py
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem
+from PySide6.QtCore import Qt
+
+# Runs kept in the panel; older ones are dropped
+MAX_RUNS = 10
+
+
+class TimingPanel(QWidget):
+    """
+    Per-run timing breakdown from utils.profiling: one top-level row per run
+    (newest first) with its spans nested below, showing each step's time,
+    its share of the run and its counts (nodes, edges, paths, rows, ...).
+    """
+    HEADERS = ["Step", "Time (ms)", "Share", "Details"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.runs = []  # [(ProfileRun, its top-level item)], newest first
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        header_layout = QHBoxLayout()
+        header_layout.addWidget(QLabel("Timings"))
+        header_layout.addStretch()
+        self.clear_btn = QPushButton("Clear")
+        self.clear_btn.clicked.connect(self.clear)
+        header_layout.addWidget(self.clear_btn)
+        layout.addLayout(header_layout)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(self.HEADERS)
+        self.tree.setUniformRowHeights(True)
+        self.tree.setColumnWidth(0, 260)
+        layout.addWidget(self.tree)
+
+    def show_run(self, run):
+        """Add a run, or refresh it when spans were added to it since."""
+        item = next((shown_item for shown_run, shown_item in self.runs if shown_run is run), None)
+        if item is None:
+            item = QTreeWidgetItem()
+            self.tree.insertTopLevelItem(0, item)
+            self.runs.insert(0, (run, item))
+            for _ in self.runs[MAX_RUNS:]:
+                self.tree.takeTopLevelItem(MAX_RUNS)
+            del self.runs[MAX_RUNS:]
+
+        item.takeChildren()
+        item.setText(0, f"{run.name} ({run.started_at:%H:%M:%S})")
+        self._set_timing(item, run.duration, run.duration, run.counts)
+
+        # Spans are in start order; depth gives the parent
+        parents = [item]
+        for span in run.spans:
+            del parents[span.depth + 1:]
+            child = QTreeWidgetItem(parents[-1], [span.name])
+            self._set_timing(child, span.duration, run.duration, span.counts)
+            parents.append(child)
+
+        item.setExpanded(True)
+        for row in range(item.childCount()):
+            item.child(row).setExpanded(True)
+
+    def _set_timing(self, item: QTreeWidgetItem, duration: float, total: float, counts: dict):
+        item.setText(1, f"{duration * 1000:.1f}")
+        item.setText(2, f"{100 * duration / total:.0f}%" if total > 0 else "")
+        item.setText(3, ", ".join(f"{key}: {value}" for key, value in counts.items()))
+        item.setTextAlignment(1, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        item.setTextAlignment(2, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+    def clear(self):
+        self.tree.clear()
+        self.runs = []
@@ -1,13 +1,67 @@
 # utils/db.py
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy import (create_engine, event, inspect, text, Column, Integer, String, Float,
+                        DateTime, ForeignKey, Boolean, JSON, Index, LargeBinary)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker, Session
+from sqlalchemy.orm import relationship, sessionmaker, Session, deferred
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
+import json
+import threading
+import zlib
 from typing import Optional, Dict, Any, List
 
 Base = declarative_base()
 
+# Column types
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed; plain text from older databases reads as is."""
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode('utf-8'))
+    
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return zlib.decompress(value).decode('utf-8')
+
+class CompressedJSON(TypeDecorator):
+    """
+    JSON stored as compact, zlib-compressed UTF-8. Reads values written by
+    older versions too: JSON text, including json.dumps strings that were
+    stored inside a JSON column (double-encoded).
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            return json.loads(zlib.decompress(value))
+        value = json.loads(value)
+        return json.loads(value) if isinstance(value, str) else value
+
+class JSONObject(TypeDecorator):
+    """
+    JSON column holding objects (dicts). Older versions stored json.dumps
+    strings in it (double-encoded); those read back as the objects too.
+    """
+    impl = JSON
+    cache_ok = True
+    
+    def process_result_value(self, value, dialect):
+        return json.loads(value) if isinstance(value, str) else value
+
 # Database Models
 class Project(Base):
     __tablename__ = 'projects'
@@ -28,15 +82,24 @@ class NetworkStructure(Base):
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
     upload_date = Column(DateTime, default=datetime.utcnow)
-    mermaid_content = Column(String)
-    components_json = Column(JSON)
-    connections_json = Column(JSON)
-    paths_json = Column(JSON, nullable=True)
-    diagnostics_json = Column(JSON, nullable=True)
+    # Large columns are loaded only when accessed
+    mermaid_content = deferred(Column(CompressedText))
+    components_json = deferred(Column(CompressedJSON))
+    connections_json = deferred(Column(CompressedJSON))
+    paths_json = deferred(Column(CompressedJSON, nullable=True))
+    diagnostics_json = deferred(Column(CompressedJSON, nullable=True))
     analysis_date = Column(DateTime, nullable=True)
+    content_hash = Column(String, nullable=True)  # MermaidNetwork.fingerprint()
     
     project = relationship("Project", back_populates="networks")
     components = relationship("NetworkComponent", back_populates="network", cascade="all, delete-orphan")
+    paths = relationship("NetworkPath", back_populates="network", cascade="all, delete-orphan")
+    path_nodes = relationship("NetworkPathNode", back_populates="network", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index('ix_network_structures_project_upload', 'project_id', 'upload_date'),
+        Index('ix_network_structures_content_hash', 'content_hash'),
+    )
 
 class NetworkComponent(Base):
     __tablename__ = 'network_components'
@@ -46,9 +109,67 @@ class NetworkComponent(Base):
     component_id = Column(String)  # e.g., 'DP1', 'MC1'
     component_type = Column(String)  # e.g., 'Distribution Point', 'Canal'
     label = Column(String)
-    properties = Column(JSON)
+    properties = Column(JSONObject)
     
     network = relationship("NetworkStructure", back_populates="components")
+    
+    __table_args__ = (
+        Index('ix_network_components_network_id', 'network_id'),
+    )
+
+class NetworkPath(Base):
+    """One listed path of a network's path analysis."""
+    __tablename__ = 'network_paths'
+    
+    id = Column(Integer, primary_key=True)
+    network_id = Column(Integer, ForeignKey('network_structures.id'), nullable=False)
+    path_index = Column(Integer, nullable=False)  # position among the network's paths
+    start_point = Column(String)
+    end_point = Column(String)
+    length = Column(Integer)  # number of segments
+    path_type = Column(String)
+    
+    network = relationship("NetworkStructure", back_populates="paths")
+    
+    __table_args__ = (
+        Index('ix_network_paths_network_path', 'network_id', 'path_index', unique=True),
+        Index('ix_network_paths_network_end', 'network_id', 'end_point'),
+    )
+
+class NetworkPathNode(Base):
+    """Membership of one node in one path (ordered by position)."""
+    __tablename__ = 'network_path_nodes'
+    
+    id = Column(Integer, primary_key=True)
+    network_id = Column(Integer, ForeignKey('network_structures.id'), nullable=False)
+    path_index = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)
+    node_id = Column(String, nullable=False)
+    
+    network = relationship("NetworkStructure", back_populates="path_nodes")
+    
+    __table_args__ = (
+        Index('ix_network_path_nodes_network_node', 'network_id', 'node_id'),
+        Index('ix_network_path_nodes_network_path', 'network_id', 'path_index', 'position'),
+    )
+
+class AnalysisCacheEntry(Base):
+    """Analysis results keyed by the fingerprint of the analyzed network."""
+    __tablename__ = 'analysis_cache'
+    
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # e.g. 'paths'
+    result = deferred(Column(CompressedJSON))
+    # Listing budget of a result that was cut short; it serves only requests within that budget
+    truncated = Column(Boolean, nullable=True)
+    max_paths = Column(Integer, nullable=True)
+    time_budget = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('ix_analysis_cache_hash_kind', 'content_hash', 'kind', unique=True),
+    )
 
 class Analysis(Base):
     __tablename__ = 'analyses'
@@ -58,14 +179,28 @@ class Analysis(Base):
     analysis_date = Column(DateTime, default=datetime.utcnow)
     file_path = Column(String)
     status = Column(String)
+    gauge_id = Column(String, nullable=True)  # gauge of the series when the file holds several
+    
+    # Ingestion progress, committed with every chunk so an interrupted import resumes
+    file_size = Column(Integer, nullable=True)
+    resume_offset = Column(Integer, nullable=True)  # bytes of the file ingested so far
+    rows_ingested = Column(Integer, nullable=True)
+    rows_rejected = Column(Integer, nullable=True)
     
     confidence_level = Column(Float)
     signal_threshold = Column(Float)
     use_detrending = Column(Boolean, default=False)
     detrending_method = Column(String)
+    rolling_window = Column(Integer, nullable=True)  # samples in the rolling statistics
+    anomaly_count = Column(Integer, nullable=True)   # flagged samples of the last detection run
     
     project = relationship("Project", back_populates="analyses")
     results = relationship("AnalysisResult", back_populates="analysis", cascade="all, delete-orphan")
+    series_file = relationship("SeriesFile", back_populates="analysis", uselist=False, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index('ix_analyses_project_file', 'project_id', 'file_path'),
+    )
 
 class AnalysisResult(Base):
     __tablename__ = 'analysis_results'
@@ -85,23 +220,103 @@ class AnalysisResult(Base):
     max_value = Column(Float)
     
     analysis = relationship("Analysis", back_populates="results")
+    
+    __table_args__ = (
+        Index('ix_analysis_results_analysis_timestamp', 'analysis_id', 'timestamp'),
+    )
+
+class SeriesFile(Base):
+    """
+    Index entry of a series in the columnar store (utils/timeseries_store.py),
+    which holds its samples instead of analysis_results rows.
+    """
+    __tablename__ = 'series_files'
+    
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(Integer, ForeignKey('analyses.id'), nullable=False)
+    path = Column(String, nullable=False)  # directory under the store root
+    samples = Column(Integer, default=0)   # committed samples; the files may hold an unfinished append
+    first_time = Column(DateTime, nullable=True)
+    last_time = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    analysis = relationship("Analysis", back_populates="series_file")
+    
+    __table_args__ = (
+        Index('ix_series_files_analysis', 'analysis_id', unique=True),
+    )
+
+# SQLite connection settings, applied to every new connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',          # readers don't block the writer
+    'synchronous': 'NORMAL',        # safe with WAL, far fewer fsyncs
+    'mmap_size': 268435456,         # 256 MB memory-mapped reads
+    'cache_size': -65536,           # 64 MB page cache (negative = KiB)
+    'busy_timeout': 5000,           # ms to wait for a lock held by another connection
+}
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def migrate(engine):
+    """
+    Bring an existing database up to the current models. Idempotent, so it
+    runs at every startup: adds missing (nullable) columns and creates any
+    missing indexes. New tables are created by create_all beforehand.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(
+                        f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                    ))
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
 
 # Database Operations
 class DatabaseManager:
-    def __init__(self, db_url: str = "sqlite:///qushtepa_irrigation.db"):
+    def __init__(self, db_url: str = "sqlite:///qushtepa_irrigation.db", initialize: bool = True):
         self.engine = create_engine(db_url)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _apply_sqlite_pragmas)
         self.SessionLocal = sessionmaker(bind=self.engine)
-        Base.metadata.create_all(self.engine)
+        # Worker processes open a database their parent already set up
+        if initialize:
+            Base.metadata.create_all(self.engine)
+            migrate(self.engine)
     
     def get_session(self) -> Session:
         return self.SessionLocal()
 
-# Global database manager instance
-db_manager = DatabaseManager()
+# Global database manager instance, created (tables + migrations) on first use
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
+
+def get_db_manager() -> DatabaseManager:
+    """Get the global database manager, initializing the database once."""
+    global _db_manager
+    if _db_manager is None:
+        with _db_manager_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager()
+    return _db_manager
+
+def __getattr__(name):
+    # utils.db.db_manager keeps working without initializing at import time
+    if name == 'db_manager':
+        return get_db_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db() -> Session:
     """Dependency to get database session"""
-    session = db_manager.get_session()
+    session = get_db_manager().get_session()
     try:
         yield session
     finally:
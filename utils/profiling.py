@@ -0,0 +1,218 @@
+# utils/profiling.py
+
+"""
+Lightweight timing spans for hot paths.
+
+Wrap a unit of work (one analysis, one UI update) in `profile_run(name)`;
+every `span(name, **counts)` entered on the same thread while it is active
+records its duration, nesting depth and counts (nodes, edges, paths,
+bytes, ...). Outside a run, spans cost two function calls and record nothing.
+
+    with profile_run("Path analysis") as run:
+        with span("find_all_paths", end_points=len(ends)) as timing:
+            ...
+            timing.set(paths=total)
+
+Functions can be timed as a whole with @timed(name), adding counts from
+inside with annotate(**counts).
+
+Environment flags:
+    QUSHTEPA_PROFILE_LOG=<file>    append every finished run to <file> as a JSON line
+    QUSHTEPA_CPROFILE_DIR=<dir>    write a cProfile dump per run to <dir>
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+PROFILE_LOG = os.environ.get("QUSHTEPA_PROFILE_LOG")
+CPROFILE_DIR = os.environ.get("QUSHTEPA_CPROFILE_DIR")
+
+_current_run: contextvars.ContextVar = contextvars.ContextVar('profile_run', default=None)
+
+
+class Span:
+    """One timed unit of work inside a ProfileRun."""
+    __slots__ = ('name', 'start', 'duration', 'depth', 'counts')
+
+    def __init__(self, name: str, start: float, depth: int, counts: Dict):
+        self.name = name
+        self.start = start
+        self.duration = 0.0
+        self.depth = depth
+        self.counts = counts
+
+    def set(self, **counts):
+        """Record (or update) counts such as nodes, edges or paths."""
+        self.counts.update(counts)
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'start': round(self.start, 6),
+            'duration': round(self.duration, 6),
+            'depth': self.depth,
+            **self.counts
+        }
+
+
+class _NullSpan:
+    """Stands in for a Span when no run is active."""
+    __slots__ = ()
+
+    def set(self, **counts):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class ProfileRun:
+    """The spans of one run, in the order they started."""
+    def __init__(self, name: str, counts: Optional[Dict] = None):
+        self.name = name
+        self.counts = dict(counts or {})
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.spans: List[Span] = []
+        self.open: List[Span] = []  # spans entered and not yet finished, innermost last
+
+    def set(self, **counts):
+        self.counts.update(counts)
+
+    def add(self, name: str, duration: float, **counts):
+        """Record an externally measured duration (e.g. reported by the web viewer)."""
+        span = Span(name, time.perf_counter() - self.started, len(self.open), counts)
+        span.duration = duration
+        self.spans.append(span)
+
+    def totals(self) -> Dict[str, Dict]:
+        """Per span name: number of calls and total time."""
+        totals = {}
+        for span in self.spans:
+            entry = totals.setdefault(span.name, {'calls': 0, 'duration': 0.0})
+            entry['calls'] += 1
+            entry['duration'] += span.duration
+        return totals
+
+    def to_dict(self) -> Dict:
+        return {
+            'run': self.name,
+            'started': self.started_at.isoformat(timespec='milliseconds'),
+            'duration': round(self.duration, 6),
+            **self.counts,
+            'spans': [span.to_dict() for span in self.spans]
+        }
+
+
+def current_run() -> Optional[ProfileRun]:
+    return _current_run.get()
+
+
+@contextmanager
+def span(name: str, **counts) -> Iterator[Span]:
+    """Time the enclosed block as a span of the current run, if any."""
+    run = _current_run.get()
+    if run is None:
+        yield _NULL_SPAN
+        return
+    started = time.perf_counter()
+    record = Span(name, started - run.started, len(run.open), counts)
+    run.spans.append(record)
+    run.open.append(record)
+    try:
+        yield record
+    finally:
+        run.open.pop()
+        record.duration = time.perf_counter() - started
+
+
+def annotate(**counts):
+    """Add counts to the innermost open span, e.g. from inside a @timed function."""
+    run = _current_run.get()
+    if run is not None and run.open:
+        run.open[-1].counts.update(counts)
+
+
+def timed(name: Optional[str] = None):
+    """Decorator: run the function inside a span (named after it by default)."""
+    def decorator(function):
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile_run(name: str, **counts) -> Iterator[ProfileRun]:
+    """
+    Collect the spans entered in this block into a new ProfileRun. When it
+    ends, the run is logged and dumped if the environment flags ask for it.
+    """
+    run = ProfileRun(name, counts)
+    token = _current_run.set(run)
+    profiler = _start_cprofile()
+    try:
+        yield run
+    finally:
+        run.duration = time.perf_counter() - run.started
+        _current_run.reset(token)
+        if profiler:
+            profiler.disable()
+            _dump_cprofile(profiler, run)
+        if PROFILE_LOG:
+            _write_log(run)
+
+
+@contextmanager
+def continue_run(run: Optional[ProfileRun]) -> Iterator[Optional[ProfileRun]]:
+    """
+    Add spans to a finished run, e.g. the UI updates that show the results of
+    a run recorded on a worker thread. A None run records nothing.
+    """
+    if run is None:
+        yield None
+        return
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        run.duration = max(run.duration, time.perf_counter() - run.started)
+
+
+def _start_cprofile() -> Optional[cProfile.Profile]:
+    if not CPROFILE_DIR:
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Only one profiler can be active at a time; a concurrent run keeps it
+        return None
+    return profiler
+
+
+def _dump_cprofile(profiler: cProfile.Profile, run: ProfileRun):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', run.name).strip('-').lower() or 'run'
+    directory = Path(CPROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(directory / f"{slug}-{run.started_at:%Y%m%d-%H%M%S-%f}.prof"))
+
+
+def _write_log(run: ProfileRun):
+    with open(PROFILE_LOG, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(run.to_dict()) + "\n")
@@ -0,0 +1,331 @@
+# utils/timeseries_store.py
+
+"""
+Columnar storage of measurement series, next to the SQLite database.
+
+Each series (one Analysis) is a directory of flat binary column files, one
+value per sample in time order: `time` (int64 microseconds since the Unix
+epoch), `value` (float64) and, after anomaly detection, the result columns
+of RESULT_COLUMNS. Files are read through np.memmap, so a slice costs only
+the pages it touches. SQLite indexes the series (the SeriesFile model in
+utils/db.py): its directory, and how many samples are committed. Samples
+past that count are an unfinished append and are cut off when the series
+is opened for writing.
+
+For plotting, every series keeps min/max/sum pyramids of its values:
+level k has one bucket per FANOUT**k samples. `overview(start, end,
+max_points)` finds the sample range with a binary search on `time`, reads
+the coarsest level that still has max_points buckets in it and merges
+neighbouring buckets down to max_points, so a year of 1-minute data and an
+hour of it cost the same to draw.
+
+    store = store_for_url("sqlite:///qushtepa_irrigation.db")
+    series = store.series(record.path, record.samples)
+    series.append(times, values); series.sync()
+    view = series.overview(start, end, max_points=2000)
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Samples per bucket grow by this factor from one pyramid level to the next
+FANOUT = 16
+
+# Pyramid levels are added until the top one has at most this many buckets
+TOP_BUCKETS = 1024
+
+DATA_COLUMNS = {'time': np.int64, 'value': np.float64}
+
+# Anomaly detection results (see ui/tabs/anomaly_engine.py)
+RESULT_COLUMNS = {
+    'processed_value': np.float64,
+    'anomaly_score': np.float64,
+    'is_anomaly': np.bool_,
+    'mean': np.float64,
+    'std_dev': np.float64,
+    'min_value': np.float64,
+    'max_value': np.float64,
+}
+
+# Positions of the samples flagged as anomalies, ascending
+ANOMALY_POSITIONS = 'anomalies'
+
+PYRAMID_STATS = {'min': np.minimum, 'max': np.maximum, 'sum': np.add}
+
+
+class Column:
+    """One flat binary column file of fixed-size values."""
+    def __init__(self, path: Path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.path) // self.dtype.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def read(self, start: int = 0, stop: Optional[int] = None, step: int = 1) -> np.ndarray:
+        """Values [start:stop:step] as an in-memory array."""
+        length = len(self)
+        stop = length if stop is None else min(stop, length)
+        if start >= stop:
+            return np.empty(0, dtype=self.dtype)
+        return np.array(self.memmap()[start:stop:step])
+
+    def memmap(self) -> np.ndarray:
+        """Read-only view of the whole column (empty columns can't be mapped)."""
+        if len(self) == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(self.path, dtype=self.dtype, mode='r')
+
+    def write(self, start: int, values: np.ndarray):
+        """Write values from position start, extending the file as needed."""
+        values = np.ascontiguousarray(values, dtype=self.dtype)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'r+b' if self.path.exists() else 'wb') as file:
+            file.seek(start * self.dtype.itemsize)
+            file.write(values.tobytes())
+
+    def truncate(self, length: int):
+        if len(self) > length:
+            with open(self.path, 'r+b') as file:
+                file.truncate(length * self.dtype.itemsize)
+
+    def sync(self):
+        if self.path.exists():
+            with open(self.path, 'r+b') as file:
+                os.fsync(file.fileno())
+
+
+class StoredSeries:
+    """
+    The columns and pyramids of one series. `length` is the committed
+    number of samples; the caller stores it in SQLite after sync().
+    """
+    def __init__(self, directory: Path, length: int):
+        self.directory = directory
+        self.length = length
+        self.columns = {
+            name: Column(directory / name, dtype)
+            for name, dtype in {**DATA_COLUMNS, **RESULT_COLUMNS}.items()
+        }
+        self.anomalies = Column(directory / ANOMALY_POSITIONS, np.int64)
+
+    # Writing
+
+    def _pyramid(self, level: int, stat: str) -> Column:
+        return Column(self.directory / 'pyramid' / f'{level}.{stat}', np.float64)
+
+    def levels(self) -> int:
+        """Number of pyramid levels kept for the current length."""
+        levels, buckets = 0, self.length
+        while buckets > TOP_BUCKETS:
+            levels += 1
+            buckets = -(-self.length // FANOUT ** levels)
+        return levels
+
+    def discard_uncommitted(self):
+        """Cut every file back to the committed length (after an interrupted append)."""
+        for column in self.columns.values():
+            column.truncate(self.length)
+        self.anomalies.truncate(int(np.searchsorted(self.anomalies.memmap(), self.length)))
+        self._update_pyramids(self.length)
+
+    def append(self, times: np.ndarray, values: np.ndarray) -> bool:
+        """
+        Append samples (datetime64 times, float values) and update the
+        pyramids. Returns False if the series is no longer in time order.
+        """
+        if not len(times):
+            return True
+        times = np.asarray(times).astype('datetime64[us]').view(np.int64)
+        in_order = bool(np.all(times[1:] >= times[:-1]))
+        if in_order and self.length:
+            in_order = times[0] >= self.columns['time'].read(self.length - 1, self.length)[0]
+        start = self.length
+        self.columns['time'].write(start, times)
+        self.columns['value'].write(start, values)
+        self.length += len(times)
+        self._update_pyramids(start)
+        return in_order
+
+    def _update_pyramids(self, changed_from: int):
+        """Recompute every pyramid bucket that holds samples from changed_from on."""
+        levels = self.levels()
+        below = None  # (first rebuilt bucket, {stat: buckets}) of the level below
+        for level in range(1, levels + 1):
+            size = FANOUT ** level
+            # A level added by this change is built from its start
+            first = min(changed_from // size, len(self._pyramid(level, 'sum')))
+            if below is None:
+                values = self.columns['value'].read(first * size, self.length)
+                children = dict.fromkeys(PYRAMID_STATS, values)
+                step = size
+            else:
+                # Children of the first rebuilt bucket that were not rebuilt themselves
+                below_first, below_stats = below
+                children = {
+                    stat: np.concatenate([
+                        self._pyramid(level - 1, stat).read(first * FANOUT, below_first), below_stats[stat]
+                    ])
+                    for stat in PYRAMID_STATS
+                }
+                step = FANOUT
+            offsets = np.arange(0, len(children['sum']), step)
+            stats = {
+                stat: function.reduceat(children[stat], offsets) if len(offsets) else children[stat][:0]
+                for stat, function in PYRAMID_STATS.items()
+            }
+            for stat, values in stats.items():
+                column = self._pyramid(level, stat)
+                column.write(first, values)
+                column.truncate(first + len(values))
+            below = (first, stats)
+        # Levels no longer needed after a truncation
+        level = levels + 1
+        while self._pyramid(level, 'sum').path.exists():
+            for stat in PYRAMID_STATS:
+                self._pyramid(level, stat).path.unlink()
+            level += 1
+
+    def in_time_order(self, block: int = 1 << 22) -> bool:
+        times = self.columns['time'].memmap()[:self.length]
+        for start in range(0, max(len(times) - 1, 0), block):
+            chunk = times[start:start + block + 1]
+            if np.any(chunk[1:] < chunk[:-1]):
+                return False
+        return True
+
+    def sort(self):
+        """Put the samples back in time order (stable), e.g. after importing an out-of-order file."""
+        times = self.columns['time'].read(0, self.length)
+        order = np.argsort(times, kind='stable')
+        for name, column in self.columns.items():
+            if len(column) >= self.length:
+                column.write(0, column.read(0, self.length)[order])
+        self.anomalies.truncate(0)
+        self._update_pyramids(0)
+
+    def write_results(self, start: int, results: Dict[str, np.ndarray]):
+        """Write RESULT_COLUMNS for the samples from position start."""
+        for name in RESULT_COLUMNS:
+            self.columns[name].write(start, results[name])
+
+    def write_anomalies(self, positions: np.ndarray, start: int = 0):
+        """Write anomaly positions from entry start on, dropping any after them."""
+        self.anomalies.write(start, positions)
+        self.anomalies.truncate(start + len(positions))
+
+    def sync(self):
+        """Flush the written files to disk, before their length is committed to SQLite."""
+        pyramids = [self._pyramid(level, stat) for level in range(1, self.levels() + 1) for stat in PYRAMID_STATS]
+        for column in [*self.columns.values(), self.anomalies, *pyramids]:
+            column.sync()
+
+    # Reading
+
+    def times(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        return self.columns['time'].read(start, self._stop(stop)).view('datetime64[us]')
+
+    def read(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        return self.columns[name].read(start, self._stop(stop))
+
+    def _stop(self, stop: Optional[int]) -> int:
+        return self.length if stop is None else min(stop, self.length)
+
+    def has_results(self) -> bool:
+        return len(self.columns['anomaly_score']) >= self.length > 0
+
+    def index_range(self, start=None, end=None) -> Tuple[int, int]:
+        """Sample positions [first, last) with start <= time < end (datetime64 or None)."""
+        times = self.columns['time'].memmap()[:self.length]
+        first = 0 if start is None else int(np.searchsorted(times, np.datetime64(start, 'us').astype(np.int64)))
+        last = self.length if end is None else int(np.searchsorted(times, np.datetime64(end, 'us').astype(np.int64)))
+        return first, max(first, last)
+
+    def overview(self, start=None, end=None, max_points: int = 2000) -> Dict[str, np.ndarray]:
+        """
+        At most max_points (time, min, max, mean) rows covering start <= time
+        < end: the samples themselves when few enough, else groups of
+        neighbouring buckets of the coarsest pyramid level that still has
+        max_points buckets in the range (time of their first sample). Also
+        the anomalies in the range, thinned to max_points.
+        """
+        first, last = self.index_range(start, end)
+        count = last - first
+        level = 0
+        while level < self.levels() and FANOUT ** (level + 1) * max_points <= count:
+            level += 1
+        size = FANOUT ** level
+        bucket_first, bucket_last = first // size, -(-last // size)
+        if level == 0:
+            values = self.read('value', first, last)
+            stats = dict.fromkeys(PYRAMID_STATS, values)
+        else:
+            stats = {stat: self._pyramid(level, stat).read(bucket_first, bucket_last) for stat in PYRAMID_STATS}
+
+        # Fewer than FANOUT buckets per point, so this reads at most FANOUT * max_points values
+        group = max(1, -(-(bucket_last - bucket_first) // max_points))
+        offsets = np.arange(0, bucket_last - bucket_first, group)
+        if group > 1:
+            stats = {stat: function.reduceat(stats[stat], offsets) for stat, function in PYRAMID_STATS.items()}
+        positions = (bucket_first + offsets) * size
+        counts = np.minimum(positions + group * size, min(bucket_last * size, self.length)) - positions
+        view = {
+            'time': self.columns['time'].memmap()[positions].view('datetime64[us]') if len(positions)
+            else np.empty(0, dtype='datetime64[us]'),
+            'min': stats['min'],
+            'max': stats['max'],
+            'mean': stats['sum'] / counts,
+            'level': level,
+            'samples_per_point': size * group,
+            'samples': count
+        }
+
+        positions = self.anomalies.memmap()
+        low, high = np.searchsorted(positions, first), np.searchsorted(positions, last)
+        positions = np.array(positions[low:high:max(1, -(-(high - low) // max_points))])
+        view['anomaly_time'] = self.columns['time'].memmap()[positions].view('datetime64[us]') \
+            if len(positions) else np.empty(0, dtype='datetime64[us]')
+        view['anomaly_value'] = self.columns['value'].memmap()[positions] if len(positions) else np.empty(0)
+        return view
+
+
+class TimeSeriesStore:
+    """The series directories under one root, named by the SeriesFile path."""
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def series(self, path: str, length: int) -> StoredSeries:
+        return StoredSeries(self.root / path, length)
+
+    def remove(self, path: str):
+        shutil.rmtree(self.root / path, ignore_errors=True)
+
+
+_stores: Dict[str, TimeSeriesStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for_url(db_url: str) -> TimeSeriesStore:
+    """
+    The store of a database: `<name>_series/` beside an SQLite file, a
+    temporary directory for in-memory or server databases.
+    """
+    with _stores_lock:
+        if db_url not in _stores:
+            database = db_url.split('///', 1)[1] if db_url.startswith('sqlite:///') else ''
+            if database and database != ':memory:':
+                path = Path(database)
+                root = path.with_name(path.stem + '_series')
+            else:
+                root = Path(tempfile.mkdtemp(prefix='series_'))
+            _stores[db_url] = TimeSeriesStore(root)
+        return _stores[db_url]